@@ -0,0 +1,39 @@
+"""
+Benchmark of parsing a document with a large VPAID AdParameters payload,
+with an intern pool as in long running parsing, with and without dropping large payloads
+
+    python benchmarks/ad_parameters.py [number] [payload_kb]
+"""
+import json
+import sys
+import timeit
+
+from vast import resources
+from vast.models.caching import InternPool
+from vast.parsers import xml_parser
+
+
+def make_document(payload_kb):
+    with open(resources.INLINE_WITH_AD_PARAMETERS, "rb") as fp:
+        xml = fp.read()
+    config = dict(("key%d" % i, "value %d" % i) for i in xrange(payload_kb * 1024 // 20))
+    return xml.replace(b"{data : funky data goes here}", json.dumps(config))
+
+
+def main(number=200, payload_kb=256):
+    xml = make_document(payload_kb)
+    pool = InternPool()
+
+    cases = (
+        ("kept", dict(intern_pool=pool)),
+        ("dropped", dict(intern_pool=pool, max_ad_parameters=1024)),
+    )
+    for name, kwargs in cases:
+        vast = xml_parser.from_xml_string(xml, **kwargs)
+        data = vast.ad.inline.creatives[0].linear.ad_parameters.data
+        best = min(timeit.repeat(lambda: xml_parser.from_xml_string(xml, **kwargs), number=number, repeat=3))
+        print "%-8s %.2f ms per doc, %d chars of data kept" % (name, best / number * 1e3, len(data or u""))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,42 @@
+"""
+Benchmark of frequency capping candidate ads of users, with exact counts and with count-min sketches
+
+    python benchmarks/capping_filter.py [users] [ads] [candidates]
+"""
+import random
+import sys
+import timeit
+
+from vast.capping import AD, CREATIVE, Cap, FrequencyCapper
+from vast.models import vast_v2
+
+
+def make_ad(ad_id, creative_id):
+    media_files = [vast_v2.MediaFile.make(
+        asset=u"https://media.example.com/a.mp4", delivery=u"progressive", type=u"video/mp4",
+        width=1280, height=720, bitrate=1500,
+    )]
+    creative = vast_v2.Creative.make(
+        linear=vast_v2.Linear.make(duration=15, media_files=media_files), id=creative_id, ad_id=ad_id,
+    )
+    inline = vast_v2.Inline.make(ad_system=u"s", ad_title=u"t", impression=u"https://imp.example.com", creatives=[creative])
+    return vast_v2.Vast.make(version=u"2.0", ad=vast_v2.Ad.make_inline(id=ad_id, inline=inline))
+
+
+def main(users=10000, ads=500, candidates=20, number=2000):
+    rng = random.Random(0)
+    vasts = [make_ad(u"ad%d" % i, u"c%d" % (i // 2)) for i in xrange(ads)]
+    caps = [Cap(AD, 3, 3600), Cap(CREATIVE, 10, 86400)]
+    for name, kwargs in (("exact", {}), ("sketch", dict(sketch_width=1 << 16))):
+        capper = FrequencyCapper(caps, **kwargs)
+        for _ in xrange(users * 5):
+            capper.record(rng.randrange(users), rng.choice(vasts))
+        requests = [(rng.randrange(users), rng.sample(vasts, candidates)) for _ in xrange(number)]
+        it = iter(requests * 4)
+        best = min(timeit.repeat(lambda: capper.filter(*next(it)), number=number, repeat=3))
+        print "%-7s %6.2f us per filter of %d candidates, %.2f us per ad" % (
+            name, best / number * 1e6, candidates, best / number / candidates * 1e6)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,37 @@
+"""
+Benchmark of comparing and diffing trees, with content hashes,
+against comparing plain python values converted from the trees
+
+    python benchmarks/compare_trees.py [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.diff import diff
+from vast.models.shared import to_primitive
+from vast.parsers import xml_parser
+from vast.update import replace
+
+
+def main(number=20000):
+    vast = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+    same = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+    changed = replace(vast, "ad.inline.creatives[0].linear.media_files[3].asset", u"https://other.u/a.mp4")
+    other = xml_parser.from_xml_file(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+
+    cases = (
+        ("eq same", lambda: vast == same),
+        ("eq changed", lambda: vast == changed),
+        ("eq other", lambda: vast == other),
+        ("diff same", lambda: diff(vast, same)),
+        ("diff changed", lambda: diff(vast, changed)),
+        ("primitive eq", lambda: to_primitive(vast) == to_primitive(changed)),
+    )
+    for name, run in cases:
+        best = min(timeit.repeat(run, number=number, repeat=3))
+        print "%-13s %.2f us" % (name, best / number * 1e6)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""
+Benchmark of summarizing a corpus of parsed documents in constant memory,
+against collecting the values into lists
+
+    python benchmarks/corpus_stats.py [documents]
+"""
+import pickle
+import random
+import sys
+import time
+
+from vast.models import vast_v2
+from vast.stats import CorpusStats
+
+
+def make_ads(rng, n=200):
+    ads = []
+    for i in xrange(n):
+        media_files = [vast_v2.MediaFile.make(
+            asset=u"https://media.example.com/%d.mp4" % i, delivery=u"progressive",
+            type=rng.choice((u"video/mp4", u"video/webm", u"application/javascript")),
+            width=1280, height=720, bitrate=rng.randint(200, 6000),
+        )]
+        creative = vast_v2.Creative.make(linear=vast_v2.Linear.make(
+            duration=rng.choice((6, 15, 15, 30, 30, 60)) + rng.randint(0, 2), media_files=media_files))
+        inline = vast_v2.Inline.make(
+            ad_system=u"system%d" % int(rng.paretovariate(1)), ad_title=u"t",
+            impression=u"https://imp.example.com", creatives=[creative])
+        ads.append(vast_v2.Vast.make(version=u"2.0", ad=vast_v2.Ad.make_inline(id=u"%d" % i, inline=inline)))
+    return ads
+
+
+def main(n=200000):
+    rng = random.Random(0)
+    ads = make_ads(rng)
+    corpus = [(rng.choice(ads), rng.randint(0, 3)) for _ in xrange(n)]
+
+    start = time.time()
+    stats = CorpusStats()
+    for vast, depth in corpus:
+        stats.add(vast, wrapper_depth=depth)
+    elapsed = time.time() - start
+    print "stats  %5.2f us per document, %7d bytes pickled" % (
+        elapsed / n * 1e6, len(pickle.dumps(stats, pickle.HIGHEST_PROTOCOL)))
+
+    lists = dict(durations=[], bitrates=[], mime_types=[], ad_systems=[], depths=[])
+    for vast, depth in corpus:
+        inline = vast.ad.inline
+        lists["depths"].append(depth)
+        lists["ad_systems"].append(inline.ad_system)
+        for creative in inline.creatives:
+            lists["durations"].append(creative.linear.duration)
+            for media_file in creative.linear.media_files:
+                lists["mime_types"].append(media_file.type)
+                lists["bitrates"].append(media_file.bitrate)
+    print "lists  %7d bytes pickled" % len(pickle.dumps(lists, pickle.HIGHEST_PROTOCOL))
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,73 @@
+"""
+Memory benchmark for string interning
+
+Parses the same bundled documents many times, as a long lived ad cache would,
+and reports how many bytes the unicode values held by the parsed models take,
+with and without an intern pool.
+
+    python benchmarks/intern_memory.py [copies]
+"""
+import sys
+
+import attr
+
+from vast import resources
+from vast.models.caching import InternPool
+from vast.parsers import xml_parser
+
+
+_DOCUMENTS = (
+    resources.SIMPLE_INLINE_XML,
+    resources.INLINE_MULTI_FILES_XML,
+    resources.INLINE_WITH_TRACKING_EVENTS_XML,
+    resources.INLINE_WITH_COMPANION_ADS,
+    resources.SIMPLE_WRAPPER_XML,
+)
+
+
+def _iter_strings(value):
+    if isinstance(value, unicode):
+        yield value
+    elif isinstance(value, list):
+        for v in value:
+            for s in _iter_strings(v):
+                yield s
+    elif attr.has(value.__class__):
+        for a in attr.fields(value.__class__):
+            for s in _iter_strings(getattr(value, a.name)):
+                yield s
+
+
+def _string_bytes(models):
+    seen = {}
+    for model in models:
+        for s in _iter_strings(model):
+            seen[id(s)] = sys.getsizeof(s)
+    return len(seen), sum(seen.values())
+
+
+def _parse_all(copies, intern_pool):
+    xmls = []
+    for path in _DOCUMENTS:
+        with open(path, "r") as fp:
+            xmls.append(fp.read())
+    return [
+        xml_parser.from_xml_string(xml, intern_pool=intern_pool)
+        for _ in xrange(copies)
+        for xml in xmls
+    ]
+
+
+def main(copies=1000):
+    plain_count, plain_bytes = _string_bytes(_parse_all(copies, None))
+    pool = InternPool(max_size=10000)
+    pooled_count, pooled_bytes = _string_bytes(_parse_all(copies, pool))
+
+    print "documents parsed       : %d" % (copies * len(_DOCUMENTS))
+    print "without pool           : %d strings, %d bytes" % (plain_count, plain_bytes)
+    print "with pool              : %d strings, %d bytes" % (pooled_count, pooled_bytes)
+    print "saved                  : %.1f%%" % (100.0 * (plain_bytes - pooled_bytes) / plain_bytes)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
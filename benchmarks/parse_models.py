@@ -0,0 +1,42 @@
+"""
+Benchmark of making models out of already parsed XML dicts,
+which isolates the cost of the element schema builders and model validation from expat.
+
+    python benchmarks/parse_models.py [number]
+"""
+import sys
+import timeit
+
+import xmltodict
+
+from vast import resources
+from vast.parsers import vast_v2, xml_parser
+
+
+_DOCUMENTS = (
+    resources.INLINE_MULTI_FILES_XML,
+    resources.INLINE_WITH_TRACKING_EVENTS_XML,
+    resources.INLINE_WITH_COMPANION_ADS,
+    resources.INLINE_WITH_NON_LINEAR_ADS,
+)
+
+
+def main(number=2000):
+    xml_dicts = []
+    for path in _DOCUMENTS:
+        with open(path, "r") as fp:
+            xml_dicts.append(xmltodict.parse(fp.read(), force_list=xml_parser._FORCE_LIST_ELEMENTS))
+
+    def run():
+        for xml_dict in xml_dicts:
+            vast_v2.parse_xml(xml_dict)
+
+    best = min(timeit.repeat(run, number=number, repeat=5))
+    docs = number * len(xml_dicts)
+    print "documents : %d" % docs
+    print "per doc   : %.1f us" % (best / docs * 1e6)
+    print "docs/sec  : %.0f" % (docs / best)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,48 @@
+"""
+Benchmark of packing ad pods out of thousands of candidate ads, of standard durations,
+exactly and greedily
+
+    python benchmarks/pod_packing.py [candidates] [break_duration]
+"""
+import random
+import sys
+import timeit
+
+from vast.models import vast_v2
+from vast.pods import Candidate, pack
+
+_DURATIONS = (6, 10, 15, 15, 15, 20, 30, 30, 45, 60)
+
+
+def make_ad(durations):
+    media_files = [vast_v2.MediaFile.make(
+        asset=u"https://media.example.com/a.mp4", delivery=u"progressive", type=u"video/mp4",
+        width=1280, height=720, bitrate=1500,
+    )]
+    creatives = [
+        vast_v2.Creative.make(linear=vast_v2.Linear.make(duration=d, media_files=media_files), sequence=i + 1)
+        for i, d in enumerate(durations)
+    ]
+    inline = vast_v2.Inline.make(ad_system=u"s", ad_title=u"t", impression=u"https://imp.example.com", creatives=creatives)
+    return vast_v2.Vast.make(version=u"2.0", ad=vast_v2.Ad.make_inline(id=u"1", inline=inline))
+
+
+def make_candidates(n, rng):
+    ads = [make_ad([d]) for d in sorted(set(_DURATIONS))] + [make_ad([15, 15]), make_ad([6, 10, 15])]
+    return [
+        Candidate(rng.choice(ads), rng.uniform(1, 50), rng.randint(0, n // 4))
+        for _ in xrange(n)
+    ]
+
+
+def main(n=5000, break_duration=180, number=20):
+    candidates = make_candidates(n, random.Random(0))
+    for name, max_cells in (("exact", 1 << 18), ("greedy", 0)):
+        pod = pack(candidates, break_duration, max_cells=max_cells)
+        best = min(timeit.repeat(lambda: pack(candidates, break_duration, max_cells=max_cells), number=number, repeat=3))
+        print "%-7s %6.2f ms for %d candidates, %d ads of %d seconds, value %.1f" % (
+            name, best / number * 1e3, n, len(pod.candidates), pod.duration, pod.value)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,60 @@
+"""
+Benchmark of compiled path queries against hand written walks
+
+    python benchmarks/query_paths.py [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.parsers import xml_parser
+from vast.query import compile_path
+
+_START_URIS = "ad.*.creatives[*].linear.tracking_events[tracking_event_type=start].tracking_event_uri"
+_ASSETS = "ad.inline.creatives[*].linear.media_files[*].asset"
+
+
+def naive_start_uris(vast):
+    uris = []
+    for ad_type in (vast.ad.inline, vast.ad.wrapper):
+        if ad_type is None or not ad_type.creatives:
+            continue
+        for creative in ad_type.creatives:
+            if creative.linear is None or not creative.linear.tracking_events:
+                continue
+            for event in creative.linear.tracking_events:
+                if event.tracking_event_type.value == "start":
+                    uris.append(event.tracking_event_uri)
+    return uris
+
+
+def naive_assets(vast):
+    assets = []
+    if vast.ad.inline is not None:
+        for creative in vast.ad.inline.creatives:
+            if creative.linear is not None:
+                for media_file in creative.linear.media_files:
+                    assets.append(media_file.asset)
+    return assets
+
+
+def main(number=20000, repeat=10):
+    tracking = xml_parser.from_xml_file(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+    media = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+
+    cases = (
+        ("start uris", tracking, naive_start_uris, compile_path(_START_URIS)),
+        ("assets", media, naive_assets, compile_path(_ASSETS)),
+    )
+    for name, vast, naive, query in cases:
+        assert naive(vast) == list(query.find(vast)) == query.all(vast)
+        runs = (lambda: naive(vast), lambda: list(query.find(vast)), lambda: query.all(vast))
+        # interleaved, for load on the machine to weigh on all of them alike
+        best = [min(t) for t in zip(*[[timeit.timeit(run, number=number) for run in runs] for _ in xrange(repeat)])]
+        print "%-10s naive %.2f us, list(find) %.2f us, all %.2f us" % tuple(
+            [name] + [t / number * 1e6 for t in best]
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
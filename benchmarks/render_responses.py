@@ -0,0 +1,41 @@
+"""
+Benchmark of responding with a VAST document per request, where an impression id and a cache buster
+change per response: rendering a Template, against updating models and writing them out as XML
+
+    python benchmarks/render_responses.py [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.parsers import xml_parser
+from vast.templates import Template, number as number_slot, to_xml, uri_component
+from vast.update import replace
+
+_IMPRESSION = u"https://imp.example.com/i?id=%s&cb=%s"
+
+
+def main(number=5000):
+    vast = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+    template = Template(
+        replace(vast, "ad.inline.impression", _IMPRESSION % (u"${impression_id}", u"${cb}")),
+        (uri_component("impression_id"), number_slot("cb")),
+    )
+    counter = [0]
+
+    def render():
+        counter[0] += 1
+        template.render(impression_id=u"req-%d" % counter[0], cb=counter[0])
+
+    def models():
+        counter[0] += 1
+        to_xml(replace(vast, "ad.inline.impression", _IMPRESSION % (u"req-%d" % counter[0], counter[0])))
+
+    for name, run in (("template", render), ("models", models)):
+        best = min(timeit.repeat(run, number=number, repeat=5))
+        print "%-9s %8.1f us per response, %8d responses per second" % (
+            name, best / number * 1e6, number / best)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
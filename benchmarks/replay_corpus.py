@@ -0,0 +1,44 @@
+"""
+Benchmark of parsing a corpus captured by vast.capture, replaying production shapes of documents,
+or the bundled resources if no corpus is given
+
+    python benchmarks/replay_corpus.py [corpus.jsonl.gz] [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.capture import iter_corpus
+from vast.parsers import xml_parser
+
+
+def load(path=None):
+    if path is not None:
+        return [xml for _, xml in iter_corpus(path)]
+    documents = []
+    for name in sorted(dir(resources)):
+        if name.isupper() and name != "THIS_DIR":
+            with open(getattr(resources, name), "rb") as fp:
+                documents.append(fp.read())
+    return documents
+
+
+def main(path=None, number=20):
+    documents = load(path)
+
+    def run():
+        for xml in documents:
+            try:
+                xml_parser.from_xml_bytes(xml)
+            except Exception:
+                pass
+
+    best = min(timeit.repeat(run, number=number, repeat=3))
+    docs = number * len(documents)
+    print "documents : %d of %.0f bytes on average" % (len(documents), float(sum(map(len, documents))) / len(documents))
+    print "per doc   : %.1f us" % (best / docs * 1e6)
+    print "docs/sec  : %.0f" % (docs / best)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None, *[int(a) for a in sys.argv[2:]])
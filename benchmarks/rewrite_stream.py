@@ -0,0 +1,37 @@
+"""
+Benchmark of rewriting media file URIs with streaming rules,
+against parsing into models and updating them, which still leaves writing XML out to do.
+
+    python benchmarks/rewrite_stream.py [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.parsers import xml_parser
+from vast.rewrite import Rules, rewrite
+from vast.update import update
+
+
+def to_cdn(uri):
+    return uri.replace(u"https://", u"https://cdn.example.com/")
+
+
+def main(number=2000):
+    with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+        xml = fp.read()
+    rules = Rules().replace_text("Ad/InLine/Creatives/Creative/Linear/MediaFiles/MediaFile", to_cdn)
+
+    def stream():
+        rewrite(xml, rules)
+
+    def models():
+        update(xml_parser.from_xml_string(xml), "ad.inline.creatives[*].linear.media_files[*].asset", to_cdn)
+
+    for name, run in (("stream", stream), ("models", models)):
+        best = min(timeit.repeat(run, number=number, repeat=5))
+        print "%-7s %.1f us per doc" % (name, best / number * 1e6)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,83 @@
+"""
+Load test of the parsing service, on the sample VAST documents, over keep alive connections
+
+    python benchmarks/service_load.py [clients] [seconds] [workers] [max_in_flight]
+
+With more clients than max_in_flight, some requests are expected to be rejected with 503.
+"""
+import httplib
+import json
+import sys
+import threading
+import time
+
+from vast import resources
+from vast.metrics import Throughput
+from vast.service import ServiceServer, VastService
+
+_DOCUMENTS = (
+    resources.SIMPLE_INLINE_XML,
+    resources.SIMPLE_WRAPPER_XML,
+    resources.INLINE_MULTI_FILES_XML,
+    resources.INLINE_WITH_TRACKING_EVENTS_XML,
+    resources.INLINE_WITH_COMPANION_ADS,
+    resources.INLINE_WITH_NON_LINEAR_ADS,
+)
+
+
+def _client(port, documents, deadline, throughput, statuses, lock):
+    connection = httplib.HTTPConnection("127.0.0.1", port)
+    i = 0
+    try:
+        while time.time() < deadline:
+            start = time.time()
+            connection.request("POST", "/parse", documents[i % len(documents)])
+            response = connection.getresponse()
+            response.read()
+            throughput.record(time.time() - start, response.status == 200)
+            with lock:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            i += 1
+    finally:
+        connection.close()
+
+
+def main(clients=8, seconds=5, workers=2, max_in_flight=64):
+    documents = []
+    for path in _DOCUMENTS:
+        with open(path, "rb") as fp:
+            documents.append(fp.read())
+
+    service = VastService(workers=workers, max_in_flight=max_in_flight)
+    server = ServiceServer(("127.0.0.1", 0), service)
+    server_thread = threading.Thread(target=server.serve_forever)
+    server_thread.daemon = True
+    server_thread.start()
+
+    throughput = Throughput()
+    statuses = {}
+    lock = threading.Lock()
+    deadline = time.time() + seconds
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(server.server_address[1], documents, deadline, throughput, statuses, lock),
+        )
+        for _ in xrange(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print "client  : %s" % throughput.report()
+    print "statuses: %s" % json.dumps(statuses, sort_keys=True)
+    print "server  : %s" % json.dumps(service.metrics(), sort_keys=True)
+
+    server.shutdown()
+    server.server_close()
+    service.close()
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,45 @@
+"""
+Benchmark of rejecting documents which are not parsed into models:
+empty no fill responses, HTML error pages and VAST of unsupported versions,
+next to parsing a VAST 2.0 document
+
+    python benchmarks/sniff_reject.py [number]
+"""
+import sys
+import timeit
+
+from vast import resources
+from vast.parsers import xml_parser
+
+
+def make_documents():
+    with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+        xml = fp.read()
+    html = b"".join([
+        b"<!DOCTYPE html>\n<html><head><title>503 Service Unavailable</title></head><body>",
+        b"<div class='row'><p>The server is temporarily unable to service your request.</p></div>\n" * 40,
+        b"</body></html>",
+    ])
+    return (
+        ("no fill", b'<?xml version="1.0" encoding="UTF-8"?>\n<VAST version="2.0"/>\n'),
+        ("html", html),
+        ("vast 4.0", xml.replace(b'version="2.0"', b'version="4.0"', 1)),
+        ("vast 2.0", xml),
+    )
+
+
+def parse(xml):
+    try:
+        xml_parser.from_xml_bytes(xml)
+    except Exception:
+        pass
+
+
+def main(number=2000):
+    for name, xml in make_documents():
+        best = min(timeit.repeat(lambda: parse(xml), number=number, repeat=3))
+        print "%-9s %6d bytes %8.1f us per doc" % (name, len(xml), best / number * 1e6)
+
+
+if __name__ == "__main__":
+    main(*[int(a) for a in sys.argv[1:]])
@@ -19,4 +19,10 @@ setup(
     install_requires=[],
     setup_requires=["vcversioner"],
     vcversioner={"version_module_paths": ["vast/_version.py"]},
+    entry_points={
+        "console_scripts": [
+            "vast-parse = vast.cli:main",
+            "vast-serve = vast.service:main",
+        ],
+    },
 )
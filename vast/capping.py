@@ -0,0 +1,283 @@
+"""
+Frequency capping of ads by their identifiers, in process
+
+Caps limit how many times a user is shown an ad, by Ad.id, Creative.ad_id or Creative.id, within a time window:
+
+    capper = FrequencyCapper([Cap(AD, 3, 3600), Cap(CREATIVE, 10, 86400)])
+    ads = capper.filter(user_id, candidate_vasts)
+    ...
+    capper.record(user_id, shown_vast)
+
+Impressions are counted in a ring of time buckets per window, which expire as a whole,
+so a window slides by a bucket at a time, and counts are kept as running totals over the live buckets,
+for a check to be a single lookup per identifier.
+
+Counts are exact by default, holding a counter for every identifier a user was shown within the window.
+For a bound on memory, they are kept in count-min sketches instead, of a fixed number of counters,
+which may over count, and so cap early, but never under count.
+"""
+import time
+from array import array
+from collections import defaultdict
+from functools import partial
+from itertools import imap
+from operator import sub
+
+import attr
+
+AD = "ad"
+CREATIVE_AD = "creative_ad"
+CREATIVE = "creative"
+
+KINDS = (AD, CREATIVE_AD, CREATIVE)
+
+
+@attr.s(frozen=True)
+class Cap(object):
+    """
+    kind: of identifier, one of KINDS
+    max_count: of impressions within window
+    window: in seconds
+    """
+    kind = attr.ib()
+    max_count = attr.ib()
+    window = attr.ib()
+
+
+def capping_ids(vast):
+    """
+
+    :param vast: Vast object
+    :return: list of distinct (kind, identifier) tuples of the ad and its creatives
+    """
+    ad = vast.ad
+    ids = [(AD, ad.id)]
+    body = ad.inline if ad.inline is not None else ad.wrapper
+    for creative in body.creatives or ():
+        if creative.ad_id is not None:
+            ids.append((CREATIVE_AD, creative.ad_id))
+        if creative.id is not None:
+            ids.append((CREATIVE, creative.id))
+    if len(ids) > 2:
+        # creatives of an ad mostly share their ad id
+        ids = list(set(ids))
+    return ids
+
+
+class _ExactCounts(object):
+    """
+    A counter per key
+    """
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+
+    def add(self, key, count):
+        self._counts[key] += count
+
+    def get(self, key):
+        return self._counts.get(key, 0)
+
+    def subtract(self, other):
+        counts = self._counts
+        for key, count in other._counts.iteritems():
+            left = counts[key] - count
+            if left:
+                counts[key] = left
+            else:
+                del counts[key]
+
+    def clear(self):
+        self._counts = defaultdict(int)
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class _SketchCounts(object):
+    """
+    Count-min sketch, of depth rows of width counters, where a key is counted in one counter of each row
+    """
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self._counters = array("i", [0]) * (width * depth)
+
+    def _positions(self, key):
+        # double hashing, for depth hash functions out of two
+        h1 = hash(key)
+        h2 = hash((h1, 0x9e3779b9)) | 1
+        width = self.width
+        return [(h1 + i * h2) % width + i * width for i in xrange(self.depth)]
+
+    def add(self, key, count):
+        counters = self._counters
+        for position in self._positions(key):
+            counters[position] += count
+
+    def get(self, key):
+        return min(map(self._counters.__getitem__, self._positions(key)))
+
+    def subtract(self, other):
+        self._counters = array("i", imap(sub, self._counters, other._counters))
+
+    def clear(self):
+        self._counters = array("i", [0]) * (self.width * self.depth)
+
+    def __len__(self):
+        return len(self._counters)
+
+
+class WindowedCounts(object):
+    """
+    Counts of keys within a sliding window of time buckets
+    """
+
+    def __init__(self, window, buckets=12, sketch_width=None, sketch_depth=4, clock=time.time):
+        """
+
+        :param window: in seconds
+        :param buckets: number of buckets the window is made of
+        :param sketch_width: counters per row of count-min sketches, None for exact counts
+        :param sketch_depth: rows of count-min sketches
+        :param clock: returns current time in seconds
+        """
+        if window <= 0 or buckets < 1:
+            raise ValueError("window and buckets must be positive but were %s and %s" % (window, buckets))
+        self.window = window
+        self.bucket_seconds = float(window) / buckets
+        self._clock = clock
+        if sketch_width is None:
+            make_counts = _ExactCounts
+        else:
+            make_counts = partial(_SketchCounts, sketch_width, sketch_depth)
+        self._buckets = [make_counts() for _ in xrange(buckets)]
+        self._total = make_counts()
+        self._bucket = int(clock() // self.bucket_seconds)
+
+    def _advance(self):
+        bucket = int(self._clock() // self.bucket_seconds)
+        if bucket <= self._bucket:
+            return
+        # buckets between the last one counted in and the current one expire, at most all of them once
+        buckets = self._buckets
+        for expired in xrange(self._bucket + 1, min(bucket, self._bucket + len(buckets)) + 1):
+            counts = buckets[expired % len(buckets)]
+            self._total.subtract(counts)
+            counts.clear()
+        self._bucket = bucket
+
+    def add(self, key, count=1):
+        self._advance()
+        self._buckets[self._bucket % len(self._buckets)].add(key, count)
+        self._total.add(key, count)
+
+    def get(self, key):
+        """
+
+        :return: count of key within the window
+        """
+        self._advance()
+        return self._total.get(key)
+
+    def lookup(self):
+        """
+
+        :return: function of a key to its count within the window as of now, for checking many keys at once
+        """
+        self._advance()
+        return self._total.get
+
+    def __len__(self):
+        """
+
+        :return: number of counters kept for the window
+        """
+        self._advance()
+        return len(self._total)
+
+
+class FrequencyCapper(object):
+    """
+    Impression counts of users by ad identifiers, checked against caps
+    """
+
+    def __init__(self, caps, buckets=12, sketch_width=None, sketch_depth=4, clock=time.time):
+        """
+
+        :param caps: iterable of Cap
+        :param buckets: number of buckets each window is made of
+        :param sketch_width: counters per row of count-min sketches, None for exact counts
+        :param sketch_depth: rows of count-min sketches
+        :param clock: returns current time in seconds
+        """
+        self.caps = tuple(caps)
+        for cap in self.caps:
+            if cap.kind not in KINDS:
+                raise ValueError("cap kind must be one of %s but was %s" % (KINDS, cap.kind))
+        # caps of the same window share their counts
+        counts = {}
+        for window in set(cap.window for cap in self.caps):
+            counts[window] = WindowedCounts(window, buckets, sketch_width, sketch_depth, clock)
+        self._counts = counts.values()
+        self._caps_by_kind = defaultdict(list)
+        self._counts_by_kind = defaultdict(list)
+        for cap in self.caps:
+            self._caps_by_kind[cap.kind].append((counts[cap.window], cap.max_count))
+            if counts[cap.window] not in self._counts_by_kind[cap.kind]:
+                self._counts_by_kind[cap.kind].append(counts[cap.window])
+
+    def record(self, user, vast, count=1):
+        """
+        Count impressions of vast
+
+        :param user: identifier of the user, hashable
+        :param vast: Vast object shown to user
+        :param count: number of impressions
+        """
+        for kind, id in capping_ids(vast):
+            for counts in self._counts_by_kind.get(kind, ()):
+                counts.add((user, kind, id), count)
+
+    def allowed(self, user, vast):
+        """
+
+        :param user: identifier of the user, hashable
+        :param vast: Vast object
+        :return: True if showing vast to user would not exceed any cap
+        """
+        return self._allowed(user, vast, self._limits())
+
+    def filter(self, user, vasts):
+        """
+
+        :param user: identifier of the user, hashable
+        :param vasts: iterable of Vast objects
+        :return: list of the ones which showing to user would not exceed any cap
+        """
+        # windows advance once for all the checks
+        limits = self._limits()
+        allowed = self._allowed
+        return [vast for vast in vasts if allowed(user, vast, limits)]
+
+    def _limits(self):
+        """
+        :return: dict of kind to list of (count lookup, max_count) tuples of its caps
+        """
+        lookups = dict((counts, counts.lookup()) for counts in self._counts)
+        return dict(
+            (kind, [(lookups[counts], max_count) for counts, max_count in caps])
+            for kind, caps in self._caps_by_kind.iteritems()
+        )
+
+    @staticmethod
+    def _allowed(user, vast, limits):
+        for kind, id in capping_ids(vast):
+            caps = limits.get(kind)
+            if caps is not None:
+                key = (user, kind, id)
+                for get, max_count in caps:
+                    if get(key) >= max_count:
+                        return False
+        return True
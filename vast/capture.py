@@ -0,0 +1,269 @@
+"""
+Capture of production documents into anonymized corpora, for benchmarking on real shapes of inputs
+
+A Capture samples the documents parsed through the xml_parser entry points, at a rate and within a size budget,
+anonymizes them and writes them to a gzip compressed JSONL corpus, one {"id": ..., "xml": ...} record per line,
+which vast-parse reads as input, and iter_corpus replays:
+
+    with Capture("corpus.jsonl.gz", rate=0.001, salt=secret) as capture, xml_parser.capturing(capture):
+        serve()
+    ...
+    for source, xml in iter_corpus("corpus.jsonl.gz"):
+        xml_parser.from_xml_bytes(xml)
+
+Anonymizing keeps the structure and lengths of documents: identifying values - ad ids, creative ids,
+ad systems, ad titles, and the hosts and query values of URIs - have each letter and digit replaced
+by one of the same class, derived from a keyed hash of the value, so equal values stay equal across documents,
+while everything else, such as markup, punctuation, paths and [MACROS], is copied through by the Rewriter.
+
+Sampled documents are anonymized in the thread parsing them.
+Documents are decoded by the encoding they declare, and written to the corpus as UTF-8, declaring so.
+Documents which cannot be decoded or rewritten, such as malformed ones, are skipped, and counted by error.
+"""
+import codecs
+import gzip
+import hashlib
+import hmac
+import json
+import random
+import re
+import string
+import threading
+from collections import Counter
+
+from vast.rewrite import Rules, rewrite
+
+# elements whose text is, or has, URIs in it, at any depth
+_URI_ELEMENTS = (
+    "Impression", "Error", "VASTAdTagURI",
+    "MediaFile", "Tracking",
+    "ClickThrough", "ClickTracking", "CustomClick",
+    "StaticResource", "IFrameResource", "HTMLResource",
+    "CompanionClickThrough", "NonLinearClickThrough",
+    "AdParameters",
+)
+_URI = re.compile(
+    r"(?P<scheme>[A-Za-z][A-Za-z0-9+.-]*:)?//(?P<authority>[^/?#\s\"'<>]*)"
+    r"(?P<path>[^?#\s\"'<>]*)(?:\?(?P<query>[^#\s\"'<>]*))?"
+)
+# parts of query values which are copied through, percent escapes and macros
+_KEPT = re.compile(r"%[0-9A-Fa-f]{2}|\[[A-Z_]+\]|\$\{\w+\}")
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_ENCODING_DECLARATION = re.compile(br"<\?xml[^>]*?\sencoding\s*=\s*[\"']([A-Za-z][A-Za-z0-9._-]*)[\"']")
+_ALPHABETS = (
+    (set(string.ascii_lowercase), string.ascii_lowercase),
+    (set(string.ascii_uppercase), string.ascii_uppercase),
+    (set(string.digits), string.digits),
+)
+
+
+class Anonymizer(object):
+    """
+    Deterministic, length preserving anonymizing of documents, keyed by a salt
+    """
+
+    def __init__(self, salt=b""):
+        """
+
+        :param salt: key of the hashes, the same salt maps a value to the same anonymized one
+        """
+        self.salt = salt
+        self.rules = Rules()
+        self.rules.set_attributes("Ad", self._attributes("id"))
+        self.rules.set_attributes("Ad/*/Creatives/Creative", self._attributes("id", "adId"))
+        self.rules.replace_text("Ad/*/AdSystem", self.value)
+        self.rules.replace_text("Ad/*/AdTitle", self.value)
+        for name in _URI_ELEMENTS:
+            self.rules.replace_text("**/" + name, self.uris)
+
+    def _attributes(self, *names):
+        def anonymize(attributes):
+            for name in names:
+                if name in attributes:
+                    attributes[name] = self.value(attributes[name])
+            return attributes
+        return anonymize
+
+    def value(self, text):
+        """
+
+        :param text: unicode
+        :return: text, with each letter and digit replaced by one of the same class
+        """
+        digest = self._digest(text)
+        chars = []
+        for i, char in enumerate(text):
+            for chars_of_class, alphabet in _ALPHABETS:
+                if char in chars_of_class:
+                    char = alphabet[ord(digest[i % len(digest)]) % len(alphabet)]
+                    break
+            chars.append(char)
+        return u"".join(chars)
+
+    def _digest(self, text):
+        key = text.encode("utf-8")
+        digest = hmac.new(self.salt, key, hashlib.sha256).digest()
+        # one byte per char of the longest values, in blocks of a digest each
+        blocks = [digest]
+        for block in xrange(1, (len(text) - 1) // len(digest) + 1):
+            blocks.append(hmac.new(self.salt, b"%d:%s" % (block, key), hashlib.sha256).digest())
+        return b"".join(blocks)
+
+    def _query_value(self, text):
+        parts = []
+        last = 0
+        for match in _KEPT.finditer(text):
+            parts.append(self.value(text[last:match.start()]))
+            parts.append(match.group())
+            last = match.end()
+        parts.append(self.value(text[last:]))
+        return u"".join(parts)
+
+    def uri(self, match):
+        """
+
+        :param match: of _URI
+        :return: URI, with its host and query values anonymized
+        """
+        scheme, authority, path, query = match.group("scheme", "authority", "path", "query")
+        parts = [scheme or u"", u"//", self.value(authority), path]
+        if query is not None:
+            parameters = []
+            for parameter in query.split(u"&"):
+                name, equals, value = parameter.partition(u"=")
+                parameters.append(name + equals + self._query_value(value))
+            parts.append(u"?" + u"&".join(parameters))
+        return u"".join(parts)
+
+    def uris(self, text):
+        """
+
+        :param text: unicode
+        :return: text, with the URIs in it anonymized
+        """
+        return _URI.sub(self.uri, text)
+
+    def anonymize(self, xml):
+        """
+
+        :param xml: document bytes, or unicode
+        :return: anonymized document bytes, in the encoding xml declares, or in UTF-8 declaring so for unicode
+        :raises: ExpatError if the document is not well formed, RewriteError if it cannot be rewritten
+        """
+        return rewrite(xml, self.rules)
+
+
+class Capture(object):
+    """
+    Anonymized sample of documents, written to a gzip compressed JSONL corpus.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, path, rate=0.01, max_document_size=1 << 20, max_size=64 << 20, salt=b"", seed=None,
+                 name="capture"):
+        """
+
+        :param path: of the corpus file
+        :param rate: fraction of documents sampled
+        :param max_document_size: max bytes of a document, larger ones are skipped
+        :param max_size: max bytes of documents in the corpus, uncompressed, sampling stops once reached
+        :param salt: key of the anonymizing hashes
+        :param seed: of the sampling, None for a random one
+        :param name: prefix of the record ids
+        """
+        self.path = path
+        self.rate = rate
+        self.max_document_size = max_document_size
+        self.max_size = max_size
+        self.name = name
+        self.anonymizer = Anonymizer(salt)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._file = gzip.open(path, "wb")
+        self.size = 0
+        self.captured = 0
+        self.skipped = 0
+        # error class names to the number of documents skipped since they could not be decoded or rewritten
+        self.failures = Counter()
+
+    def sample(self):
+        """
+
+        :return: True if the next document is to be captured
+        """
+        return self._file is not None and self.size < self.max_size and self._random.random() < self.rate
+
+    def add(self, xml):
+        """
+        Anonymize a document into the corpus, unless it is skipped
+
+        :param xml: document bytes, or unicode
+        :return: True if it was added
+        """
+        if len(xml) > self.max_document_size:
+            return self._skip()
+        try:
+            text = self.anonymizer.anonymize(xml if isinstance(xml, unicode) else _decode(xml)).decode("utf-8")
+        except Exception as e:
+            return self._skip(e)
+
+        with self._lock:
+            if self._file is None or self.size + len(xml) > self.max_size:
+                self.skipped += 1
+                return False
+            self.captured += 1
+            self.size += len(xml)
+            record = dict(id=u"%s:%d" % (self.name, self.captured), xml=text)
+            self._file.write(json.dumps(record) + b"\n")
+        return True
+
+    def _skip(self, error=None):
+        with self._lock:
+            self.skipped += 1
+            if error is not None:
+                self.failures[error.__class__.__name__] += 1
+        return False
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _decode(xml):
+    """
+
+    :param xml: document bytes
+    :return: unicode, decoded by the byte order mark or the encoding declaration of xml, UTF-8 by default
+    :raises: UnicodeDecodeError if xml is not in that encoding, LookupError if it is unknown
+    """
+    for bom, encoding in _BOMS:
+        if xml.startswith(bom):
+            return xml.decode(encoding)
+    match = _ENCODING_DECLARATION.match(xml)
+    return xml.decode(match.group(1) if match else "utf-8")
+
+
+def iter_corpus(path):
+    """
+
+    :param path: of a JSONL corpus, gzip compressed if it ends with .gz
+    :return: generator of (id, xml bytes) tuples
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as fp:
+        for line_number, line in enumerate(fp, 1):
+            if line.strip():
+                record = json.loads(line)
+                yield record.get("id") or "%s:%d" % (path, line_number), record["xml"].encode("utf-8")
@@ -0,0 +1,219 @@
+"""
+vast-parse: bulk parse VAST documents
+
+Inputs can be any mix of
+ * directories - all *.xml* files under it, compressed files included
+ * glob patterns - quote them so the shell does not expand them
+ * JSONL files (*.jsonl, or gzip compressed *.jsonl.gz) - one JSON object per line with either a "path"
+   or an "xml" key, and an optional "id" key to name the record
+ * @list files - one path per line, '-' reads the paths from stdin
+ * file paths
+
+Parsed models are written as JSON lines {"source": ..., "vast": {...}},
+and failures as {"source": ..., "error": ..., "message": ...},
+while progress is reported on stderr.
+"""
+import argparse
+import fnmatch
+import glob
+import gzip
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from vast.errors import InputError
+from vast.metrics import Throughput
+from vast.models.shared import to_primitive
+from vast.parsers import xml_parser
+
+_XML_FILE_PATTERN = "*.xml*"
+_BUFFER_SIZE = 1 << 20
+
+
+def iter_inputs(args, stdin=sys.stdin):
+    """
+
+    :param args: input arguments as described in module doc
+    :param stdin: read by '-' arguments
+    :return: generator of (source, path, xml) tuples, where exactly one of path or xml is not None,
+    and xml is an InputError for records which cannot be read, reported as failures of their own
+    """
+    for arg in args:
+        for item in _iter_arg(arg, stdin):
+            yield item
+
+
+def _iter_arg(arg, stdin):
+    if arg == "-":
+        return _iter_path_list(stdin)
+    if arg.startswith("@"):
+        return _iter_path_list_file(arg[1:])
+    if os.path.isdir(arg):
+        return _iter_dir(arg)
+    if arg.endswith((".jsonl", ".jsonl.gz")):
+        return _iter_jsonl(arg)
+    if glob.has_magic(arg):
+        return _iter_glob(arg)
+    return [(arg, arg, None)]
+
+
+def _iter_path_list(lines):
+    for line in lines:
+        path = line.strip()
+        if path:
+            yield path, path, None
+
+
+def _iter_path_list_file(list_path):
+    with open(list_path, "r") as fp:
+        for item in _iter_path_list(fp):
+            yield item
+
+
+def _iter_glob(pattern):
+    for path in sorted(glob.iglob(pattern)):
+        yield path, path, None
+
+
+def _iter_dir(dir_path):
+    for root, dirs, files in os.walk(dir_path):
+        dirs.sort()
+        for name in sorted(fnmatch.filter(files, _XML_FILE_PATTERN)):
+            path = os.path.join(root, name)
+            yield path, path, None
+
+
+def _iter_jsonl(jsonl_path):
+    opener = gzip.open if jsonl_path.endswith(".gz") else open
+    with opener(jsonl_path, "rb") as fp:
+        for line_number, line in enumerate(fp, 1):
+            if not line.strip():
+                continue
+            source = "%s:%d" % (jsonl_path, line_number)
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield source, None, InputError("line is not JSON: %s" % e)
+                continue
+            if not isinstance(record, dict):
+                yield source, None, InputError("record must be a JSON object")
+                continue
+
+            source = record.get("id") or source
+            xml, path = record.get("xml"), record.get("path")
+            if isinstance(xml, basestring):
+                yield source, None, xml.encode("utf-8")
+            elif isinstance(path, basestring):
+                yield source, path, None
+            else:
+                yield source, None, InputError("record must have either a path or an xml string")
+
+
+def parse_item(item):
+    """
+    Parse a single input, runs in worker processes
+
+    :param item: (source, path, xml) tuple as generated by iter_inputs
+    :return: (ok, latency in seconds, JSON line) tuple
+    """
+    source, path, xml = item
+    start = time.time()
+    try:
+        if isinstance(xml, InputError):
+            raise xml
+        if path is not None:
+            vast = xml_parser.from_xml_file(path)
+        else:
+            vast = xml_parser.from_xml_bytes(xml)
+    except Exception as e:
+        latency = time.time() - start
+        record = dict(source=source, error=e.__class__.__name__, message=unicode(e))
+        return False, latency, json.dumps(record)
+
+    latency = time.time() - start
+    record = dict(source=source, vast=to_primitive(vast))
+    return True, latency, json.dumps(record)
+
+
+def run(items, output, errors, workers=1, chunk_size=16, progress=None, interval=1.0):
+    """
+
+    :param items: iterable of (source, path, xml) tuples
+    :param output: file like object for parsed models
+    :param errors: file like object for error records
+    :param workers: number of worker processes, 1 parses in this process
+    :param chunk_size: items sent to a worker at a time
+    :param progress: optional file like object to report progress to
+    :param interval: seconds between progress reports
+    :return: Throughput of the run
+    """
+    throughput = Throughput()
+    pool = Pool(workers) if workers > 1 else None
+    results = pool.imap_unordered(parse_item, items, chunk_size) if pool else (parse_item(i) for i in items)
+    last_report = time.time()
+    try:
+        for ok, latency, line in results:
+            throughput.record(latency, ok)
+            (output if ok else errors).write(line + "\n")
+            if progress is not None and time.time() - last_report >= interval:
+                progress.write("\r" + throughput.report())
+                progress.flush()
+                last_report = time.time()
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    if progress is not None:
+        progress.write("\r" + throughput.report() + "\n")
+    return throughput
+
+
+def _open_sink(path):
+    if path is None or path == "-":
+        return os.fdopen(os.dup(sys.stdout.fileno()), "w", _BUFFER_SIZE)
+    return open(path, "w", _BUFFER_SIZE)
+
+
+def _make_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="vast-parse",
+        description="Bulk parse VAST documents",
+    )
+    parser.add_argument("inputs", nargs="+", help="directories, globs, *.jsonl, @list files or paths")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for parsed models, stdout by default")
+    parser.add_argument("-e", "--errors", help="JSONL file for error records, same as output by default")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=16, help="inputs sent to a worker at a time")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between progress reports")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report progress")
+    return parser
+
+
+def main(argv=None):
+    args = _make_arg_parser().parse_args(argv)
+
+    output = _open_sink(args.output)
+    errors = _open_sink(args.errors) if args.errors else output
+    try:
+        throughput = run(
+            iter_inputs(args.inputs),
+            output=output,
+            errors=errors,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            progress=None if args.quiet else sys.stderr,
+            interval=args.interval,
+        )
+    finally:
+        output.close()
+        if errors is not output:
+            errors.close()
+
+    return 1 if throughput.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Time budgets of requests, shared by the stages handling them
+
+Ad auctions give a response a fixed budget of time, which parsing and wrapper resolution have to fit in.
+A Deadline is passed to them, they check it cooperatively - between chunks of input,
+between creatives and between wrapper hops - and abort with a DeadlineExceededError once it passes:
+
+    deadline = Deadline(0.1)
+    try:
+        flat = unwrap(xml_parser.from_xml_bytes(xml, deadline=deadline), deadline=deadline)
+    except DeadlineExceededError as e:
+        log(e.usage, e.partial)
+
+Each stage records the time it used, for budget breaches to be attributed to the stages causing them.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from vast.errors import DeadlineExceededError
+
+_active = threading.local()
+
+
+class Deadline(object):
+    """
+    Time budget, starting when created
+    """
+
+    def __init__(self, budget, clock=time.time):
+        """
+
+        :param budget: in seconds
+        :param clock: returns current time in seconds
+        """
+        self.budget = budget
+        self._clock = clock
+        self.started = clock()
+        self.expires = self.started + budget
+        # stage name to seconds used, in the order stages started
+        self.usage = OrderedDict()
+
+    def elapsed(self):
+        return self._clock() - self.started
+
+    def remaining(self):
+        """
+
+        :return: seconds left, 0 once expired
+        """
+        return max(self.expires - self._clock(), 0.0)
+
+    def expired(self):
+        return self._clock() >= self.expires
+
+    def check(self, partial=None):
+        """
+        Checkpoint of a stage
+
+        :param partial: result of the stage so far, carried by the error
+        :raises: DeadlineExceededError if expired
+        """
+        if self._clock() >= self.expires:
+            raise DeadlineExceededError(self.budget, self.elapsed(), OrderedDict(self.usage), partial)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Add the time spent within to the usage of stage name
+        """
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.usage[name] = self.usage.get(name, 0.0) + (self._clock() - start)
+
+
+@contextmanager
+def checking(deadline):
+    """
+    Make deadline the one checked by models parsed in this thread
+
+    :param deadline: Deadline, None for none
+    """
+    previous = getattr(_active, "deadline", None)
+    _active.deadline = deadline
+    try:
+        yield
+    finally:
+        _active.deadline = previous
+
+
+def active_deadline():
+    """
+
+    :return: Deadline checked in this thread, None if there is none
+    """
+    return getattr(_active, "deadline", None)
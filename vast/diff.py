@@ -0,0 +1,101 @@
+"""
+Structural diff of model trees
+
+    for change in diff(yesterday, today):
+        print change.path, change.old, change.new
+
+Subtrees are compared by their content hashes first, and skipped when equal,
+so diffing two trees costs in proportion to what changed rather than to their size.
+Content hashes are python hashes, so an equal hash of different subtrees,
+though very unlikely with 64 bit hashes, would hide a change within them.
+
+Paths are those of vast.query, with list indices of the new tree,
+except for items removed from a list, which have their index in the old tree.
+"""
+from difflib import SequenceMatcher
+
+import attr
+
+
+@attr.s(frozen=True)
+class Change(object):
+    """
+    path: of the changed value
+    old: value, None if added
+    new: value, None if removed
+    """
+    path = attr.ib()
+    old = attr.ib()
+    new = attr.ib()
+
+
+def diff(old, new):
+    """
+
+    :param old: model
+    :param new: model
+    :return: list of Change, empty if the trees are equal
+    """
+    changes = []
+    _diff(old, new, "", changes)
+    return changes
+
+
+def _join(path, name):
+    return "%s.%s" % (path, name) if path else name
+
+
+def _is_model(value):
+    return attr.has(value.__class__)
+
+
+def _diff(old, new, path, changes):
+    if old is new:
+        return
+    if _is_model(old) and old.__class__ is new.__class__:
+        if hash(old) == hash(new):
+            return
+        for a in old.__class__.__attrs_attrs__:
+            old_value = getattr(old, a.name)
+            new_value = getattr(new, a.name)
+            # paths are only made for values which differ, shared subtrees are the common case
+            if old_value is not new_value:
+                _diff(old_value, new_value, _join(path, a.name), changes)
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_lists(old, new, path, changes)
+    elif old != new:
+        changes.append(Change(path, old, new))
+
+
+def _diff_lists(old, new, path, changes):
+    old_hashes = [_hash(v) for v in old]
+    new_hashes = [_hash(v) for v in new]
+    if len(old) == len(new):
+        differ = [i for i in xrange(len(old)) if old_hashes[i] != new_hashes[i]]
+        new_set = set(new_hashes)
+        if not any(old_hashes[i] in new_set for i in differ):
+            # items changed in place, the common case, need no aligning of the lists
+            for i in differ:
+                _diff(old[i], new[i], "%s[%d]" % (path, i), changes)
+            return
+
+    # items are aligned by their hashes, so an inserted, removed or moved item does not shift the rest into changes
+    matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        common = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        for k in xrange(common):
+            _diff(old[i1 + k], new[j1 + k], "%s[%d]" % (path, j1 + k), changes)
+        for i in xrange(i1 + common, i2):
+            changes.append(Change("%s[%d]" % (path, i), old[i], None))
+        for j in xrange(j1 + common, j2):
+            changes.append(Change("%s[%d]" % (path, j), None, new[j]))
+
+
+def _hash(value):
+    try:
+        return hash(value)
+    except TypeError:
+        # lists of lists do not come up in models, compared by identity if they do
+        return id(value)
@@ -13,4 +13,92 @@ class ParseError(Exception):
     """
     Raise when encountering a parsing error
     """
-    pass
\ No newline at end of file
+    pass
+
+
+class UnwrapError(Exception):
+    """
+    Raise when a chain of wrapper responses cannot be resolved into an inline ad
+    """
+    pass
+
+
+class LimitExceededError(ParseError):
+    """
+    Raise when a document being parsed exceeds one of the configured resource limits
+    """
+
+    def __init__(self, limit_name, limit, value):
+        msg = "document exceeds {limit_name}={limit} with {value}"
+        super(LimitExceededError, self).__init__(msg.format(limit_name=limit_name, limit=limit, value=value))
+        self.limit_name = limit_name
+        self.limit = limit
+        self.value = value
+
+
+class NotVastError(ParseError):
+    """
+    Raise when a document is not a VAST document, such as an HTML error page
+    """
+    pass
+
+
+class UnsupportedVersionError(ParseError):
+    """
+    Raise when a VAST document has no version, or one there is no parser for
+    """
+
+    def __init__(self, version):
+        if version is None:
+            msg = "missing version attribute in vast element"
+        else:
+            msg = "Cannot parse vast version %s" % version
+        super(UnsupportedVersionError, self).__init__(msg)
+        self.version = version
+
+
+class NoAdError(ParseError):
+    """
+    Raise when a VAST document has no ad, which is how ad servers respond when they have no ad to fill with
+    """
+
+    def __init__(self, version):
+        super(NoAdError, self).__init__("vast %s document has no ad" % version)
+        self.version = version
+
+
+class InputError(Exception):
+    """
+    Raise when an input record of a batch cannot be read
+    """
+    pass
+
+
+class RewriteError(Exception):
+    """
+    Raise when a rewrite rule cannot be applied to the document being rewritten
+    """
+    pass
+
+
+class TemplateError(Exception):
+    """
+    Raise when a model cannot be compiled into a response template
+    """
+    pass
+
+
+class DeadlineExceededError(Exception):
+    """
+    Raise when a stage of handling a document does not finish within its time budget
+    """
+
+    def __init__(self, budget, elapsed, usage, partial=None):
+        msg = "budget of {budget:.3f} seconds exceeded after {elapsed:.3f} seconds"
+        super(DeadlineExceededError, self).__init__(msg.format(budget=budget, elapsed=elapsed))
+        self.budget = budget
+        self.elapsed = elapsed
+        # stage name to seconds used
+        self.usage = usage
+        # result of the stage so far, such as the creatives parsed before it was aborted
+        self.partial = partial
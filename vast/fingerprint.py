@@ -0,0 +1,236 @@
+"""
+Canonical fingerprints of VAST ads, and de-duplication of streams of them
+
+The same ad is often served with cosmetic differences only:
+white space around text and CDATA, attribute order and cache buster query parameters.
+A fingerprint ignores these, so equal fingerprints mean the same ad.
+"""
+import hashlib
+import math
+import re
+import urllib
+import urlparse
+from enum import Enum
+
+import attr
+import xmltodict
+
+DEFAULT_VOLATILE_PARAMS = frozenset([
+    "cb", "cachebuster", "cache_buster", "cachebust", "correlator",
+    "ord", "rand", "random", "rnd", "timestamp", "ts",
+])
+
+_WHITE_SPACE = re.compile(r"\s+", re.UNICODE)
+_URI = re.compile(r"^(https?:)?//", re.IGNORECASE)
+
+
+def normalize_text(text):
+    """
+
+    :param text: unicode
+    :return: text stripped, with white space runs collapsed to a single space
+    """
+    return _WHITE_SPACE.sub(u" ", text).strip()
+
+
+def normalize_uri(uri, volatile_params=DEFAULT_VOLATILE_PARAMS):
+    """
+
+    :param uri: unicode URI
+    :param volatile_params: query parameter names to drop, lower case
+    :return: uri without volatile query parameters and with the rest sorted
+    """
+    parts = urlparse.urlsplit(uri)
+    if not parts.query:
+        return uri
+    params = sorted(
+        (name, value)
+        for name, value in urlparse.parse_qsl(parts.query, keep_blank_values=True)
+        if name.lower() not in volatile_params
+    )
+    query = urllib.urlencode(params)
+    return urlparse.urlunsplit((parts.scheme, parts.netloc, parts.path, query, parts.fragment))
+
+
+def normalize_value(value, volatile_params=DEFAULT_VOLATILE_PARAMS):
+    """
+
+    :param value: text value
+    :param volatile_params: query parameter names to drop from URI values
+    :return: normalized text, or normalized URI if value is one
+    """
+    value = normalize_text(value)
+    if _URI.match(value):
+        value = normalize_uri(value.encode("utf-8"), volatile_params).decode("utf-8")
+    return value
+
+
+class _Hasher(object):
+    """
+    Feeds tokens to a hash with an unambiguous encoding
+    """
+
+    def __init__(self, volatile_params):
+        self._hash = hashlib.sha1()
+        self._volatile_params = volatile_params
+
+    def token(self, tag, text=u""):
+        data = text.encode("utf-8")
+        self._hash.update(b"%s%d:%s" % (tag, len(data), data))
+
+    def value(self, value):
+        if value is None:
+            self.token(b"N")
+        elif isinstance(value, Enum):
+            self.token(b"E", unicode(value.value))
+        elif isinstance(value, basestring):
+            if isinstance(value, bytes):
+                value = value.decode("utf-8")
+            self.token(b"S", normalize_value(value, self._volatile_params))
+        else:
+            self.token(b"V", unicode(value))
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+
+def fingerprint(vast, volatile_params=DEFAULT_VOLATILE_PARAMS):
+    """
+
+    :param vast: Vast object, or any other model
+    :param volatile_params: query parameter names to ignore in URIs, lower case
+    :return: hex digest fingerprint
+    """
+    hasher = _Hasher(volatile_params)
+    _hash_model(hasher, vast)
+    return hasher.hexdigest()
+
+
+def _hash_model(hasher, value):
+    if isinstance(value, list):
+        hasher.token(b"L", unicode(len(value)))
+        for v in value:
+            _hash_model(hasher, v)
+    elif attr.has(value.__class__):
+        hasher.token(b"M", unicode(value.__class__.__name__))
+        for a in attr.fields(value.__class__):
+            hasher.token(b"A", unicode(a.name))
+            _hash_model(hasher, getattr(value, a.name))
+    else:
+        hasher.value(value)
+
+
+def fingerprint_xml(xml_input, volatile_params=DEFAULT_VOLATILE_PARAMS):
+    """
+    Fingerprint a VAST XML without making models of it.
+    Fingerprints of XML are not comparable to fingerprints of models.
+
+    :param xml_input: str or file like object
+    :param volatile_params: query parameter names to ignore in URIs, lower case
+    :return: hex digest fingerprint
+    """
+    hasher = _Hasher(volatile_params)
+    _hash_xml(hasher, xmltodict.parse(xml_input, dict_constructor=dict))
+    return hasher.hexdigest()
+
+
+def _hash_xml(hasher, value):
+    if isinstance(value, dict):
+        # sorting makes attribute order irrelevant
+        hasher.token(b"D", unicode(len(value)))
+        for key in sorted(value):
+            hasher.token(b"K", key)
+            _hash_xml(hasher, value[key])
+    elif isinstance(value, list):
+        hasher.token(b"L", unicode(len(value)))
+        for v in value:
+            _hash_xml(hasher, v)
+    else:
+        hasher.value(value)
+
+
+class BloomFilter(object):
+    """
+    Set membership of hex digests with a bounded false positive rate and no false negatives
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+
+        :param capacity: number of digests to hold at error_rate
+        :param error_rate: false positive rate when at capacity
+        """
+        bits = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_bits = max(bits, 8)
+        self.num_hashes = max(int(round(self.num_bits * math.log(2) / capacity)), 1)
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, digest):
+        # double hashing over two independent halves of the digest
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.num_bits for i in xrange(self.num_hashes))
+
+    def __contains__(self, digest):
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(digest))
+
+    def add(self, digest):
+        bits = self._bits
+        for p in self._positions(digest):
+            bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    @property
+    def is_full(self):
+        return self.count >= self.capacity
+
+
+class DedupeFilter(object):
+    """
+    Streaming de-duplication with bounded memory.
+
+    Remembers the fingerprints of the last capacity to 2 * capacity distinct items,
+    in two Bloom filter generations; once the current generation is full,
+    it becomes the previous one and the oldest generation is dropped.
+    """
+
+    def __init__(self, capacity=1000000, error_rate=0.001, key=fingerprint):
+        """
+
+        :param capacity: number of distinct items per generation
+        :param error_rate: false positive rate of each generation,
+        a false positive drops a distinct item as if it was seen
+        :param key: function from an item to its hex digest fingerprint
+        """
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.key = key
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = None
+
+    def is_new(self, item):
+        """
+
+        :param item: to check
+        :return: True if item was not seen before, it is remembered as seen from now on
+        """
+        digest = self.key(item)
+        if digest in self._current or (self._previous is not None and digest in self._previous):
+            return False
+
+        if self._current.is_full:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+        self._current.add(digest)
+        return True
+
+    def filter(self, items):
+        """
+
+        :param items: iterable
+        :return: generator of items not seen before
+        """
+        return (item for item in items if self.is_new(item))
@@ -0,0 +1,109 @@
+"""
+Throughput and latency metrics for batch and service parsing
+"""
+import random
+import threading
+import time
+
+
+class Throughput(object):
+    """
+    Counts processed documents, errors and their latencies.
+
+    Latencies are kept in a bounded uniform reservoir sample,
+    so memory does not grow with the number of documents.
+    Safe to use from multiple threads.
+    """
+
+    def __init__(self, reservoir_size=10000, clock=time.time):
+        """
+
+        :param reservoir_size: max number of latencies kept for percentiles
+        :param clock: returns current time in seconds
+        """
+        self.reservoir_size = reservoir_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+        self.started = clock()
+        self.count = 0
+        self.errors = 0
+        self._latencies = []
+
+    def record(self, latency, ok=True):
+        """
+
+        :param latency: of processing a single document, in seconds
+        :param ok: False if processing failed
+        """
+        with self._lock:
+            self.count += 1
+            if not ok:
+                self.errors += 1
+            if len(self._latencies) < self.reservoir_size:
+                self._latencies.append(latency)
+            else:
+                i = self._random.randint(0, self.count - 1)
+                if i < self.reservoir_size:
+                    self._latencies[i] = latency
+
+    def elapsed(self):
+        return self._clock() - self.started
+
+    def rate(self):
+        """
+
+        :return: documents per second since started
+        """
+        elapsed = self.elapsed()
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def error_rate(self):
+        """
+
+        :return: fraction of documents that failed
+        """
+        return float(self.errors) / self.count if self.count else 0.0
+
+    def percentiles(self, ps=(50, 95, 99)):
+        """
+
+        :param ps: percentiles in range [0, 100]
+        :return: list of latencies for ps, in seconds, None if nothing was recorded
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return [None for _ in ps]
+        last = len(latencies) - 1
+        return [latencies[int(round(last * p / 100.0))] for p in ps]
+
+    def as_dict(self):
+        p50, p95, p99 = self.percentiles()
+        return dict(
+            count=self.count,
+            errors=self.errors,
+            error_rate=self.error_rate(),
+            docs_per_sec=self.rate(),
+            latency_p50=p50,
+            latency_p95=p95,
+            latency_p99=p99,
+        )
+
+    def report(self):
+        """
+
+        :return: one line summary
+        """
+        msg = "{count} docs, {docs_per_sec:.1f} docs/sec, {error_rate:.2%} errors, latency ms p50={p50} p95={p95} p99={p99}"
+        d = self.as_dict()
+        return msg.format(
+            p50=_ms(d.pop("latency_p50")),
+            p95=_ms(d.pop("latency_p95")),
+            p99=_ms(d.pop("latency_p99")),
+            **d
+        )
+
+
+def _ms(seconds):
+    return "-" if seconds is None else "%.2f" % (seconds * 1000)
@@ -0,0 +1,278 @@
+"""
+Opt-in caches shared by model construction
+
+Nothing here is active by default.
+A cache is activated for the current thread with its context manager,
+and the models built while it is active will make use of it:
+
+    pool = InternPool(max_size=10000)
+    with interning(pool):
+        vast = xml_parser.from_xml_string(xml)
+
+Activating the same cache around many parses shares its content across all of them.
+"""
+import threading
+from contextlib import contextmanager
+
+
+_active = threading.local()
+
+
+class LruCache(object):
+    """
+    A bounded mapping which evicts a least recently used key once full.
+
+    Recency is approximated by the clock algorithm: a hit only marks its key as referenced,
+    and eviction sweeps over the keys in insertion order,
+    sparing each referenced one once by clearing its mark, until it finds one not referenced since.
+
+    Safe to share across threads: lookups are lock free, relying on dict lookups being atomic,
+    while a lock serializes insertions and eviction.
+    hits and misses are approximate under concurrent use.
+    """
+
+    def __init__(self, max_size=10000):
+        """
+
+        :param max_size: maximal number of keys kept, must be positive
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be positive but was %s" % max_size)
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # key to a [value, referenced] entry, and the keys in clock order
+        self._data = {}
+        self._keys = []
+        self._hand = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        """
+
+        :param key: to look up, marked as recently used if found
+        :param default: returned when key is not cached
+        :return: cached value or default
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        entry[1] = True
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        """
+
+        :param key: to cache value under
+        :param value: to be cached
+        :return: value
+        """
+        with self._lock:
+            self._put(key, value)
+        return value
+
+    def _put(self, key, value):
+        data = self._data
+        entry = data.get(key)
+        if entry is not None:
+            entry[0] = value
+            entry[1] = True
+            return
+
+        keys = self._keys
+        if len(keys) < self.max_size:
+            keys.append(key)
+        else:
+            hand = self._hand
+            while data[keys[hand]][1]:
+                data[keys[hand]][1] = False
+                hand = (hand + 1) % self.max_size
+            del data[keys[hand]]
+            keys[hand] = key
+            self._hand = (hand + 1) % self.max_size
+        data[key] = [value, False]
+
+    def setdefault(self, key, value):
+        """
+
+        :param key: to look up
+        :param value: cached and returned if key is not cached yet
+        :return: the cached value for key
+        """
+        cached = self.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        with self._lock:
+            # another thread may have cached key since
+            entry = self._data.get(key)
+            if entry is not None:
+                return entry[0]
+            self._put(key, value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            del self._keys[:]
+            self._hand = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_MISSING = object()
+
+
+class InternPool(LruCache):
+    """
+    Bounded pool of strings.
+    Equal strings interned through the same pool share a single object.
+    """
+
+    def intern(self, value):
+        """
+
+        :param value: unicode value
+        :return: the pooled object equal to value
+        """
+        return self.setdefault(value, value)
+
+
+@contextmanager
+def interning(pool):
+    """
+    Intern unicode values of models made in this thread through pool
+
+    :param pool: InternPool instance, or None for no interning
+    """
+    previous = getattr(_active, "intern_pool", None)
+    _active.intern_pool = pool
+    try:
+        yield pool
+    finally:
+        _active.intern_pool = previous
+
+
+def active_intern_pool():
+    """
+
+    :return: the InternPool active in this thread or None
+    """
+    return getattr(_active, "intern_pool", None)
+
+
+def to_interned_unicode(value):
+    """
+    Convert value to unicode, and intern it if a pool is active
+
+    :param value: to convert
+    :return: unicode value
+    """
+    value = unicode(value)
+    pool = getattr(_active, "intern_pool", None)
+    if pool is None:
+        return value
+    return pool.intern(value)
+
+
+class CanonicalCache(LruCache):
+    """
+    Bounded cache of frozen model instances.
+    Structurally equal instances made through the same cache are the same object.
+    """
+
+    def canonical(self, instance):
+        """
+
+        :param instance: hashable model instance
+        :return: the cached instance equal to instance
+        """
+        return self.setdefault(instance, instance)
+
+
+@contextmanager
+def canonicalizing(cache):
+    """
+    Share structurally equal leaf models made in this thread through cache
+
+    :param cache: CanonicalCache instance, or None for no canonicalization
+    """
+    previous = getattr(_active, "canonical_cache", None)
+    _active.canonical_cache = cache
+    try:
+        yield cache
+    finally:
+        _active.canonical_cache = previous
+
+
+def active_canonical_cache():
+    """
+
+    :return: the CanonicalCache active in this thread or None
+    """
+    return getattr(_active, "canonical_cache", None)
+
+
+def canonical(make_func):
+    """
+    Decorate a make function of a frozen hashable model class.
+
+    When a CanonicalCache is active,
+    a call with previously seen arguments returns the cached instance without checks and validation,
+    and a newly made instance is replaced by an equal cached one if there is such.
+
+    :param make_func: function taking the class and the make arguments
+    :return: decorated function
+    """
+    def make(cls, *args, **kwargs):
+        cache = getattr(_active, "canonical_cache", None)
+        if cache is None:
+            return make_func(cls, *args, **kwargs)
+
+        key = (cls, args, tuple(sorted(kwargs.items())))
+        try:
+            instance = cache.get(key, _MISSING)
+        except TypeError:
+            # unhashable arguments can not be cached
+            return make_func(cls, *args, **kwargs)
+        if instance is _MISSING:
+            instance = cache.canonical(make_func(cls, *args, **kwargs))
+            cache.put(key, instance)
+        return instance
+
+    make.__name__ = make_func.__name__
+    make.__doc__ = make_func.__doc__
+    return make
+
+
+@contextmanager
+def caches(intern_pool=None, canonical_cache=None):
+    """
+    Activate the given caches in this thread, leaving the ones not given as they are
+
+    :param intern_pool: optional InternPool
+    :param canonical_cache: optional CanonicalCache
+    """
+    if intern_pool is None and canonical_cache is None:
+        yield
+        return
+
+    previous = (
+        getattr(_active, "intern_pool", None),
+        getattr(_active, "canonical_cache", None),
+    )
+    if intern_pool is not None:
+        _active.intern_pool = intern_pool
+    if canonical_cache is not None:
+        _active.canonical_cache = canonical_cache
+    try:
+        yield
+    finally:
+        _active.intern_pool, _active.canonical_cache = previous
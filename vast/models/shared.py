@@ -1,11 +1,15 @@
 """
 
 """
+from collections import OrderedDict
 from itertools import chain
+from operator import itemgetter
 
 import attr
+from enum import Enum
 
 from vast.errors import IllegalModelStateError
+from vast.models.caching import to_interned_unicode
 
 
 @attr.s()
@@ -51,6 +55,121 @@ class SomeOf(object):
         return errors
 
 
+UNKNOWN_ERROR = "error"
+UNKNOWN_NONE = "none"
+
+
+class EnumLookup(object):
+    """
+    Precomputed value to member table of an Enum class.
+
+    Values are looked up as is first, and if not found,
+    after normalizing them (strip, casefold) and resolving aliases.
+    Unknown values are reported by returning a default rather than raising,
+    and the unknown policy tells converters what to do with them:
+     UNKNOWN_ERROR - a conversion error
+     UNKNOWN_NONE - drop the value, as if it was not given
+    """
+
+    def __init__(self, enum_cls, strip=True, casefold=True, aliases=None, unknown=UNKNOWN_ERROR):
+        """
+
+        :param enum_cls: Enum class to look up members of
+        :param strip: strip surrounding white space before normalized look up
+        :param casefold: ignore case on normalized look up
+        :param aliases: dict of alternative values to members or to member values
+        :param unknown: UNKNOWN_ERROR or UNKNOWN_NONE
+        """
+        self.enum_cls = enum_cls
+        self.configure(strip=strip, casefold=casefold, aliases=aliases, unknown=unknown)
+
+    def configure(self, strip=True, casefold=True, aliases=None, unknown=UNKNOWN_ERROR):
+        """
+        Rebuild the lookup table in place, see __init__ for params
+        """
+        if unknown not in (UNKNOWN_ERROR, UNKNOWN_NONE):
+            raise ValueError("unknown policy must be one of %s but was %s" % ((UNKNOWN_ERROR, UNKNOWN_NONE), unknown))
+        self.strip = strip
+        self.casefold = casefold
+        self.aliases = dict(aliases or {})
+        self.unknown = unknown
+
+        table = {}
+        normalized = {}
+        for member in self.enum_cls:
+            table[member] = member
+            table[member.value] = member
+            normalized[self._normalize(member.value)] = member
+        for alias, target in self.aliases.items():
+            normalized[self._normalize(alias)] = self.enum_cls(target)
+        self._table = table
+        self._normalized = normalized
+
+    def _normalize(self, value):
+        if self.strip:
+            value = value.strip()
+        if self.casefold:
+            value = value.lower()
+        return value
+
+    def get(self, value, default=None):
+        """
+
+        :param value: member, member value or a variant of it
+        :param default: returned for unknown values
+        :return: enum member or default
+        """
+        try:
+            return self._table[value]
+        except (KeyError, TypeError):
+            pass
+        if isinstance(value, basestring):
+            return self._normalized.get(self._normalize(value), default)
+        return default
+
+    def __call__(self, value):
+        """
+        Converts like calling the Enum class does, raises ValueError for unknown values
+        """
+        member = self.get(value, _UNKNOWN)
+        if member is _UNKNOWN:
+            raise ValueError("%r is not a valid %s" % (value, self.enum_cls.__name__))
+        return member
+
+
+_UNKNOWN = object()
+_ENUM_LOOKUPS = {}
+
+
+def enum_lookup(enum_cls):
+    """
+
+    :param enum_cls: Enum class
+    :return: the EnumLookup registered for enum_cls, a default one is registered if none was
+    """
+    lookup = _ENUM_LOOKUPS.get(enum_cls)
+    if lookup is None:
+        lookup = _ENUM_LOOKUPS[enum_cls] = EnumLookup(enum_cls)
+    return lookup
+
+
+def register_enum_lookup(enum_cls, **options):
+    """
+    Configure how values are converted to members of enum_cls.
+    Takes effect for converters made before this call as well.
+
+    :param enum_cls: Enum class
+    :param options: as accepted by EnumLookup
+    :return: the registered EnumLookup
+    """
+    lookup = _ENUM_LOOKUPS.get(enum_cls)
+    if lookup is None:
+        lookup = _ENUM_LOOKUPS[enum_cls] = EnumLookup(enum_cls, **options)
+    else:
+        lookup.configure(**options)
+    return lookup
+
+
 @attr.s()
 class Converter(object):
     """
@@ -60,8 +179,13 @@ class Converter(object):
     attr_names = attr.ib()
 
     def __attrs_post_init__(self):
-        if self.type == bool:
+        self._lookup = None
+        if isinstance(self.type, type) and issubclass(self.type, Enum):
+            self._lookup = self._convert = enum_lookup(self.type)
+        elif self.type == bool:
             self._convert = _to_bool
+        elif self.type == unicode:
+            self._convert = to_interned_unicode
         else:
             self._convert = self.type
 
@@ -91,15 +215,29 @@ class Converter(object):
                     self._add_error(errors, attr_name, v)
                 continue
 
+            if self._lookup is not None:
+                self._convert_enum(errors, args_dict, attr_name, v, required)
+                continue
+
             try:
                 args_dict[attr_name] = self._convert(v)
 
-            # enum conversion errors are value errors
+            # int conversion errors are value errors
             except (TypeError, ValueError):
                 self._add_error(errors, attr_name, v)
 
         return errors
 
+    def _convert_enum(self, errors, args_dict, attr_name, value, required):
+        lookup = self._lookup
+        member = lookup.get(value)
+        if member is not None:
+            args_dict[attr_name] = member
+        elif lookup.unknown == UNKNOWN_NONE and attr_name not in required:
+            args_dict[attr_name] = None
+        else:
+            self._add_error(errors, attr_name, value)
+
 
 def _to_bool(value):
     value = str(value).lower()
@@ -239,8 +377,122 @@ def check_and_convert(cls, args_dict):
             )
         )
     )
+    _raise_errors(cls, errors)
+
+    return cls(**args)
+
+
+def check_replacements(cls, changes):
+    """
+    Check child models replacing others in an instance of cls.
+    Of all the checks check_and_convert makes, only the class checks of the replaced attributes are affected.
+
+    :param cls: class of the instance
+    :param changes: dict of att names to the not None replacing values
+    :raises: IllegalModelStateError if checks failed
+    """
+    required = frozenset(getattr(cls, "REQUIRED", []))
+    classes = [c for c in getattr(cls, "CLASSES", []) if c.attr_name in changes]
+    _raise_errors(cls, _check_classes(changes, required, classes))
+
+
+def _raise_errors(cls, errors):
     if errors:
         msg = "cannot instantiate class : {name}. Got Errors : {errors}"
         raise IllegalModelStateError(msg.format(name=cls.__name__, errors=errors))
 
-    return cls(**args)
+
+class ContentHashed(object):
+    """
+    Base class for frozen models, made with attr.s(frozen=True, cmp=False),
+    which hash their content once, and keep the hash.
+
+    The hash of a model is made of the hashes of its attribute values,
+    where child models are not hashed again but contribute their kept hash,
+    so a hash costs no more than the attributes of the model itself.
+    Lists of child models hash as the tuple of the child hashes.
+    Hashes are computed on first use rather than when made, which keeps parsing as fast as it was.
+
+    Equality short circuits on identity and on different hashes,
+    and only compares attribute values of models with equal hashes.
+    """
+    _content_hash = None
+
+    def __hash__(self):
+        content_hash = self._content_hash
+        if content_hash is None:
+            cls = self.__class__
+            values = _attribute_values(cls)(self.__dict__)
+            try:
+                content_hash = hash((cls.__name__, values))
+            except TypeError:
+                # lists are not hashable, only models with lists pay for going through their values
+                content_hash = hash((cls.__name__, tuple(_content_hash(v) for v in values)))
+            object.__setattr__(self, "_content_hash", content_hash)
+        return content_hash
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        if hash(self) != hash(other):
+            return False
+        return all(getattr(self, a.name) == getattr(other, a.name) for a in self.__class__.__attrs_attrs__)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __getstate__(self):
+        # hashes of None differ between processes, so unpickled models hash again
+        state = self.__dict__.copy()
+        state.pop("_content_hash", None)
+        return state
+
+
+_ATTRIBUTE_VALUES = {}
+
+
+def _attribute_values(cls):
+    """
+    :return: function from the __dict__ of a model of cls to the tuple of its attribute values,
+    which is a lot faster than getting them as attributes
+    """
+    values = _ATTRIBUTE_VALUES.get(cls)
+    if values is None:
+        names = [a.name for a in cls.__attrs_attrs__]
+        if len(names) == 1:
+            get = itemgetter(names[0])
+            values = _ATTRIBUTE_VALUES[cls] = lambda instance_dict: (get(instance_dict), )
+        else:
+            values = _ATTRIBUTE_VALUES[cls] = itemgetter(*names)
+    return values
+
+
+def _content_hash(value):
+    if value.__class__ is list:
+        return hash(tuple(_content_hash(v) if v.__class__ is list else v for v in value))
+    return hash(value)
+
+
+def to_primitive(value):
+    """
+    Convert a model to plain python values, as can be serialized to JSON
+
+    :param value: model instance, list of instances, enum member or plain value
+    :return: OrderedDict of attribute names to converted values for models,
+     list for lists, value for enum members and value as is otherwise
+    """
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, tuple)):
+        return [to_primitive(v) for v in value]
+    if attr.has(value.__class__):
+        return OrderedDict(
+            (a.name, to_primitive(getattr(value, a.name)))
+            for a in attr.fields(value.__class__)
+        )
+    return value
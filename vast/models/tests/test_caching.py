@@ -0,0 +1,170 @@
+import threading
+from unittest import TestCase
+
+from vast import resources
+from vast.errors import IllegalModelStateError
+from vast.models import vast_v2
+from vast.models.caching import (
+    CanonicalCache,
+    InternPool,
+    LruCache,
+    active_intern_pool,
+    canonicalizing,
+    interning,
+)
+from vast.parsers import xml_parser
+
+
+class TestLruCache(TestCase):
+    def test_it_evicts_least_recently_used(self):
+        cache = LruCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_it_rejects_non_positive_size(self):
+        with self.assertRaises(ValueError):
+            LruCache(max_size=0)
+
+    def test_it_evicts_oldest_once_all_were_used(self):
+        cache = LruCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.get("b")
+        cache.put("c", 3)
+
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        self.assertIn("c", cache)
+
+    def test_put_replaces_value(self):
+        cache = LruCache(max_size=2)
+        cache.put("a", 1)
+        cache.put("a", 2)
+
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.get("a"), 2)
+
+    def test_clear(self):
+        cache = LruCache(max_size=2)
+        for key in "abc":
+            cache.put(key, key)
+        cache.clear()
+        for key in "def":
+            cache.put(key, key)
+
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("d", cache)
+
+
+class TestInternPool(TestCase):
+    def test_equal_strings_share_object(self):
+        pool = InternPool()
+        first = pool.intern(u"".join([u"https://", u"mag.u"]))
+        second = pool.intern(u"".join([u"https://", u"mag.u"]))
+
+        self.assertIs(first, second)
+
+    def test_pool_is_bounded(self):
+        pool = InternPool(max_size=3)
+        for i in range(10):
+            pool.intern(unicode(i))
+
+        self.assertEqual(len(pool), 3)
+
+    def test_threads_share_object(self):
+        pool = InternPool(max_size=100)
+        results = []
+
+        def intern_all():
+            results.append([pool.intern(u"".join([u"value", unicode(i % 100)])) for i in range(2000)])
+
+        threads = [threading.Thread(target=intern_all) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(pool), 100)
+        self.assertEqual(len(set(id(value) for r in results for value in r)), 100)
+
+    def test_interning_context_is_restored(self):
+        pool = InternPool()
+        with interning(pool):
+            self.assertIs(active_intern_pool(), pool)
+        self.assertIsNone(active_intern_pool())
+
+    def test_models_share_strings_when_interning(self):
+        pool = InternPool()
+        with interning(pool):
+            first = vast_v2.TrackingEvent.make(u"".join([u"https://", u"t.u"]), u"start")
+            second = vast_v2.TrackingEvent.make(u"".join([u"https://", u"t.u"]), u"start")
+
+        self.assertIs(first.tracking_event_uri, second.tracking_event_uri)
+
+    def test_models_do_not_share_strings_by_default(self):
+        first = vast_v2.TrackingEvent.make(u"".join([u"https://", u"t.u"]), u"start")
+        second = vast_v2.TrackingEvent.make(u"".join([u"https://", u"t.u"]), u"start")
+
+        self.assertIsNot(first.tracking_event_uri, second.tracking_event_uri)
+
+    def test_parser_interns_across_documents(self):
+        pool = InternPool()
+        first = xml_parser.from_xml_file(resources.SIMPLE_INLINE_XML, intern_pool=pool)
+        second = xml_parser.from_xml_file(resources.SIMPLE_INLINE_XML, intern_pool=pool)
+
+        self.assertEqual(first, second)
+        self.assertIs(first.ad.inline.impression, second.ad.inline.impression)
+        self.assertIs(
+            first.ad.inline.creatives[0].linear.media_files[0].asset,
+            second.ad.inline.creatives[0].linear.media_files[0].asset,
+        )
+
+
+class TestCanonicalCache(TestCase):
+    def test_equal_leaves_are_the_same_object(self):
+        with canonicalizing(CanonicalCache()):
+            first = vast_v2.TrackingEvent.make(u"https://t.u", u"start")
+            second = vast_v2.TrackingEvent.make(u"https://t.u", u"start")
+            # different arguments, structurally identical instance
+            third = vast_v2.TrackingEvent.make(u"https://t.u", vast_v2.TrackingEventType.START)
+
+        self.assertIs(first, second)
+        self.assertIs(first, third)
+
+    def test_cache_hit_skips_validation(self):
+        cache = CanonicalCache()
+        with canonicalizing(cache):
+            vast_v2.StaticResource.make(u"https://s.u/a.png", u"image/png")
+            vast_v2.StaticResource.make(u"https://s.u/a.png", u"image/png")
+
+        self.assertEqual(cache.hits, 1)
+
+    def test_illegal_models_still_raise(self):
+        with canonicalizing(CanonicalCache()):
+            with self.assertRaises(IllegalModelStateError):
+                vast_v2.TrackingEvent.make(u"https://t.u", u"no such event")
+
+    def test_no_sharing_by_default(self):
+        first = vast_v2.UriWithId.make(u"https://u.u", u"id")
+        second = vast_v2.UriWithId.make(u"https://u.u", u"id")
+
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+
+    def test_parser_shares_leaves_across_documents(self):
+        cache = CanonicalCache()
+        first = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML, canonical_cache=cache)
+        second = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML, canonical_cache=cache)
+
+        self.assertEqual(first, second)
+        for a, b in zip(first.ad.inline.creatives[0].linear.media_files,
+                        second.ad.inline.creatives[0].linear.media_files):
+            self.assertIs(a, b)
@@ -0,0 +1,153 @@
+import pickle
+from unittest import TestCase
+
+from enum import Enum
+
+from vast import resources
+from vast.models import vast_v2
+from vast.models.shared import (
+    UNKNOWN_NONE,
+    Converter,
+    EnumLookup,
+    enum_lookup,
+    register_enum_lookup,
+)
+from vast.parsers import xml_parser
+
+
+class Color(Enum):
+    RED = "red"
+    DARK_BLUE = "darkBlue"
+
+
+class TestEnumLookup(TestCase):
+    def test_exact_values_and_members(self):
+        lookup = EnumLookup(Color)
+
+        self.assertIs(lookup.get("red"), Color.RED)
+        self.assertIs(lookup.get(u"darkBlue"), Color.DARK_BLUE)
+        self.assertIs(lookup.get(Color.RED), Color.RED)
+
+    def test_normalized_values(self):
+        lookup = EnumLookup(Color)
+
+        self.assertIs(lookup.get(" RED "), Color.RED)
+        self.assertIs(lookup.get("darkblue"), Color.DARK_BLUE)
+
+    def test_normalization_can_be_turned_off(self):
+        lookup = EnumLookup(Color, strip=False, casefold=False)
+
+        self.assertIsNone(lookup.get(" red"))
+        self.assertIsNone(lookup.get("RED"))
+
+    def test_aliases(self):
+        lookup = EnumLookup(Color, aliases={"navy": Color.DARK_BLUE, "crimson": "red"})
+
+        self.assertIs(lookup.get("Navy"), Color.DARK_BLUE)
+        self.assertIs(lookup.get("crimson"), Color.RED)
+
+    def test_unknown_values(self):
+        lookup = EnumLookup(Color)
+
+        self.assertIsNone(lookup.get("green"))
+        self.assertIsNone(lookup.get(["unhashable"]))
+        with self.assertRaises(ValueError):
+            lookup("green")
+
+    def test_unknown_policy_is_validated(self):
+        with self.assertRaises(ValueError):
+            EnumLookup(Color, unknown="ignore")
+
+
+class TestEnumConverter(TestCase):
+    def setUp(self):
+        self.addCleanup(register_enum_lookup, Color)
+
+    def test_unknown_is_an_error_by_default(self):
+        converter = Converter(Color, ("color", ))
+        args = dict(color="green")
+
+        self.assertEqual(len(converter.convert(args, required=())), 1)
+
+    def test_unknown_can_be_dropped(self):
+        converter = Converter(Color, ("color", ))
+        register_enum_lookup(Color, unknown=UNKNOWN_NONE)
+        args = dict(color="green")
+
+        self.assertEqual(converter.convert(args, required=()), [])
+        self.assertIsNone(args["color"])
+
+    def test_unknown_required_is_always_an_error(self):
+        converter = Converter(Color, ("color", ))
+        register_enum_lookup(Color, unknown=UNKNOWN_NONE)
+        args = dict(color="green")
+
+        self.assertEqual(len(converter.convert(args, required=("color", ))), 1)
+
+    def test_registered_lookup_is_shared(self):
+        self.assertIs(enum_lookup(Color), enum_lookup(Color))
+
+
+class TestVastEnumVariants(TestCase):
+    def test_real_world_variants_are_accepted(self):
+        media_file = vast_v2.MediaFile.make(
+            asset=u"https://www.mag.u",
+            delivery=u" progressive ",
+            type=u"Video/MP4",
+            width=300,
+            height=200,
+            bitrate=100,
+            api_framework=u"vpaid",
+        )
+
+        self.assertIs(media_file.delivery, vast_v2.Delivery.PROGRESSIVE)
+        self.assertIs(media_file.type, vast_v2.MimeType.MP4)
+        self.assertIs(media_file.api_framework, vast_v2.ApiFramework.VPAID)
+
+    def test_mime_type_aliases(self):
+        self.assertIs(enum_lookup(vast_v2.MimeType).get("text/javascript"), vast_v2.MimeType.JS)
+
+    def test_tracking_event_case(self):
+        event = vast_v2.TrackingEvent.make(u"https://t.u", u"FirstQuartile")
+
+        self.assertIs(event.tracking_event_type, vast_v2.TrackingEventType.FIRST_QUARTILE)
+
+
+class TestContentHashed(TestCase):
+    def setUp(self):
+        self.vast = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+        self.same = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+        self.other = xml_parser.from_xml_file(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+
+    def test_equal_trees(self):
+        self.assertIsNot(self.vast, self.same)
+        self.assertEqual(self.vast, self.same)
+        self.assertEqual(hash(self.vast), hash(self.same))
+        self.assertFalse(self.vast != self.same)
+
+    def test_different_trees(self):
+        self.assertNotEqual(self.vast, self.other)
+        self.assertNotEqual(hash(self.vast), hash(self.other))
+        self.assertNotEqual(self.vast, self.vast.ad)
+
+    def test_set_membership(self):
+        self.assertIn(self.same, {self.vast})
+        self.assertEqual(len({self.vast, self.same, self.other}), 2)
+
+    def test_hash_is_kept(self):
+        media_file = self.vast.ad.inline.creatives[0].linear.media_files[0]
+        self.assertIsNone(media_file._content_hash)
+
+        content_hash = hash(media_file)
+
+        self.assertEqual(media_file._content_hash, content_hash)
+        self.assertEqual(hash(media_file), content_hash)
+
+    def test_pickled_models_hash_again(self):
+        hash(self.vast)
+        unpickled = pickle.loads(pickle.dumps(self.vast, pickle.HIGHEST_PROTOCOL))
+
+        self.assertIsNone(unpickled._content_hash)
+
+        self.assertEqual(unpickled, self.vast)
+        self.assertEqual(hash(unpickled), hash(self.vast))
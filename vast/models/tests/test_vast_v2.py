@@ -1,3 +1,5 @@
+from unittest import TestCase
+
 from testscenarios import TestWithScenarios
 
 from vast.errors import IllegalModelStateError
@@ -41,3 +43,39 @@ class TestVastIllegals(VastModelMixin, TestWithScenarios):
             # since we want to test the model make method,
             # not our mixin
             vast_v2.Vast.make(**kw)
+
+
+class TestAdParameters(TestCase):
+    def test_data_is_kept_as_given(self):
+        data = u'{"a": 1}'
+
+        self.assertIs(vast_v2.AdParameters.make(data=data).data, data)
+
+    def test_text(self):
+        self.assertEqual(vast_v2.AdParameters.make(data=b"caf\xc3\xa9").data, u"caf\xe9")
+        self.assertEqual(vast_v2.AdParameters.make(data=b"caf\xc3\xa9").text(), u"caf\xe9")
+        # xml encoded data was decoded by the XML parser, whatever entities are left are part of it
+        self.assertEqual(
+            vast_v2.AdParameters.make(data=u'<a x="&lt;"/>', xml_encoded=u"true").text(),
+            u'<a x="&lt;"/>',
+        )
+
+    def test_json_is_parsed_once(self):
+        ad_parameters = vast_v2.AdParameters.make(data=u'{"a": [1, 2]}')
+
+        self.assertEqual(ad_parameters.json(), {"a": [1, 2]})
+        self.assertIs(ad_parameters.json(), ad_parameters.json())
+
+    def test_xml(self):
+        ad_parameters = vast_v2.AdParameters.make(data=u"<config><id>7</id></config>", xml_encoded=True)
+
+        self.assertEqual(ad_parameters.xml()["config"]["id"], u"7")
+
+    def test_max_ad_parameters(self):
+        with vast_v2.max_ad_parameters(4):
+            dropped = vast_v2.AdParameters.make(data=u"12345")
+            kept = vast_v2.AdParameters.make(data=u"1234")
+
+        self.assertEqual((dropped.data, dropped.dropped_size, dropped.text()), (None, 5, None))
+        self.assertEqual((kept.data, kept.dropped_size), (u"1234", None))
+        self.assertEqual(vast_v2.AdParameters.make(data=u"12345").data, u"12345")
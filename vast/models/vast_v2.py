@@ -9,12 +9,18 @@ Models are not meant to be created directly via __init__ method.
 Instead use the 'make' class method provided.
 This to make sure that created models adhere to vast spec. 
 """
+import json
+import threading
+from contextlib import contextmanager
+
 import attr
+import xmltodict
 from enum import Enum
 
 from vast import validators
-from vast.models.shared import ClassChecker, Converter, SomeOf
-from vast.models.shared import check_and_convert
+from vast.models.caching import canonical
+from vast.models.shared import ClassChecker, ContentHashed, Converter, SomeOf
+from vast.models.shared import check_and_convert, register_enum_lookup
 
 
 class Delivery(Enum):
@@ -71,8 +77,50 @@ class TrackingEventType(Enum):
     CLOSE = "close"
 
 
-@attr.s(frozen=True)
-class TrackingEvent(object):
+# Lookup tables are built here once, before any converter uses them.
+# Values are matched ignoring case and surrounding white space.
+register_enum_lookup(Delivery)
+register_enum_lookup(ApiFramework)
+register_enum_lookup(
+    MimeType,
+    aliases={
+        "application/x-javascript": MimeType.JS,
+        "text/javascript": MimeType.JS,
+        "video/3gp": MimeType.GPP,
+        "application/vnd.apple.mpegurl": MimeType.MPEG,
+    },
+)
+register_enum_lookup(TrackingEventType)
+
+
+_ad_parameters = threading.local()
+_MISSING = object()
+
+
+@contextmanager
+def max_ad_parameters(max_size):
+    """
+    Drop the data of AdParameters made in this thread, when over max_size
+
+    :param max_size: in characters, None for no max
+    """
+    previous = getattr(_ad_parameters, "max_size", None)
+    _ad_parameters.max_size = max_size
+    try:
+        yield
+    finally:
+        _ad_parameters.max_size = previous
+
+
+def _raw_text(value):
+    # unicode is kept as is, rather than converted and interned, bytes are decoded from utf-8
+    if isinstance(value, unicode):
+        return value
+    return value.decode("utf-8") if isinstance(value, bytes) else unicode(value)
+
+
+@attr.s(frozen=True, cmp=False)
+class TrackingEvent(ContentHashed):
     """
     Event for user interaction with the Creative
     """
@@ -87,6 +135,7 @@ class TrackingEvent(object):
     tracking_event_type = attr.ib()
 
     @classmethod
+    @canonical
     def make(cls, tracking_event_uri, tracking_event_type):
         instance = check_and_convert(
             cls,
@@ -98,8 +147,8 @@ class TrackingEvent(object):
         return instance
 
 
-@attr.s(frozen=True)
-class MediaFile(object):
+@attr.s(frozen=True, cmp=False)
+class MediaFile(ContentHashed):
     """
     2.3.1.4 Media File Attributes
         
@@ -136,6 +185,7 @@ class MediaFile(object):
     api_framework = attr.ib()
 
     @classmethod
+    @canonical
     def make(
             cls,
             asset, delivery, type, width, height,
@@ -213,8 +263,8 @@ class MediaFile(object):
         return ",".join(errors) or None
 
 
-@attr.s(frozen=True)
-class VideoClicks(object):
+@attr.s(frozen=True, cmp=False)
+class VideoClicks(ContentHashed):
     """
     A container for URI elements, for when a user interacts with the video
     """
@@ -227,6 +277,7 @@ class VideoClicks(object):
     custom_click = attr.ib()
 
     @classmethod
+    @canonical
     def make(cls, click_through=None, click_tracking=None, custom_click=None):
         instance = check_and_convert(
             cls,
@@ -240,8 +291,8 @@ class VideoClicks(object):
         return instance
 
 
-@attr.s(frozen=True)
-class AdParameters(object):
+@attr.s(frozen=True, cmp=False)
+class AdParameters(ContentHashed):
     """
     Some ad serving systems may want to send data to the media file when first initialized.
     For example,
@@ -250,19 +301,32 @@ class AdParameters(object):
     The optional <AdParameters> element for the Linear creative enables this data exchange.
 
     The optional attribute xmlEncoded is available for the <AdParameters> element to identify whether
-    the ad parameters are xmldencoded
+    the ad parameters are xmldencoded, which the XML parser already decoded them from.
+
+    Payloads can be large, and are mostly passed on as is, so unicode data is kept as given,
+    and only parsed by the json and xml methods, once.
+    Within max_ad_parameters, payloads over the max size are dropped, leaving data None and their size in dropped_size.
     """
     REQUIRED = ("data", )
     CONVERTERS = (
-        Converter(unicode, ("data",)),
+        Converter(_raw_text, ("data",)),
         Converter(bool, ("xml_encoded", )),
     )
 
     data = attr.ib()
     xml_encoded = attr.ib()
+    dropped_size = attr.ib(default=None)
 
     @classmethod
-    def make(cls, data, xml_encoded=None):
+    def make(cls, data, xml_encoded=None, dropped_size=None):
+        """
+
+        :param dropped_size: of data which was dropped, for data None, as when rebuilt by updates
+        """
+        if data is None and dropped_size is not None:
+            instance = check_and_convert(cls, args_dict=dict(data=u"", xml_encoded=xml_encoded))
+            return attr.evolve(instance, data=None, dropped_size=dropped_size)
+
         instance = check_and_convert(
             cls,
             args_dict=dict(
@@ -270,11 +334,44 @@ class AdParameters(object):
                 xml_encoded=xml_encoded,
             ),
         )
+        max_size = getattr(_ad_parameters, "max_size", None)
+        if max_size is not None and len(instance.data) > max_size:
+            instance = attr.evolve(instance, data=None, dropped_size=len(instance.data))
         return instance
 
+    def _cached(self, name, compute):
+        value = self.__dict__.get(name, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            object.__setattr__(self, name, value)
+        return value
+
+    def text(self):
+        """
 
-@attr.s(frozen=True)
-class Linear(object):
+        :return: data as unicode, None if dropped
+        """
+        return self.data
+
+    def json(self):
+        """
+
+        :return: text parsed as JSON
+        :raises: ValueError if text is not JSON
+        """
+        return self._cached("_json", lambda: json.loads(self.text()))
+
+    def xml(self):
+        """
+
+        :return: text parsed as XML, into an xmltodict dict
+        :raises: ExpatError if text is not XML
+        """
+        return self._cached("_xml", lambda: xmltodict.parse(self.text()))
+
+
+@attr.s(frozen=True, cmp=False)
+class Linear(ContentHashed):
     """
     The most common type of video advertisement trafficked in the industry is a “linear ad”,
     which is an ad  that displays in the same area as the content but not at the same time as the content.
@@ -326,8 +423,37 @@ class Linear(object):
         return attr.asdict(self, dict_factory=OrderedDict, retain_collection_types=True)
 
 
-@attr.s(frozen=True)
-class StaticResource(object):
+@attr.s(frozen=True, cmp=False)
+class WrapperLinear(Linear):
+    """
+    The <Linear> element of a wrapper creative.
+    The media files are up to the inline ad, so a wrapper one usually has neither <Duration> nor <MediaFiles>,
+    only the <TrackingEvents> and <VideoClicks> to report along with the inline ones.
+    """
+    REQUIRED = ()
+    VALIDATORS = (
+        validators.make_greater_then_validator("duration", 0),
+    )
+
+    @classmethod
+    def make(cls, duration=None, media_files=None, video_clicks=None, ad_parameters=None, tracking_events=None):
+        instance = check_and_convert(
+            cls,
+            args_dict=dict(
+                duration=duration,
+                media_files=media_files,
+                video_clicks=video_clicks,
+                ad_parameters=ad_parameters,
+                tracking_events=tracking_events,
+            ),
+        )
+        validators.validate(instance)
+
+        return instance
+
+
+@attr.s(frozen=True, cmp=False)
+class StaticResource(ContentHashed):
     REQUIRED = ("resource", "mime_type")
     CONVERTERS = (
         Converter(unicode, ("resource", "mime_type")),
@@ -336,6 +462,7 @@ class StaticResource(object):
     mime_type = attr.ib()
 
     @classmethod
+    @canonical
     def make(cls, resource, mime_type):
         instance = check_and_convert(
             cls,
@@ -347,8 +474,8 @@ class StaticResource(object):
         return instance
 
 
-@attr.s(frozen=True)
-class UriWithId(object):
+@attr.s(frozen=True, cmp=False)
+class UriWithId(ContentHashed):
     REQUIRED = ("resource", )
     CONVERTERS = (
         Converter(unicode, ("resource", "id")),
@@ -357,6 +484,7 @@ class UriWithId(object):
     id = attr.ib()
 
     @classmethod
+    @canonical
     def make(cls, resource, id=None):
         instance = check_and_convert(
             cls,
@@ -369,8 +497,8 @@ class UriWithId(object):
         return instance
 
 
-@attr.s(frozen=True)
-class NonLinearAd(object):
+@attr.s(frozen=True, cmp=False)
+class NonLinearAd(ContentHashed):
     REQUIRED = ("width", "height")
     CONVERTERS = (
         Converter(unicode, ("iframe_resource", "html_resource", "id")),
@@ -435,8 +563,8 @@ class NonLinearAd(object):
         return instance
 
 
-@attr.s(frozen=True)
-class NonLinear(object):
+@attr.s(frozen=True, cmp=False)
+class NonLinear(ContentHashed):
     """
     The ad runs concurrently with the video content so the users see the ad while viewing the content.
     Non-linear video ads can be delivered as text, graphical ads, or as video overlays
@@ -463,8 +591,28 @@ class NonLinear(object):
         return instance
 
 
-@attr.s(frozen=True)
-class CompanionAd(object):
+@attr.s(frozen=True, cmp=False)
+class WrapperNonLinear(NonLinear):
+    """
+    The <NonLinearAds> element of a wrapper creative, which may only have <TrackingEvents>
+    """
+    REQUIRED = ()
+
+    @classmethod
+    def make(cls, non_linear_ads=None, tracking_events=None):
+        instance = check_and_convert(
+            cls,
+            args_dict=dict(
+                non_linear_ads=non_linear_ads,
+                tracking_events=tracking_events,
+            ),
+        )
+
+        return instance
+
+
+@attr.s(frozen=True, cmp=False)
+class CompanionAd(ContentHashed):
     """
     Commonly text, display ads, rich media, or skins that wrap around the video experience.
     These ads come in a number of sizes and shapes and typically run alongside or surrounding the video player
@@ -530,8 +678,8 @@ class CompanionAd(object):
         return instance
 
 
-@attr.s(frozen=True)
-class Companion(object):
+@attr.s(frozen=True, cmp=False)
+class Companion(ContentHashed):
     """
     Companion Ads - Container for Companion Ads
     Get its own class to be in line with the other creative types
@@ -555,8 +703,8 @@ class Companion(object):
         return instance
 
 
-@attr.s(frozen=True)
-class Creative(object):
+@attr.s(frozen=True, cmp=False)
+class Creative(ContentHashed):
     """
     A creative in VAST is a file that is part of a VAST ad.
     Multiple creative may be provided in the form of  Linear, NonLinear, or Companions.
@@ -626,8 +774,24 @@ class Creative(object):
         return instance
 
 
-@attr.s(frozen=True)
-class Inline(object):
+@attr.s(frozen=True, cmp=False)
+class WrapperCreative(Creative):
+    """
+    A creative of a wrapper, carrying the tracking of the wrapper rather than the ad itself:
+    its <Linear> and <NonLinearAds> elements need none of the elements required of inline ones.
+    It may have <CompanionAds> only as well.
+    """
+    SOME_OFS = (
+        SomeOf(attr_names=("linear", "non_linear", "companion")),
+    )
+    CLASSES = (
+        ClassChecker("linear", WrapperLinear),
+        ClassChecker("non_linear", WrapperNonLinear),
+    )
+
+
+@attr.s(frozen=True, cmp=False)
+class Inline(ContentHashed):
     """
     2.2.4 The <InLine> Element
     The last ad server in the ad supply chain serves an <InLine> element. 
@@ -664,8 +828,8 @@ class Inline(object):
 
 
 
-@attr.s(frozen=True)
-class Wrapper(object):
+@attr.s(frozen=True, cmp=False)
+class Wrapper(ContentHashed):
     """
     
     """
@@ -698,8 +862,8 @@ class Wrapper(object):
         return instance
 
 
-@attr.s(frozen=True)
-class Ad(object):
+@attr.s(frozen=True, cmp=False)
+class Ad(ContentHashed):
     """
     
     """
@@ -736,8 +900,8 @@ class Ad(object):
         return cls.make(id=id, inline=inline)
 
 
-@attr.s(frozen=True)
-class Vast(object):
+@attr.s(frozen=True, cmp=False)
+class Vast(ContentHashed):
     """
     The Document Root Element
     """
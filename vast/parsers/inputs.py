@@ -0,0 +1,266 @@
+"""
+Raw inputs for the xml parser
+
+Adapts files, bytes and buffers to what expat consumes - a str, or a file like object with read -
+without decoding them and without holding more than a chunk of a copy at any time:
+ * bytes are handed over as is
+ * bytearray and memoryview are read through in zero copy memoryview slices
+ * large files are memory mapped
+ * gzip and deflate (zlib) compressed inputs are decompressed while being read
+"""
+import mmap
+import os
+import zlib
+from contextlib import contextmanager
+
+AUTO = "auto"
+GZIP = "gzip"
+DEFLATE = "deflate"
+
+COMPRESSIONS = (AUTO, GZIP, DEFLATE, None)
+
+# files of at least this many bytes are memory mapped rather than read through a file buffer
+MMAP_THRESHOLD = 1 << 20
+
+CHUNK_SIZE = 1 << 16
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_WBITS = {
+    GZIP: 16 + zlib.MAX_WBITS,
+    DEFLATE: zlib.MAX_WBITS,
+}
+
+
+def detect_compression(head):
+    """
+
+    :param head: at least the first two bytes of an input
+    :return: GZIP, DEFLATE or None if input is not compressed
+    """
+    head = bytes(head[:2])
+    if head == _GZIP_MAGIC:
+        return GZIP
+    # zlib header: deflate method, and a check value making the first two bytes a multiple of 31
+    if len(head) == 2 and ord(head[0]) & 0x0f == 8 and (ord(head[0]) * 256 + ord(head[1])) % 31 == 0:
+        return DEFLATE
+    return None
+
+
+def _check_compression(compression):
+    if compression not in COMPRESSIONS:
+        raise ValueError("compression must be one of %s but was %s" % (COMPRESSIONS, compression))
+
+
+class BufferReader(object):
+    """
+    File like reader over a buffer, slicing it without copying the remainder
+    """
+
+    def __init__(self, buf):
+        self._view = memoryview(buf)
+        self._position = 0
+
+    def read(self, size=-1):
+        start = self._position
+        if size is None or size < 0:
+            end = len(self._view)
+        else:
+            end = min(start + size, len(self._view))
+        self._position = end
+        return self._view[start:end].tobytes()
+
+
+class DecompressingReader(object):
+    """
+    File like reader decompressing a compressed file like object while it is being read
+    """
+
+    def __init__(self, raw, compression, chunk_size=CHUNK_SIZE):
+        """
+
+        :param raw: file like object with compressed content
+        :param compression: GZIP or DEFLATE
+        :param chunk_size: number of compressed bytes read from raw at a time
+        """
+        self._raw = raw
+        self._decompressor = zlib.decompressobj(_WBITS[compression])
+        self._chunk_size = chunk_size
+        self._buffer = b""
+        self._eof = False
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return b"".join(iter(lambda: self.read(self._chunk_size), b""))
+
+        decompressor = self._decompressor
+        while not self._eof:
+            data = decompressor.unconsumed_tail or self._raw.read(self._chunk_size)
+            if not data:
+                self._eof = True
+                self._buffer = decompressor.flush()
+                break
+            # never decompress more than asked for, expat rejects bigger reads
+            out = decompressor.decompress(data, size)
+            if out:
+                return out
+
+        out, self._buffer = self._buffer[:size], self._buffer[size:]
+        return out
+
+
+class HeadReader(object):
+    """
+    File like reader of a head read off a reader, followed by the rest of that reader
+    """
+
+    def __init__(self, head, reader):
+        self._head = head
+        self._reader = reader
+
+    def read(self, size=-1):
+        head = self._head
+        if not head:
+            return self._reader.read(size)
+        if size is None or size < 0:
+            self._head = b""
+            return head + self._reader.read()
+        self._head = head[size:]
+        return head[:size]
+
+
+class RecordingReader(object):
+    """
+    File like reader keeping a copy of what is read off a reader, up to a size
+    """
+
+    def __init__(self, reader, max_size):
+        """
+
+        :param reader: object with a read(size) method
+        :param max_size: max bytes kept, past which the copy is dropped
+        """
+        self._reader = reader
+        self._max_size = max_size
+        self._chunks = []
+        self._size = 0
+        self._is_complete = False
+
+    def read(self, size=-1):
+        chunk = self._reader.read(size)
+        if not chunk:
+            self._is_complete = True
+        elif self._chunks is not None:
+            self._size += len(chunk)
+            if self._size > self._max_size:
+                self._chunks = None
+            else:
+                self._chunks.append(chunk)
+        return chunk
+
+    def recorded(self):
+        """
+
+        :return: bytes read off the reader, None if it was not read to the end or the copy was dropped
+        """
+        if not self._is_complete or self._chunks is None:
+            return None
+        return b"".join(self._chunks)
+
+
+def _tell(reader):
+    """
+
+    :return: position of a seekable reader, None for readers which cannot seek, such as pipes
+    """
+    if not hasattr(reader, "seek") or not hasattr(reader, "tell"):
+        return None
+    seekable = getattr(reader, "seekable", None)
+    if seekable is not None and not seekable():
+        return None
+    try:
+        return reader.tell()
+    except (IOError, OSError):
+        return None
+
+
+def read_head(reader, size):
+    """
+    Read the head of an input, without taking it from what is left to parse
+
+    :param reader: object with a read(size) method
+    :param size: max bytes of the head
+    :return: (head, input to parse in place of reader, is_complete) tuple, where is_complete tells
+    the head is the whole input
+    """
+    position = _tell(reader)
+    can_seek = position is not None
+
+    chunks = []
+    remaining = size
+    is_complete = False
+    while remaining > 0:
+        chunk = reader.read(remaining)
+        if not chunk:
+            is_complete = True
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    head = b"".join(chunks)
+
+    if is_complete:
+        return head, head, True
+    if can_seek:
+        # files are read by expat in C, rather than through a python reader
+        reader.seek(position)
+        return head, reader, False
+    return head, HeadReader(head, reader), False
+
+
+def from_bytes(data, compression=AUTO):
+    """
+
+    :param data: bytes, bytearray or memoryview
+    :param compression: AUTO, GZIP, DEFLATE or None
+    :return: input for expat
+    """
+    _check_compression(compression)
+    if compression == AUTO:
+        compression = detect_compression(memoryview(data)[:2].tobytes())
+
+    if compression is not None:
+        return DecompressingReader(BufferReader(data), compression)
+    if isinstance(data, bytes):
+        return data
+    return BufferReader(data)
+
+
+@contextmanager
+def open_file(path, compression=AUTO, mmap_threshold=MMAP_THRESHOLD):
+    """
+    Open a file for parsing in binary mode
+
+    :param path: to the file
+    :param compression: AUTO, GZIP, DEFLATE or None
+    :param mmap_threshold: memory map uncompressed files of at least this size, None to never map
+    :return: context manager of the input for expat
+    """
+    _check_compression(compression)
+    with open(path, "rb") as fp:
+        if compression == AUTO:
+            compression = detect_compression(fp.read(2))
+            fp.seek(0)
+
+        if compression is not None:
+            yield DecompressingReader(fp, compression)
+            return
+
+        size = os.fstat(fp.fileno()).st_size
+        if mmap_threshold is None or size < mmap_threshold or size == 0:
+            yield fp
+            return
+
+        mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
@@ -0,0 +1,103 @@
+"""
+Resource limits for parsing untrusted documents
+
+Limits are enforced while expat goes through the document,
+so parsing stops as soon as one is exceeded rather than after the whole document was read.
+"""
+import attr
+
+from vast.errors import LimitExceededError
+
+
+@attr.s(frozen=True)
+class Limits(object):
+    """
+    Resource limits, None for no limit
+
+    max_bytes: of the (decompressed) input
+    max_depth: of element nesting
+    max_elements: in the whole document
+    max_creatives, max_media_files, max_tracking_events: number of these elements in the whole document
+    max_entities: number of entity declarations, as entity expansion can blow up small documents
+    """
+    max_bytes = attr.ib(default=4 << 20)
+    max_depth = attr.ib(default=32)
+    max_elements = attr.ib(default=20000)
+    max_creatives = attr.ib(default=32)
+    max_media_files = attr.ib(default=128)
+    max_tracking_events = attr.ib(default=512)
+    max_entities = attr.ib(default=0)
+
+
+# element names of per list limits
+_COUNTED_ELEMENTS = (
+    ("Creative", "max_creatives"),
+    ("MediaFile", "max_media_files"),
+    ("Tracking", "max_tracking_events"),
+)
+
+
+class LimitsChecker(object):
+    """
+    Sits between an expat parser and an xmltodict handler, checking limits before handing events over
+    """
+
+    def __init__(self, limits, handler):
+        """
+
+        :param limits: Limits
+        :param handler: xmltodict handler
+        """
+        self.limits = limits
+        self.handler = handler
+        self.bytes = 0
+        self.depth = 0
+        self.elements = 0
+        self.entities = 0
+        self._counted = dict(
+            (name, [0, getattr(limits, limit_name), limit_name])
+            for name, limit_name in _COUNTED_ELEMENTS
+            if getattr(limits, limit_name) is not None
+        )
+
+    def install(self, parser):
+        """
+
+        :param parser: expat parser, set up for the handler
+        """
+        parser.StartElementHandler = self.start_element
+        parser.EndElementHandler = self.end_element
+        parser.EntityDeclHandler = self.entity_decl
+
+    def _check(self, limit_name, value):
+        limit = getattr(self.limits, limit_name)
+        if limit is not None and value > limit:
+            raise LimitExceededError(limit_name, limit, value)
+
+    def consume(self, chunk):
+        """
+
+        :param chunk: about to be fed to the parser
+        """
+        self.bytes += len(chunk)
+        self._check("max_bytes", self.bytes)
+
+    def start_element(self, name, attrs):
+        self.depth += 1
+        self.elements += 1
+        self._check("max_depth", self.depth)
+        self._check("max_elements", self.elements)
+        counted = self._counted.get(name)
+        if counted is not None:
+            counted[0] += 1
+            if counted[0] > counted[1]:
+                raise LimitExceededError(counted[2], counted[1], counted[0])
+        self.handler.startElement(name, attrs)
+
+    def end_element(self, name):
+        self.depth -= 1
+        self.handler.endElement(name)
+
+    def entity_decl(self, *args):
+        self.entities += 1
+        self._check("max_entities", self.entities)
@@ -0,0 +1,142 @@
+"""
+Declarative element schemas, compiled into parse functions
+
+An Element declares how a model is made out of the dict xmltodict produces for an XML element:
+which attributes, text and child elements feed which make arguments.
+
+    TRACKING_EVENT = Element(TrackingEvent, (
+        one("#text", "tracking_event_uri"),
+        one("@event", "tracking_event_type"),
+    ))
+
+compile_element turns an Element into a single closure per element type, done once,
+so parsing a document only runs these closures and the models make methods.
+"""
+import attr
+
+from vast.deadline import active_deadline
+
+
+@attr.s(frozen=True)
+class Field(object):
+    """
+    A make argument of a model, and where to find it in the element dict
+
+    key: of the value in the element dict, '@name' for attributes, '#text' for text, or a child element name
+    name: of the make argument
+    element: Element of the child element, None for attributes, text and text only children
+    convert: optional function applied to non None raw values
+    unparse: optional function from non None values back to raw ones, the inverse of convert, for rendering
+    many: True if key holds a list of child elements
+    item_key: of the items in the child element container, when key is a container element
+    checkpoint: check the active deadline before each of the list items, for items taking long to parse
+    """
+    key = attr.ib()
+    name = attr.ib()
+    element = attr.ib(default=None)
+    convert = attr.ib(default=None)
+    unparse = attr.ib(default=None)
+    many = attr.ib(default=False)
+    item_key = attr.ib(default=None)
+    checkpoint = attr.ib(default=False)
+
+
+@attr.s(frozen=True)
+class Element(object):
+    """
+    model: class with a make method
+    fields: iterable of Field
+    """
+    model = attr.ib()
+    fields = attr.ib()
+
+
+def one(key, name, element=None, convert=None, unparse=None):
+    """
+    Field for an attribute, the text, or a single child element
+    """
+    return Field(key=key, name=name, element=element, convert=convert, unparse=unparse)
+
+
+def many(key, name, element, item_key=None, checkpoint=False):
+    """
+    Field for a list of child elements,
+    either repeated directly (item_key=None), or within a container element named key
+    """
+    return Field(key=key, name=name, element=element, many=True, item_key=item_key, checkpoint=checkpoint)
+
+
+def compile_element(element):
+    """
+
+    :param element: Element
+    :return: function from an element dict, or text of a text only element, to a model instance,
+    None if element is missing
+    """
+    # The function is generated as source, making a single call to make with a keyword argument per field,
+    # so that parsing an element costs no more than a hand written parse function would
+    namespace = {"make": element.model.make, "basestring": basestring}
+    lines = [
+        "def build(xml_dict):",
+        "    if xml_dict is None:",
+        "        return None",
+        "    if isinstance(xml_dict, basestring):",
+        "        xml_dict = {'#text': xml_dict}",
+        "    get = xml_dict.get",
+    ]
+    args = []
+    for i, field in enumerate(element.fields):
+        args.append("%s=%s" % (field.name, _field_expression(field, "f%d" % i, namespace, lines)))
+    lines.append("    return make(%s)" % ", ".join(args))
+
+    exec compile("\n".join(lines), "<schema %s>" % element.model.__name__, "exec") in namespace
+    return namespace["build"]
+
+
+def _field_expression(field, symbol, namespace, lines):
+    """
+    :return: source of an expression for the field value,
+    adds the objects it refers to to namespace, and the statements it needs to lines
+    """
+    if field.many:
+        namespace[symbol] = _compile_many(field)
+        return "%s(get(%r))" % (symbol, field.key)
+
+    if field.element is not None:
+        namespace[symbol] = compile_element(field.element)
+        return "%s(get(%r))" % (symbol, field.key)
+
+    if field.convert is not None:
+        lines.append("    %s = get(%r)" % (symbol, field.key))
+        lines.append("    if %s is not None:" % symbol)
+        lines.append("        %s = %s_convert(%s)" % (symbol, symbol, symbol))
+        namespace[symbol + "_convert"] = field.convert
+        return symbol
+
+    return "get(%r)" % field.key
+
+
+def _compile_many(field):
+    item_key = field.item_key
+    checkpoint = field.checkpoint
+    build = compile_element(field.element)
+
+    def get_many(items):
+        if not items:
+            return None
+        if item_key is not None:
+            # containers are forced into lists by the xml parser
+            items = items[0][item_key]
+        if not isinstance(items, list):
+            items = [items]
+        deadline = active_deadline() if checkpoint else None
+        if deadline is None:
+            return [build(item) for item in items]
+
+        built = []
+        for item in items:
+            deadline.check(built)
+            built.append(build(item))
+        return built
+
+    return get_many
@@ -1,39 +1,13 @@
-def accept_none(parse_func):
-    def parse(xml_dict):
-        if xml_dict is None:
-            return None
-        return parse_func(xml_dict)
-
-    return parse
-
-
-def unicode_to_dict(parse_func):
-    def parse(xml_dict):
-        if isinstance(xml_dict, unicode):
-            xml_dict = {"#text": xml_dict}
-        return parse_func(xml_dict)
-
-    return parse
-
-
-def accept_falsy(parse_func):
-    def parse(xml_dict):
-        if not xml_dict:
-            return None
-        return parse_func(xml_dict)
-
-    return parse
-
-
-@accept_none
 def parse_duration(duration_str):
     """
 
     :param duration_str: format of HH:MM:SS 
-    :return: duration in seconds int
+    :return: duration in seconds int, None for None
     """
+    if duration_str is None:
+        return None
     h, m, s = map(int, duration_str.split(":"))
-    return h * 3600 + m * m * 60 + s
+    return h * 3600 + m * 60 + s
 
 
 def unparse_duration(duration_int):
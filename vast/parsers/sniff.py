@@ -0,0 +1,117 @@
+"""
+Sniffing of documents, before they are parsed
+
+Reads no further than the prolog and the start tag of the root element,
+so that documents which are not VAST, such as HTML error pages, and VAST of a version there is no parser for,
+are rejected without being parsed. So are empty VAST documents, which ad servers respond with when they have
+no ad to fill with, and which are a large share of responses.
+
+Sniffing is conservative: what it cannot make out, such as documents in UTF-16 or a root start tag
+past the first SNIFF_SIZE bytes, is left to the parser to accept or reject.
+"""
+import codecs
+import re
+
+import attr
+
+from vast.errors import NoAdError, NotVastError, UnsupportedVersionError
+
+# bytes of the head of a document, which the root start tag is looked for in
+SNIFF_SIZE = 4096
+
+_SPACE = re.compile(r"\s*")
+# white space, processing instructions, comments and a document type declaration
+_PROLOG = re.compile(r"(?:\s+|<\?.*?\?>|<!--.*?-->|<!DOCTYPE(?:[^>\[]|\[.*?\])*>)*", re.S)
+_START_TAG = re.compile(r"<([^\s/>!?]+)((?:\s+[^\s=/>]+\s*=\s*(?:\"[^\"]*\"|'[^']*'))*)\s*(/?)>")
+_VERSION = re.compile(r"\sversion\s*=\s*(?:\"([^\"]*)\"|'([^']*)')")
+_MISC = r"(?:\s+|<\?.*?\?>|<!--.*?-->)*"
+_MISC_TO_END = re.compile(_MISC + r"\Z", re.S)
+_END_TAG_TO_END = _MISC + r"</%s\s*>" + _MISC + r"\Z"
+
+
+@attr.s(frozen=True)
+class Root(object):
+    """
+    name: of the root element, None if the document does not start with an element
+    version: attribute of the root element, None if it has none
+    is_empty: whether the root element has no content, None if not known
+    """
+    name = attr.ib()
+    version = attr.ib(default=None)
+    is_empty = attr.ib(default=None)
+
+
+def _start(head):
+    # index after a byte order mark, None for encodings other than ASCII compatible ones
+    if isinstance(head, unicode):
+        return 1 if head[:1] == u"\ufeff" else 0
+    if head[:3] == codecs.BOM_UTF8:
+        return 3
+    if b"\x00" in head[:4] or head[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+        return None
+    return 0
+
+
+def sniff(head, is_complete=False):
+    """
+
+    :param head: first bytes of a document, str or unicode
+    :param is_complete: head is the whole document
+    :return: Root, None if it cannot be made out from head
+    """
+    start = _start(head)
+    if start is None:
+        return None
+
+    position = _SPACE.match(head, start).end()
+    if position == len(head):
+        return Root(None) if is_complete else None
+    if head[position] != "<":
+        return Root(None)
+
+    position = _PROLOG.match(head, position).end()
+    tag = _START_TAG.match(head, position)
+    if tag is None:
+        return None
+
+    name, attributes, is_empty_tag = tag.groups()
+    version = _VERSION.search(attributes)
+    if version is not None:
+        version = version.group(1) if version.group(1) is not None else version.group(2)
+        if "&" in version:
+            # references are left to the parser to resolve
+            return None
+
+    is_empty = None
+    if is_complete:
+        if is_empty_tag:
+            # trailing content is not well formed, and left to the parser to reject
+            is_empty = True if _MISC_TO_END.match(head, tag.end()) else None
+        else:
+            end_tag_to_end = re.compile(_END_TAG_TO_END % re.escape(name), re.S)
+            is_empty = end_tag_to_end.match(head, tag.end()) is not None
+    return Root(name, version, is_empty)
+
+
+def check(head, versions, is_complete=False):
+    """
+    Reject a document by its head
+
+    :param head: first bytes of a document, str or unicode
+    :param versions: VAST versions there are parsers for
+    :param is_complete: head is the whole document
+    :return: VAST version of the document, None if it cannot be made out from head
+    :raises: NotVastError, UnsupportedVersionError, NoAdError
+    """
+    root = sniff(head, is_complete)
+    if root is None:
+        return None
+    if root.name is None:
+        raise NotVastError("document does not start with an element")
+    if root.name != "VAST":
+        raise NotVastError("root must have VAST element but was %s" % root.name)
+    if root.version not in versions:
+        raise UnsupportedVersionError(root.version or None)
+    if root.is_empty:
+        raise NoAdError(root.version)
+    return root.version
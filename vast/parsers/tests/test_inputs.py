@@ -0,0 +1,108 @@
+import gzip
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from io import BytesIO
+from unittest import TestCase
+
+from vast import resources
+from vast.parsers import inputs, xml_parser
+
+
+def _read(path):
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+def _gzip(data):
+    out = BytesIO()
+    with gzip.GzipFile(fileobj=out, mode="wb") as fp:
+        fp.write(data)
+    return out.getvalue()
+
+
+class TestDetectCompression(TestCase):
+    def test_it_detects(self):
+        data = _read(resources.SIMPLE_INLINE_XML)
+
+        self.assertIsNone(inputs.detect_compression(data))
+        self.assertEqual(inputs.detect_compression(_gzip(data)), inputs.GZIP)
+        self.assertEqual(inputs.detect_compression(zlib.compress(data)), inputs.DEFLATE)
+
+
+class TestDecompressingReader(TestCase):
+    def test_reads_never_exceed_requested_size(self):
+        data = _read(resources.INLINE_WITH_TRACKING_EVENTS_XML) * 20
+        reader = inputs.DecompressingReader(BytesIO(_gzip(data)), inputs.GZIP, chunk_size=64)
+
+        chunks = list(iter(lambda: reader.read(100), b""))
+
+        self.assertTrue(all(len(c) <= 100 for c in chunks))
+        self.assertEqual(b"".join(chunks), data)
+
+    def test_read_all(self):
+        data = _read(resources.SIMPLE_INLINE_XML)
+        reader = inputs.DecompressingReader(BytesIO(zlib.compress(data)), inputs.DEFLATE)
+
+        self.assertEqual(reader.read(), data)
+
+
+class TestParseInputs(TestCase):
+    def setUp(self):
+        self.expected = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+        self.data = _read(resources.INLINE_MULTI_FILES_XML)
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def _write(self, name, data):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, "wb") as fp:
+            fp.write(data)
+        return path
+
+    def test_bytes(self):
+        self.assertEqual(xml_parser.from_xml_bytes(self.data), self.expected)
+
+    def test_pipe(self):
+        # past the sniffed head, for the rest to be read off the pipe
+        for data in (self.data, self.data + b" " * 10000):
+            read_fd, write_fd = os.pipe()
+            writer = threading.Thread(target=_write_and_close, args=(write_fd, data))
+            writer.start()
+            with os.fdopen(read_fd, "rb") as fp:
+                self.assertEqual(xml_parser.from_xml_string(fp), self.expected)
+            writer.join()
+
+    def test_memoryview_and_bytearray(self):
+        self.assertEqual(xml_parser.from_xml_bytes(memoryview(self.data)), self.expected)
+        self.assertEqual(xml_parser.from_xml_string(bytearray(self.data)), self.expected)
+
+    def test_compressed_bytes(self):
+        self.assertEqual(xml_parser.from_xml_bytes(_gzip(self.data)), self.expected)
+        self.assertEqual(xml_parser.from_xml_bytes(zlib.compress(self.data)), self.expected)
+
+    def test_compressed_files(self):
+        gzipped = self._write("vast.xml.gz", _gzip(self.data))
+        deflated = self._write("vast.xml.z", zlib.compress(self.data))
+
+        self.assertEqual(xml_parser.from_xml_file(gzipped), self.expected)
+        self.assertEqual(xml_parser.from_xml_file(deflated, compression=inputs.DEFLATE), self.expected)
+
+    def test_memory_mapped_file(self):
+        path = self._write("vast.xml", self.data)
+
+        with inputs.open_file(path, mmap_threshold=1) as xml_input:
+            self.assertIsInstance(xml_input, mmap.mmap)
+            self.assertEqual(xml_parser.from_xml_string(xml_input), self.expected)
+
+    def test_illegal_compression(self):
+        with self.assertRaises(ValueError):
+            xml_parser.from_xml_bytes(self.data, compression="zip")
+
+
+def _write_and_close(fd, data):
+    with os.fdopen(fd, "wb") as fp:
+        fp.write(data)
@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from vast import resources
+from vast.errors import LimitExceededError, ParseError
+from vast.parsers import xml_parser
+from vast.parsers.limits import Limits
+
+
+def _read(path):
+    with open(path, "r") as fp:
+        return fp.read()
+
+
+class _CountingReader(object):
+    def __init__(self, data, chunk_size):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.position = 0
+
+    def read(self, size):
+        chunk = self.data[self.position:self.position + min(size, self.chunk_size)]
+        self.position += len(chunk)
+        return chunk
+
+
+class TestLimits(TestCase):
+    def setUp(self):
+        self.xml = _read(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+
+    def assertExceeds(self, limit_name, limits, xml=None):
+        with self.assertRaises(LimitExceededError) as ctx:
+            xml_parser.from_xml_string(xml or self.xml, limits=limits)
+        self.assertEqual(ctx.exception.limit_name, limit_name)
+        self.assertIsInstance(ctx.exception, ParseError)
+
+    def test_within_default_limits(self):
+        self.assertEqual(
+            xml_parser.from_xml_string(self.xml, limits=Limits()),
+            xml_parser.from_xml_string(self.xml),
+        )
+
+    def test_no_limits(self):
+        no_limits = Limits(*([None] * 7))
+
+        self.assertEqual(
+            xml_parser.from_xml_file(resources.INLINE_WITH_TRACKING_EVENTS_XML, limits=no_limits),
+            xml_parser.from_xml_string(self.xml),
+        )
+
+    def test_max_bytes(self):
+        self.assertExceeds("max_bytes", Limits(max_bytes=100))
+
+    def test_max_depth(self):
+        self.assertExceeds("max_depth", Limits(max_depth=5))
+
+    def test_max_elements(self):
+        self.assertExceeds("max_elements", Limits(max_elements=10))
+
+    def test_per_list_limits(self):
+        self.assertExceeds("max_tracking_events", Limits(max_tracking_events=13))
+        self.assertExceeds("max_media_files", Limits(max_media_files=0))
+        self.assertExceeds("max_creatives", Limits(max_creatives=0))
+
+    def test_entity_declarations(self):
+        xml = '<?xml version="1.0"?><!DOCTYPE VAST [<!ENTITY lol "lol">]>' + self.xml.split("?>", 1)[1]
+
+        self.assertExceeds("max_entities", Limits(), xml=xml)
+
+    def test_parsing_stops_early(self):
+        reader = _CountingReader(self.xml, chunk_size=64)
+
+        with self.assertRaises(LimitExceededError):
+            xml_parser.from_xml_string(reader, limits=Limits(max_tracking_events=1))
+        self.assertLess(reader.position, len(self.xml) / 2)
@@ -0,0 +1,114 @@
+from unittest import TestCase
+
+import attr
+
+from vast.deadline import Deadline, checking
+from vast.errors import DeadlineExceededError
+from vast.models import vast_v2 as v2_models
+from vast.parsers import vast_v2
+from vast.parsers.schema import Element, compile_element, many, one
+
+
+@attr.s()
+class _Item(object):
+    name = attr.ib()
+    size = attr.ib()
+    children = attr.ib()
+    child = attr.ib()
+
+    @classmethod
+    def make(cls, name, size=None, children=None, child=None):
+        return cls(name, size, children, child)
+
+
+_LEAF = Element(_Item, (
+    one("#text", "name"),
+))
+
+_ITEM = Element(_Item, (
+    one("@name", "name"),
+    one("Size", "size", convert=int),
+    many("Children", "children", _LEAF, item_key="Child"),
+    one("Child", "child", _LEAF),
+))
+
+
+class TestCompileElement(TestCase):
+    def setUp(self):
+        self.build = compile_element(_ITEM)
+
+    def test_all_fields(self):
+        actual = self.build({
+            "@name": u"item",
+            "Size": u"3",
+            "Children": [{"Child": [u"a", u"b"]}],
+            "Child": u"c",
+        })
+
+        expected = _Item(
+            u"item", 3,
+            [_Item(u"a", None, None, None), _Item(u"b", None, None, None)],
+            _Item(u"c", None, None, None),
+        )
+        self.assertEqual(actual, expected)
+
+    def test_missing_fields(self):
+        self.assertEqual(self.build({"@name": u"item"}), _Item(u"item", None, None, None))
+
+    def test_missing_element(self):
+        self.assertIsNone(self.build(None))
+
+    def test_single_item_of_many(self):
+        build = compile_element(Element(_Item, (
+            one("@name", "name"),
+            many("Child", "children", _LEAF),
+        )))
+
+        actual = build({"@name": u"item", "Child": u"a"})
+
+        self.assertEqual(actual.children, [_Item(u"a", None, None, None)])
+
+
+class TestVastV2Schema(TestCase):
+    def test_single_non_linear_ad(self):
+        non_linear = compile_element(vast_v2.NON_LINEAR)({
+            "NonLinear": {"@width": u"300", "@height": u"50", "HTMLResource": u"https://h.u"},
+        })
+
+        self.assertEqual(
+            non_linear.non_linear_ads,
+            [v2_models.NonLinearAd.make(width=300, height=50, html_resource=u"https://h.u")],
+        )
+
+
+
+class TestCheckpoint(TestCase):
+    def test_deadline_is_checked_before_each_item(self):
+        now = [0.0]
+
+        @attr.s()
+        class Slow(object):
+            name = attr.ib()
+
+            @classmethod
+            def make(cls, name):
+                now[0] += 1
+                return cls(name)
+
+        build = compile_element(Element(_Item, (
+            one("@name", "name"),
+            many("Child", "children", Element(Slow, (one("#text", "name"), )), checkpoint=True),
+        )))
+
+        with checking(Deadline(1.5, clock=lambda: now[0])):
+            with self.assertRaises(DeadlineExceededError) as ctx:
+                build({"@name": u"item", "Child": [u"a", u"b", u"c"]})
+        self.assertEqual(ctx.exception.partial, [Slow(u"a"), Slow(u"b")])
+
+    def test_no_deadline(self):
+        build = compile_element(Element(_Item, (
+            one("@name", "name"),
+            many("Child", "children", _LEAF, checkpoint=True),
+        )))
+
+        self.assertEqual(build({"@name": u"item", "Child": [u"a"]}).children, [_Item(u"a", None, None, None)])
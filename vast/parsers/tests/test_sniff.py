@@ -0,0 +1,117 @@
+from io import BytesIO
+from unittest import TestCase
+
+from vast import resources
+from vast.errors import NoAdError, NotVastError, UnsupportedVersionError
+from vast.parsers import inputs, sniff, xml_parser
+from vast.parsers.limits import Limits
+
+_VERSIONS = (u"2.0", )
+
+
+class TestSniff(TestCase):
+    def test_root(self):
+        head = b'\xef\xbb\xbf<?xml version="1.0"?>\n<!-- c -->\n<VAST xmlns:a="b" version="2.0">\n  <Ad'
+
+        self.assertEqual(sniff.sniff(head), sniff.Root(u"VAST", u"2.0", None))
+        self.assertEqual(sniff.sniff(head.decode("utf-8")), sniff.Root(u"VAST", u"2.0", None))
+
+    def test_empty_root(self):
+        for document in (b"<VAST version='2.0'/>", b'<VAST version="2.0">\n<!-- no fill --></VAST >\n'):
+            self.assertTrue(sniff.sniff(document, is_complete=True).is_empty)
+            self.assertIsNone(sniff.sniff(document).is_empty)
+        self.assertFalse(sniff.sniff(b'<VAST version="2.0"><Ad/></VAST>', is_complete=True).is_empty)
+
+    def test_html(self):
+        head = b"<!DOCTYPE html>\n<html><head><title>502 Bad Gateway</title>"
+
+        self.assertEqual(sniff.sniff(head).name, u"html")
+
+    def test_not_markup(self):
+        self.assertEqual(sniff.sniff(b'  {"error": "no ad"}'), sniff.Root(None))
+        self.assertEqual(sniff.sniff(b"", is_complete=True), sniff.Root(None))
+
+    def test_what_it_cannot_make_out(self):
+        self.assertIsNone(sniff.sniff(b""))
+        self.assertIsNone(sniff.sniff(b'<?xml version="1.0"?><VA'))
+        self.assertIsNone(sniff.sniff(u'<VAST version="2.0"/>'.encode("utf-16")))
+        self.assertIsNone(sniff.sniff(b'<VAST version="&#50;.0"/>'))
+
+    def test_check(self):
+        self.assertEqual(sniff.check(b'<VAST version="2.0"><Ad', _VERSIONS), u"2.0")
+        self.assertIsNone(sniff.check(b"<VAST", _VERSIONS))
+        with self.assertRaises(NotVastError):
+            sniff.check(b"<html>", _VERSIONS)
+        with self.assertRaises(UnsupportedVersionError) as ctx:
+            sniff.check(b'<VAST version="3.0">', _VERSIONS)
+        self.assertEqual(ctx.exception.version, u"3.0")
+        with self.assertRaises(UnsupportedVersionError) as ctx:
+            sniff.check(b"<VAST>", _VERSIONS)
+        self.assertIsNone(ctx.exception.version)
+        with self.assertRaises(NoAdError):
+            sniff.check(b'<VAST version="2.0"/>', _VERSIONS, is_complete=True)
+
+
+class TestParsersReject(TestCase):
+    def test_not_vast(self):
+        with self.assertRaises(NotVastError):
+            xml_parser.from_xml_bytes(b"<html><body>Service Unavailable</body></html>")
+        with self.assertRaises(NotVastError):
+            xml_parser.from_xml_string(b"Service Unavailable")
+
+    def test_unsupported_version(self):
+        with self.assertRaises(UnsupportedVersionError):
+            xml_parser.from_xml_string(b'<VAST version="4.0"><Ad id="1"/></VAST>')
+
+    def test_no_ad(self):
+        for limits in (None, Limits()):
+            with self.assertRaises(NoAdError):
+                xml_parser.from_xml_bytes(b'<?xml version="1.0"?>\n<VAST version="2.0"/>\n', limits=limits)
+            with self.assertRaises(NoAdError):
+                xml_parser.from_xml_string(BytesIO(b'<VAST version="2.0"></VAST>'), limits=limits)
+
+    def test_no_ad_past_the_head(self):
+        # the parser makes the checks which sniffing could not
+        xml = b'<VAST version="2.0">%s</VAST>' % (b" " * sniff.SNIFF_SIZE)
+
+        with self.assertRaises(NoAdError):
+            xml_parser.from_xml_string(BytesIO(xml))
+        with self.assertRaises(NoAdError):
+            xml_parser.parse_chunks([xml])
+
+    def test_feed_parser_rejects_once_the_head_is_in(self):
+        parser = xml_parser.FeedParser()
+        parser.feed(b"<?xml version='1.0'?><ht")
+
+        with self.assertRaises(NotVastError):
+            parser.feed(b"ml>")
+
+    def test_documents_read_for_sniffing_are_parsed_whole(self):
+        with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+            xml = fp.read()
+        expected = xml_parser.from_xml_string(xml)
+
+        for reader in (BytesIO(xml), inputs.BufferReader(xml), inputs.DecompressingReader(BytesIO(xml.encode("zlib")), inputs.DEFLATE)):
+            self.assertEqual(xml_parser.from_xml_string(reader), expected)
+
+
+class TestReadHead(TestCase):
+    def test_head_is_read_again(self):
+        reader = inputs.BufferReader(b"0123456789")
+
+        head, rest, is_complete = inputs.read_head(reader, 4)
+
+        self.assertEqual((head, is_complete), (b"0123", False))
+        self.assertEqual(rest.read(3), b"012")
+        self.assertEqual(rest.read(), b"3456789")
+
+    def test_seekable_readers_are_rewound(self):
+        reader = BytesIO(b"0123456789")
+
+        head, rest, is_complete = inputs.read_head(reader, 4)
+
+        self.assertIs(rest, reader)
+        self.assertEqual(rest.read(), b"0123456789")
+
+    def test_complete_head(self):
+        self.assertEqual(inputs.read_head(BytesIO(b"012"), 4), (b"012", b"012", True))
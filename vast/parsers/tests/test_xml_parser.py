@@ -1,7 +1,11 @@
+from io import BytesIO
 from unittest import TestCase
 
 
+from vast.deadline import Deadline
+from vast.errors import ParseError
 from vast.parsers import xml_parser
+from vast.parsers.limits import Limits
 from vast.models import vast_v2 as v2_models
 from vast import resources
 
@@ -492,3 +496,101 @@ def _parse_xml_from_file(path_to_file):
     return xml_parser.from_xml_string(xml_string)
 
 
+class TestFeedParser(TestCase):
+    def setUp(self):
+        with open(resources.INLINE_WITH_COMPANION_ADS, "rb") as fp:
+            self.xml = fp.read()
+        self.expected = xml_parser.from_xml_string(self.xml)
+
+    def test_byte_by_byte(self):
+        parser = xml_parser.FeedParser()
+        for i in range(len(self.xml)):
+            parser.feed(self.xml[i:i + 1])
+
+        self.assertEqual(parser.close(), self.expected)
+
+    def test_parse_stream(self):
+        actual = xml_parser.parse_stream(BytesIO(self.xml), chunk_size=100)
+
+        self.assertEqual(actual, self.expected)
+
+    def test_closed_parser_cannot_be_used(self):
+        parser = xml_parser.FeedParser()
+        parser.feed(self.xml)
+        parser.close()
+
+        with self.assertRaises(ParseError):
+            parser.feed(self.xml)
+        with self.assertRaises(ParseError):
+            parser.close()
+
+    def test_not_vast(self):
+        with self.assertRaises(ParseError):
+            xml_parser.parse_chunks([b"<html>", b"</html>"])
+
+    def test_unicode_is_not_decoded_by_the_declared_encoding(self):
+        with open(resources.SIMPLE_INLINE_XML, "rb") as fp:
+            xml = fp.read().decode("utf-8").replace(u'encoding="UTF-8"', u'encoding="ISO-8859-1"')
+        xml = xml.replace(u"<AdSystem>MagU<", u"<AdSystem>caf\xe9<")
+
+        for vast in (
+            xml_parser.from_xml_string(xml),
+            xml_parser.from_xml_string(xml, limits=Limits()),
+            xml_parser.from_xml_string(xml, deadline=Deadline(60)),
+            xml_parser.parse_chunks([xml[:100], xml[100:]]),
+        ):
+            self.assertEqual(vast.ad.inline.ad_system, u"caf\xe9")
+
+    def test_str_and_unicode_chunks_are_not_mixed(self):
+        parser = xml_parser.FeedParser()
+        parser.feed(self.xml[:100])
+
+        with self.assertRaises(ParseError):
+            parser.feed(self.xml[100:].decode("utf-8"))
+
+
+class TestMaxAdParameters(TestCase):
+    def test_large_ad_parameters_are_dropped(self):
+        # with limits, documents are parsed by a FeedParser
+        for limits in (None, Limits()):
+            vast = xml_parser.from_xml_file(resources.INLINE_WITH_AD_PARAMETERS, limits=limits, max_ad_parameters=10)
+            ad_parameters = vast.ad.inline.creatives[0].linear.ad_parameters
+
+            self.assertIsNone(ad_parameters.data)
+            self.assertEqual(ad_parameters.dropped_size, len(u"{data : funky data goes here}"))
+
+    def test_small_ad_parameters_are_kept(self):
+        vast = xml_parser.from_xml_file(resources.INLINE_WITH_AD_PARAMETERS, max_ad_parameters=1000)
+
+        self.assertEqual(vast.ad.inline.creatives[0].linear.ad_parameters.text(), u"{data : funky data goes here}")
+
+
+class TestAdParameters(TestCase):
+    def test_xml_encoded_is_decoded_once(self):
+        with open(resources.INLINE_WITH_AD_PARAMETERS, "rb") as fp:
+            xml = fp.read().replace(
+                b'<AdParameters xmlEncoded="false">\n                        <![CDATA[ {data : funky data goes here} ]]>',
+                b'<AdParameters xmlEncoded="true">&lt;config id="&amp;lt;7&amp;gt;"/&gt;',
+            )
+        ad_parameters = xml_parser.from_xml_bytes(xml).ad.inline.creatives[0].linear.ad_parameters
+
+        self.assertEqual(ad_parameters.text(), u'<config id="&lt;7&gt;"/>')
+        self.assertEqual(ad_parameters.xml()["config"]["@id"], u"<7>")
+
+
+class TestDurations(TestCase):
+    def test_minutes(self):
+        with open(resources.INLINE_WITH_TRACKING_EVENTS_XML, "rb") as fp:
+            xml = fp.read().replace(b"00:00:15", b"01:02:30")
+        vast = xml_parser.from_xml_bytes(xml)
+
+        self.assertEqual(vast.ad.inline.creatives[0].linear.duration, 3600 + 150)
+
+
+class TestMediaFileAttributes(TestCase):
+    def test_codec_and_id(self):
+        with open(resources.INLINE_WITH_TRACKING_EVENTS_XML, "rb") as fp:
+            xml = fp.read().replace(b'<MediaFile ', b'<MediaFile codec="avc1.42E01E" id="m1" ')
+        media_file = xml_parser.from_xml_bytes(xml).ad.inline.creatives[0].linear.media_files[0]
+
+        self.assertEqual((media_file.codec, media_file.id), (u"avc1.42E01E", u"m1"))
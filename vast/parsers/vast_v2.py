@@ -1,10 +1,158 @@
+"""
+VAST 2.0 element schema
+
+Each element is declared in terms of the model it makes and where its make arguments are found,
+children before their parents.
+"""
 from vast.models import vast_v2 as v2_models
-from vast.parsers.shared import (
-    accept_none,
-    accept_falsy,
-    parse_duration,
-    unicode_to_dict,
-)
+from vast.parsers.schema import Element, compile_element, many, one
+from vast.parsers.shared import parse_duration, unparse_duration
+
+
+TRACKING_EVENT = Element(v2_models.TrackingEvent, (
+    one("#text", "tracking_event_uri"),
+    one("@event", "tracking_event_type"),
+))
+
+MEDIA_FILE = Element(v2_models.MediaFile, (
+    one("#text", "asset"),
+    one("@delivery", "delivery"),
+    one("@type", "type"),
+    one("@width", "width"),
+    one("@height", "height"),
+    one("@bitrate", "bitrate"),
+    one("@minBitrate", "min_bitrate"),
+    one("@maxBitrate", "max_bitrate"),
+    one("@scalable", "scalable"),
+    one("@maintainAspectRatio", "maintain_aspect_ratio"),
+    one("@apiFramework", "api_framework"),
+    one("@codec", "codec"),
+    one("@id", "id"),
+))
+
+VIDEO_CLICKS = Element(v2_models.VideoClicks, (
+    one("ClickThrough", "click_through"),
+    one("ClickTracking", "click_tracking"),
+    one("CustomClick", "custom_click"),
+))
+
+AD_PARAMETERS = Element(v2_models.AdParameters, (
+    one("#text", "data"),
+    one("@xmlEncoded", "xml_encoded"),
+))
+
+STATIC_RESOURCE = Element(v2_models.StaticResource, (
+    one("#text", "resource"),
+    one("@creativeType", "mime_type"),
+))
+
+URI_WITH_ID = Element(v2_models.UriWithId, (
+    one("#text", "resource"),
+    one("@id", "id"),
+))
+
+LINEAR = Element(v2_models.Linear, (
+    one("Duration", "duration", convert=parse_duration, unparse=unparse_duration),
+    many("MediaFiles", "media_files", MEDIA_FILE, item_key="MediaFile"),
+    one("VideoClicks", "video_clicks", VIDEO_CLICKS),
+    one("AdParameters", "ad_parameters", AD_PARAMETERS),
+    many("TrackingEvents", "tracking_events", TRACKING_EVENT, item_key="Tracking"),
+))
+
+NON_LINEAR_AD = Element(v2_models.NonLinearAd, (
+    one("@width", "width"),
+    one("@height", "height"),
+    one("@expandedWidth", "expanded_width"),
+    one("@expandedHeight", "expanded_height"),
+    one("@scalable", "scalable"),
+    one("@maintainAspectRatio", "maintain_aspect_ratio"),
+    one("@minSuggestedDuration", "min_suggested_duration", convert=parse_duration, unparse=unparse_duration),
+    one("@apiFramework", "api_framework"),
+    one("@id", "id"),
+    one("StaticResource", "static_resource", STATIC_RESOURCE),
+    one("IFrameResource", "iframe_resource"),
+    one("HTMLResource", "html_resource"),
+    one("NonLinearClickThrough", "non_linear_click_through", URI_WITH_ID),
+    one("AdParameters", "ad_parameters", AD_PARAMETERS),
+))
+
+NON_LINEAR = Element(v2_models.NonLinear, (
+    many("NonLinear", "non_linear_ads", NON_LINEAR_AD),
+    many("TrackingEvents", "tracking_events", TRACKING_EVENT, item_key="Tracking"),
+))
+
+COMPANION_AD = Element(v2_models.CompanionAd, (
+    one("@width", "width"),
+    one("@height", "height"),
+    one("@expandedWidth", "expanded_width"),
+    one("@expandedHeight", "expanded_height"),
+    one("@apiFramework", "api_framework"),
+    one("@id", "id"),
+    one("StaticResource", "static_resource", STATIC_RESOURCE),
+    one("IFrameResource", "iframe_resource"),
+    one("HTMLResource", "html_resource"),
+    one("CompanionClickThrough", "companion_click_through"),
+    one("AdParameters", "ad_parameters", AD_PARAMETERS),
+    one("AltText", "alt_text"),
+    many("TrackingEvents", "tracking_events", TRACKING_EVENT, item_key="Tracking"),
+))
+
+COMPANION = Element(v2_models.Companion, (
+    many("Companion", "companion_ads", COMPANION_AD),
+))
+
+CREATIVE = Element(v2_models.Creative, (
+    one("Linear", "linear", LINEAR),
+    one("NonLinearAds", "non_linear", NON_LINEAR),
+    one("CompanionAds", "companion", COMPANION),
+    one("@id", "id"),
+    one("@sequence", "sequence"),
+    one("@adId", "ad_id"),
+    one("@apiFramework", "api_framework"),
+))
+
+WRAPPER_LINEAR = Element(v2_models.WrapperLinear, LINEAR.fields)
+
+WRAPPER_NON_LINEAR = Element(v2_models.WrapperNonLinear, NON_LINEAR.fields)
+
+WRAPPER_CREATIVE = Element(v2_models.WrapperCreative, (
+    one("Linear", "linear", WRAPPER_LINEAR),
+    one("NonLinearAds", "non_linear", WRAPPER_NON_LINEAR),
+    one("CompanionAds", "companion", COMPANION),
+    one("@id", "id"),
+    one("@sequence", "sequence"),
+    one("@adId", "ad_id"),
+    one("@apiFramework", "api_framework"),
+))
+
+WRAPPER = Element(v2_models.Wrapper, (
+    one("AdSystem", "ad_system"),
+    one("VASTAdTagURI", "vast_ad_tag_uri"),
+    one("AdTitle", "ad_title"),
+    one("Impression", "impression"),
+    one("Error", "error"),
+    many("Creatives", "creatives", WRAPPER_CREATIVE, item_key="Creative", checkpoint=True),
+))
+
+INLINE = Element(v2_models.Inline, (
+    one("AdSystem", "ad_system"),
+    one("AdTitle", "ad_title"),
+    one("Impression", "impression"),
+    many("Creatives", "creatives", CREATIVE, item_key="Creative", checkpoint=True),
+))
+
+AD = Element(v2_models.Ad, (
+    one("@id", "id"),
+    one("InLine", "inline", INLINE),
+    one("Wrapper", "wrapper", WRAPPER),
+))
+
+VAST = Element(v2_models.Vast, (
+    one("@version", "version"),
+    one("Ad", "ad", AD),
+))
+
+_parse_vast = compile_element(VAST)
 
 
 def parse_xml(xml_dict):
@@ -14,192 +162,3 @@ def parse_xml(xml_dict):
     :return: Vast object if parsing was successful
     """
     return _parse_vast(xml_dict.get("VAST"))
-
-
-def _parse_vast(xml_dict):
-    return v2_models.Vast.make(
-        version=xml_dict.get("@version"),
-        ad=_parse_ad(xml_dict.get("Ad")),
-    )
-
-
-@accept_none
-def _parse_ad(xml_dict):
-    return v2_models.Ad.make(
-        id=xml_dict.get("@id"),
-        inline=_parse_inline(xml_dict.get("InLine")),
-        wrapper=_parse_wrapper(xml_dict.get("Wrapper")),
-    )
-
-
-@accept_none
-def _parse_wrapper(xml_dict):
-    return v2_models.Wrapper.make(
-        ad_system=xml_dict.get("AdSystem"),
-        vast_ad_tag_uri=xml_dict.get("VASTAdTagURI"),
-        ad_title=xml_dict.get("AdTitle"),
-        impression=xml_dict.get("Impression"),
-        error=xml_dict.get("Error"),
-        creatives=_parse_creatives(xml_dict.get("Creatives")),
-    )
-
-
-@accept_none
-def _parse_inline(xml_dict):
-    return v2_models.Inline.make(
-        ad_system=xml_dict.get("AdSystem"),
-        ad_title=xml_dict.get("AdTitle"),
-        impression=xml_dict.get("Impression"),
-        creatives=_parse_creatives(xml_dict.get("Creatives")),
-    )
-
-
-@accept_falsy
-def _parse_creatives(creatives):
-    return [_parse_creative(c) for c in creatives[0]["Creative"]]
-
-
-def _parse_creative(xml_dict):
-    return v2_models.Creative.make(
-        linear=_parse_linear_creative(xml_dict.get("Linear")),
-        non_linear=_parse_non_linear_creative(xml_dict.get("NonLinearAds")),
-        companion=_parse_companion_ads_creative(xml_dict.get("CompanionAds")),
-        id=xml_dict.get("@id"),
-        sequence=xml_dict.get("@sequence"),
-        ad_id=xml_dict.get("@adId"),
-        api_framework=xml_dict.get("@apiFramework"),
-    )
-
-
-@accept_none
-def _parse_linear_creative(xml_dict):
-    return v2_models.Linear.make(
-        duration=parse_duration(xml_dict.get("Duration")),
-        media_files=_parse_media_files(xml_dict.get("MediaFiles")),
-        video_clicks=_parse_video_clicks(xml_dict.get("VideoClicks")),
-        ad_parameters=_parse_ad_parameters(xml_dict.get("AdParameters")),
-        tracking_events=_parse_tracking_events(xml_dict.get("TrackingEvents")),
-    )
-
-
-@accept_none
-def _parse_non_linear_creative(xml_dict):
-    return v2_models.NonLinear.make(
-        non_linear_ads=_parse_non_linear_ads(xml_dict.get("NonLinear")),
-        tracking_events=_parse_tracking_events(xml_dict.get("TrackingEvents")),
-    )
-
-def _parse_non_linear_ads(non_linear_ads):
-    return [_parse_non_linear_ad(a) for a in non_linear_ads]
-
-
-def _parse_non_linear_ad(xml_dict):
-    return v2_models.NonLinearAd.make(
-        width=xml_dict.get("@width"),
-        height=xml_dict.get("@height"),
-        expanded_width=xml_dict.get("@expandedWidth"),
-        expanded_height=xml_dict.get("@expandedHeight"),
-        scalable=xml_dict.get("@scalable"),
-        maintain_aspect_ratio=xml_dict.get("@maintainAspectRatio"),
-        min_suggested_duration=parse_duration(xml_dict.get("@minSuggestedDuration")),
-        api_framework=xml_dict.get("@apiFramework"),
-        id=xml_dict.get("@id"),
-        static_resource=_parse_static_resource(xml_dict.get("StaticResource")),
-        iframe_resource=xml_dict.get("IFrameResource"),
-        html_resource=xml_dict.get("HTMLResource"),
-        non_linear_click_through=_parse_uri_with_id(xml_dict.get("NonLinearClickThrough")),
-        ad_parameters=_parse_ad_parameters(xml_dict.get("AdParameters")),
-    )
-
-
-@accept_none
-def _parse_static_resource(xml_dict):
-    return v2_models.StaticResource.make(
-        resource=xml_dict.get("#text"),
-        mime_type=xml_dict.get("@creativeType"),
-    )
-
-
-@unicode_to_dict
-@accept_none
-def _parse_uri_with_id(xml_dict):
-    return v2_models.UriWithId.make(
-        resource=xml_dict.get("#text"),
-        id=xml_dict.get("@id"),
-    )
-
-
-@accept_none
-def _parse_companion_ads_creative(xml_dict):
-    return v2_models.Companion.make(
-        [_parse_companion_ads(a) for a in xml_dict.get("Companion")]
-    )
-
-
-def _parse_companion_ads(xml_dict):
-    return v2_models.CompanionAd.make(
-        width=xml_dict.get("@width"),
-        height=xml_dict.get("@height"),
-        expanded_width=xml_dict.get("@expandedWidth"),
-        expanded_height=xml_dict.get("@expandedHeight"),
-        api_framework=xml_dict.get("@apiFramework"),
-        id=xml_dict.get("@id"),
-        static_resource=_parse_static_resource(xml_dict.get("StaticResource")),
-        iframe_resource=xml_dict.get("IFrameResource"),
-        html_resource=xml_dict.get("HTMLResource"),
-        companion_click_through=xml_dict.get("CompanionClickThrough"),
-        ad_parameters=_parse_ad_parameters(xml_dict.get("AdParameters")),
-        alt_text=xml_dict.get("AltText"),
-        tracking_events=_parse_tracking_events(xml_dict.get("TrackingEvents")),
-    )
-
-
-@accept_none
-def _parse_video_clicks(xml_dict):
-    return v2_models.VideoClicks.make(
-        click_through=xml_dict.get("ClickThrough"),
-        click_tracking=xml_dict.get("ClickTracking"),
-        custom_click=xml_dict.get("CustomClick"),
-    )
-
-
-@unicode_to_dict
-@accept_none
-def _parse_ad_parameters(xml_dict):
-    return v2_models.AdParameters.make(
-        data=xml_dict.get("#text"),
-        xml_encoded=xml_dict.get("@xmlEncoded"),
-    )
-
-
-@accept_falsy
-def _parse_media_files(media_files):
-    return [_parse_media_file(mf) for mf in media_files[0]["MediaFile"]]
-
-
-def _parse_media_file(xml_dict):
-    return v2_models.MediaFile.make(
-        asset=xml_dict.get("#text"),
-        delivery=xml_dict.get("@delivery"),
-        type=xml_dict.get("@type"),
-        width=xml_dict.get("@width"),
-        height=xml_dict.get("@height"),
-        bitrate=xml_dict.get("@bitrate"),
-        min_bitrate=xml_dict.get("@minBitrate"),
-        max_bitrate=xml_dict.get("@maxBitrate"),
-        scalable=xml_dict.get("@scalable"),
-        maintain_aspect_ratio=xml_dict.get("@maintainAspectRatio"),
-        api_framework=xml_dict.get("@apiFramework"),
-    )
-
-
-@accept_falsy
-def _parse_tracking_events(tracking_events):
-    return [_parse_tracking_event(t) for t in tracking_events[0]["Tracking"]]
-
-
-def _parse_tracking_event(xml_dict):
-    return v2_models.TrackingEvent.make(
-        tracking_event_uri=xml_dict.get("#text"),
-        tracking_event_type=xml_dict.get("@event"),
-    )
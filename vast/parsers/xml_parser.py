@@ -1,7 +1,14 @@
+from contextlib import contextmanager
+from xml.parsers import expat
+
 import xmltodict
 
-from vast.errors import ParseError
-from vast.parsers import vast_v2
+from vast.deadline import checking
+from vast.errors import NoAdError, NotVastError, ParseError, UnsupportedVersionError
+from vast.models import vast_v2 as v2_models
+from vast.models.caching import caches
+from vast.parsers import inputs, sniff, vast_v2
+from vast.parsers.limits import LimitsChecker
 
 _PARSERS = {
     u"2.0": vast_v2.parse_xml
@@ -14,38 +21,328 @@ _FORCE_LIST_ELEMENTS = (
     "Companion",
 )
 
+# samples the documents parsed in this process, None for none
+_capture = None
+
 
-def from_xml_file(xml_file, **kwargs):
-    with open(xml_file, "r") as xml_file_like_object:
-        return _parse(xml_file_like_object, **kwargs)
+def from_xml_file(xml_file, intern_pool=None, canonical_cache=None, compression=inputs.AUTO, limits=None,
+                  max_ad_parameters=None, deadline=None, **kwargs):
+    """
+    Entry point for parsing a VAST XML file into a VAST model.
+    The file is read in binary mode, large files are memory mapped
+    and compressed files are decompressed while being parsed.
+
+    :param xml_file: path to the file
+    :param intern_pool: optional InternPool to share equal strings across parsed models
+    :param canonical_cache: optional CanonicalCache to share equal leaf models across parsed models
+    :param compression: one of inputs.COMPRESSIONS, detected from content by default
+    :param limits: optional Limits, enforced while parsing
+    :param max_ad_parameters: optional max size of AdParameters data, larger payloads are dropped
+    :param deadline: optional Deadline, checked between chunks of input and between creatives
+    :param kwargs: pass on to xmltodict
+    :return: parsed Vast object
+    """
+    with inputs.open_file(xml_file, compression) as xml_file_like_object:
+        return _parse(xml_file_like_object, intern_pool, canonical_cache, limits, max_ad_parameters, deadline, **kwargs)
 
 
-def from_xml_string(xml_input, **kwargs):
+def from_xml_bytes(xml_bytes, intern_pool=None, canonical_cache=None, compression=inputs.AUTO, limits=None,
+                   max_ad_parameters=None, deadline=None, **kwargs):
+    """
+    Entry point for parsing raw VAST XML bytes into a VAST model, without decoding them first
+
+    :param xml_bytes: bytes, bytearray or memoryview
+    :param intern_pool: optional InternPool to share equal strings across parsed models
+    :param canonical_cache: optional CanonicalCache to share equal leaf models across parsed models
+    :param compression: one of inputs.COMPRESSIONS, detected from content by default
+    :param limits: optional Limits, enforced while parsing
+    :param max_ad_parameters: optional max size of AdParameters data, larger payloads are dropped
+    :param deadline: optional Deadline, checked between chunks of input and between creatives
+    :param kwargs: pass on to xmltodict
+    :return: parsed Vast object
+    """
+    xml_input = inputs.from_bytes(xml_bytes, compression)
+    return _parse(xml_input, intern_pool, canonical_cache, limits, max_ad_parameters, deadline, **kwargs)
+
+
+def from_xml_string(xml_input, intern_pool=None, canonical_cache=None, limits=None, max_ad_parameters=None,
+                    deadline=None, **kwargs):
     """
     Entry point for parsing a VAST XML into a VAST model
     
-    :param xml_input: as str or file like object
+    :param xml_input: as str, bytearray, memoryview or file like object
+    :param intern_pool: optional InternPool to share equal strings across parsed models
+    :param canonical_cache: optional CanonicalCache to share equal leaf models across parsed models
+    :param limits: optional Limits, enforced while parsing
+    :param max_ad_parameters: optional max size of AdParameters data, larger payloads are dropped
+    :param deadline: optional Deadline, checked between chunks of input and between creatives
     :param kwargs: pass on to xmltodict
     :return: parsed Vast object
     """
-    return _parse(xml_input, **kwargs)
+    if isinstance(xml_input, (bytearray, memoryview)):
+        xml_input = inputs.BufferReader(xml_input)
+    return _parse(xml_input, intern_pool, canonical_cache, limits, max_ad_parameters, deadline, **kwargs)
+
+
+@contextmanager
+def capturing(capture):
+    """
+    Offer the documents parsed through the entry points in this process, by any thread, to capture
+
+    :param capture: object with a sample() method telling whether to capture the next document,
+    and an add(xml) method taking its raw bytes, such as vast.capture.Capture, None for none
+    """
+    global _capture
+    previous = _capture
+    _capture = capture
+    try:
+        yield
+    finally:
+        _capture = previous
 
 
-def _parse(xml_string_or_file_like_object, **kwargs):
+def _parse(xml_string_or_file_like_object, *args, **kwargs):
+    capture = _capture
+    if capture is None or not capture.sample():
+        return _parse_input(xml_string_or_file_like_object, *args, **kwargs)
+
+    xml = xml_string_or_file_like_object
+    if hasattr(xml, "read"):
+        # copied while being parsed, failures included, unless parsing stops short of the end
+        xml = inputs.RecordingReader(xml, capture.max_document_size)
+    try:
+        return _parse_input(xml, *args, **kwargs)
+    finally:
+        xml = xml.recorded() if hasattr(xml, "recorded") else xml
+        if xml is not None:
+            capture.add(xml)
+
+
+def _parse_input(xml_string_or_file_like_object, intern_pool=None, canonical_cache=None, limits=None,
+                 max_ad_parameters=None, deadline=None, **kwargs):
+    if limits is not None or deadline is not None:
+        # the parser sniffs the head as it is fed, so nothing is read past the limits,
+        # and checks the deadline between chunks
+        parser = FeedParser(intern_pool, canonical_cache, limits=limits, max_ad_parameters=max_ad_parameters,
+                            deadline=deadline, **kwargs)
+        for chunk in _iter_chunks(xml_string_or_file_like_object):
+            parser.feed(chunk)
+        return parser.close()
+
+    xml_string_or_file_like_object = _sniff(xml_string_or_file_like_object)
+    with caches(intern_pool, canonical_cache), v2_models.max_ad_parameters(max_ad_parameters):
+        return _parse_xml(xml_string_or_file_like_object, **kwargs)
+
+
+def _sniff(xml_string_or_file_like_object):
+    """
+    Reject a document by its head, before parsing it
+
+    :return: input to parse in place of the given one, which may have been read from
+    """
+    if not hasattr(xml_string_or_file_like_object, "read"):
+        sniff.check(xml_string_or_file_like_object, _PARSERS, is_complete=True)
+        return xml_string_or_file_like_object
+
+    head, xml_input, is_complete = inputs.read_head(xml_string_or_file_like_object, sniff.SNIFF_SIZE)
+    sniff.check(head, _PARSERS, is_complete)
+    return xml_input
+
+
+def _iter_chunks(xml_string_or_file_like_object, chunk_size=inputs.CHUNK_SIZE):
+    if hasattr(xml_string_or_file_like_object, "read"):
+        return iter(lambda: xml_string_or_file_like_object.read(chunk_size), b"")
+
+    xml = xml_string_or_file_like_object
+    if isinstance(xml, unicode):
+        # fed as unicode, for the parser not to decode it by the encoding the document declares
+        return _iter_unicode_chunks(xml, chunk_size)
+    return (xml[i:i + chunk_size] for i in xrange(0, len(xml), chunk_size))
+
+
+def _iter_unicode_chunks(xml, chunk_size):
+    start = 0
+    while start < len(xml):
+        end = start + chunk_size
+        if u"\ud800" <= xml[end - 1:end] <= u"\udbff":
+            # surrogate pairs of narrow builds are kept together
+            end += 1
+        yield xml[start:end]
+        start = end
+
+
+def _parse_xml(xml_string_or_file_like_object, **kwargs):
     kwargs.update({"force_list": _FORCE_LIST_ELEMENTS})
     root = xmltodict.parse(xml_string_or_file_like_object, **kwargs)
-    if "VAST" not in root:
-        raise ParseError("root must have VAST element")
-    vast = root["VAST"]
+    return _parse_root(root)
 
-    if not isinstance(vast, dict):
-        raise ParseError("vast must have children elements but was '%s'" % vast)
-    version = vast.get("@version")
-    if not version:
-        raise ParseError("missing version attribute in vast element '%s'" % vast)
 
+def _parse_root(root):
+    if not root or "VAST" not in root:
+        raise NotVastError("root must have VAST element")
+    vast = root["VAST"]
+
+    # the checks of sniffing, for documents it could not make out
+    version = vast.get("@version") if isinstance(vast, dict) else None
     parser = _PARSERS.get(version)
     if parser is None:
-        raise ParseError("Cannot parse vast version %s" % version)
+        raise UnsupportedVersionError(version or None)
+    if "Ad" not in vast:
+        raise NoAdError(version)
 
     return parser(root)
+
+
+class FeedParser(object):
+    """
+    Incremental parser, for parsing a VAST XML while it is still being received.
+
+    Chunks are consumed by expat as they are fed, building the document tree as they arrive,
+    so only the model making is left to do once the last chunk is in:
+
+        parser = FeedParser()
+        for chunk in chunks:
+            parser.feed(chunk)
+        vast = parser.close()
+
+    It does not block on anything, hence can be fed from any event loop callback.
+    """
+
+    def __init__(self, intern_pool=None, canonical_cache=None, limits=None, encoding=None, max_ad_parameters=None,
+                 deadline=None, **kwargs):
+        """
+
+        :param intern_pool: optional InternPool to share equal strings across parsed models
+        :param canonical_cache: optional CanonicalCache to share equal leaf models across parsed models
+        :param limits: optional Limits, enforced while parsing
+        :param max_ad_parameters: optional max size of AdParameters data, larger payloads are dropped
+        :param encoding: overrides the document encoding of str chunks, unicode chunks are parsed as such
+        :param deadline: optional Deadline, checked before each chunk is parsed and between creatives,
+        recording the usage of stages "xml" and "models"
+        :param kwargs: pass on to the xmltodict handler
+        """
+        self._intern_pool = intern_pool
+        self._canonical_cache = canonical_cache
+        self._max_ad_parameters = max_ad_parameters
+        self._deadline = deadline
+        kwargs.update({"force_list": _FORCE_LIST_ELEMENTS})
+        self._handler = xmltodict._DictSAXHandler(**kwargs)
+        self._encoding = encoding
+        # made once the first chunk tells whether the document is fed as str or unicode
+        self._parser = None
+        self._is_unicode = None
+        self._limits_checker = None
+        if limits is not None:
+            self._limits_checker = LimitsChecker(limits, self._handler)
+        # head of the document until it is sniffed
+        self._head = b""
+        self._closed = False
+
+    def feed(self, chunk):
+        """
+
+        :param chunk: next chunk of the document, str or unicode
+        :raises: ExpatError if the document is not well formed, LimitExceededError if it exceeds limits,
+        NotVastError or UnsupportedVersionError as soon as its head is in, DeadlineExceededError once past the deadline
+        """
+        if self._closed:
+            raise ParseError("cannot feed a closed parser")
+        is_unicode = isinstance(chunk, unicode)
+        if self._parser is None:
+            self._make_parser(is_unicode)
+        elif is_unicode != self._is_unicode:
+            raise ParseError("cannot feed both str and unicode chunks of a document")
+        if is_unicode:
+            chunk = chunk.encode("utf-8")
+        if self._limits_checker is not None:
+            self._limits_checker.consume(chunk)
+        if self._head is not None:
+            self._sniff(chunk)
+        if self._deadline is None:
+            self._parser.Parse(chunk, False)
+            return
+
+        self._deadline.check()
+        with self._deadline.stage("xml"):
+            self._parser.Parse(chunk, False)
+
+    def _make_parser(self, is_unicode):
+        # unicode is fed encoded to utf-8, whatever encoding the document declares, as xmltodict.parse does
+        self._parser = _make_expat_parser(self._handler, "utf-8" if is_unicode else self._encoding)
+        self._is_unicode = is_unicode
+        if self._limits_checker is not None:
+            self._limits_checker.install(self._parser)
+
+    def _sniff(self, chunk):
+        head = self._head + chunk
+        if sniff.check(head, _PARSERS) is None and len(head) < sniff.SNIFF_SIZE:
+            self._head = head
+        else:
+            self._head = None
+
+    def close(self):
+        """
+        Signal the end of the document
+
+        :return: parsed Vast object
+        :raises: DeadlineExceededError once past the deadline, carrying the creatives made so far
+        """
+        if self._closed:
+            raise ParseError("parser is already closed")
+        self._closed = True
+        if self._parser is None:
+            self._make_parser(False)
+        if self._deadline is None:
+            self._parser.Parse(b"", True)
+            return self._make()
+
+        with self._deadline.stage("xml"):
+            self._parser.Parse(b"", True)
+        with self._deadline.stage("models"), checking(self._deadline):
+            return self._make()
+
+    def _make(self):
+        with caches(self._intern_pool, self._canonical_cache), v2_models.max_ad_parameters(self._max_ad_parameters):
+            return _parse_root(self._handler.item)
+
+
+def _make_expat_parser(handler, encoding=None):
+    """
+    Set up an expat parser for an xmltodict handler, the way xmltodict.parse does
+    """
+    parser = expat.ParserCreate(encoding)
+    parser.ordered_attributes = True
+    parser.StartNamespaceDeclHandler = handler.startNamespaceDecl
+    parser.StartElementHandler = handler.startElement
+    parser.EndElementHandler = handler.endElement
+    parser.CharacterDataHandler = handler.characters
+    parser.buffer_text = True
+    # entities are not expanded
+    parser.DefaultHandler = lambda x: None
+    parser.ExternalEntityRefHandler = lambda *x: 1
+    return parser
+
+
+def parse_stream(reader, chunk_size=inputs.CHUNK_SIZE, **kwargs):
+    """
+    Parse a stream chunk by chunk as it is read
+
+    :param reader: object with a read(size) method, returning an empty chunk at the end of the stream
+    :param chunk_size: max bytes read at a time
+    :param kwargs: pass on to FeedParser
+    :return: parsed Vast object
+    """
+    return parse_chunks(iter(lambda: reader.read(chunk_size), b""), **kwargs)
+
+
+def parse_chunks(chunks, **kwargs):
+    """
+
+    :param chunks: iterable of consecutive chunks of a document
+    :param kwargs: pass on to FeedParser
+    :return: parsed Vast object
+    """
+    parser = FeedParser(**kwargs)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
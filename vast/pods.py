@@ -0,0 +1,203 @@
+"""
+Packing ads into ad pods
+
+Filling an ad break means choosing the ads whose linear creatives fit in the break, for the most value:
+
+    candidates = [Candidate(vast, value=bid.price, group=bid.advertiser) for vast, bid in responses]
+    pod = pack(candidates, break_duration=120)
+    for creative in pod.creatives:
+        play(creative.linear)
+
+An ad plays whole, its linear creatives in their sequence order, so it takes the sum of their durations.
+At most one ad of a group is chosen, for separating competing advertisers, or for alternative cuts of the same ad.
+
+Packing is a multiple choice knapsack problem, solved exactly by dynamic programming over the seconds of the break.
+No pod has more than break_duration // shortest duration ads, so no more than that many candidates of a duration
+can be needed, the most valuable ones. Candidates are pruned down to those first,
+so that thousands of candidates, mostly of a few standard durations, come down to tens.
+Where that still leaves too many to solve exactly, candidates are packed greedily by value per second.
+"""
+from collections import defaultdict
+
+import attr
+
+# max number of candidates times seconds of the break solved exactly
+MAX_CELLS = 1 << 18
+
+_INF = float("inf")
+
+
+@attr.s(frozen=True)
+class Candidate(object):
+    """
+    vast: Vast object of an inline ad
+    value: of playing the ad
+    group: ads of the same group are not chosen together, None for an ad of a group of its own
+    """
+    vast = attr.ib()
+    value = attr.ib()
+    group = attr.ib(default=None)
+
+
+@attr.s(frozen=True)
+class Pod(object):
+    """
+    candidates: chosen, in the order they play, most valuable first
+    creatives: linear creatives of the chosen ads, in the order they play
+    duration: in seconds
+    value: of the chosen candidates
+    exact: True if no pod is more valuable, False if packed greedily
+    """
+    candidates = attr.ib()
+    creatives = attr.ib()
+    duration = attr.ib()
+    value = attr.ib()
+    exact = attr.ib()
+
+
+def linear_creatives(vast):
+    """
+
+    :param vast: Vast object
+    :return: list of the linear creatives of an inline ad in the order they play,
+    by sequence, and as listed for creatives without one, after the sequenced ones
+    """
+    inline = vast.ad.inline
+    if inline is None or not inline.creatives:
+        return []
+    creatives = [c for c in inline.creatives if c.linear is not None]
+    if len(creatives) > 1:
+        creatives.sort(key=lambda c: (c.sequence is None, c.sequence))
+    return creatives
+
+
+def pack(candidates, break_duration, max_cells=MAX_CELLS):
+    """
+
+    :param candidates: iterable of Candidate, those without linear creatives, longer than the break,
+    or of no positive value are left out
+    :param break_duration: in seconds
+    :param max_cells: max number of pruned candidates times seconds of the break to solve exactly,
+    over which candidates are packed greedily
+    :return: Pod
+    """
+    items = _prune(_items(candidates, break_duration), break_duration)
+    exact = len(items) * (break_duration + 1) <= max_cells
+    chosen = _solve(items, break_duration) if exact else _greedy(items, break_duration)
+
+    # the most valuable ads take the first positions of the break
+    chosen.sort(key=lambda item: (-item[1], item[3]))
+    creatives = []
+    for item in chosen:
+        creatives.extend(item[4])
+    return Pod(
+        candidates=[item[5] for item in chosen],
+        creatives=creatives,
+        duration=sum(item[0] for item in chosen),
+        value=sum(item[1] for item in chosen),
+        exact=exact,
+    )
+
+
+def _items(candidates, break_duration):
+    """
+    :return: list of (duration, value, group, index, creatives, candidate) tuples of the packable candidates
+    """
+    items = []
+    for index, candidate in enumerate(candidates):
+        if candidate.value <= 0:
+            continue
+        creatives = linear_creatives(candidate.vast)
+        duration = sum(c.linear.duration for c in creatives)
+        if not creatives or duration > break_duration:
+            continue
+        group = (True, index) if candidate.group is None else (False, candidate.group)
+        items.append((duration, candidate.value, group, index, creatives, candidate))
+    return items
+
+
+def _prune(items, break_duration):
+    """
+    :return: items which can be in a most valuable pod
+    """
+    if not items:
+        return items
+    # of a group, only the most valuable item of a duration can be chosen
+    best = {}
+    for item in items:
+        key = (item[2], item[0])
+        other = best.get(key)
+        if other is None or item[1] > other[1]:
+            best[key] = item
+
+    # A chosen item of a duration outside its max_ads most valuable ones could be swapped for one of them:
+    # the other chosen items, fewer than max_ads, rule out no more than one each, by being it or of its group.
+    # Items of no duration take no seconds, so any number of them can be chosen, one of each group.
+    by_duration = defaultdict(list)
+    for item in best.itervalues():
+        by_duration[item[0]].append(item)
+    free = by_duration.pop(0, [])
+    pruned = list(free)
+    if by_duration:
+        max_ads = break_duration // min(by_duration) + len(free)
+        for same_duration in by_duration.itervalues():
+            same_duration.sort(key=lambda item: (-item[1], item[3]))
+            pruned.extend(same_duration[:max_ads])
+    pruned.sort(key=lambda item: item[3])
+    return pruned
+
+
+def _solve(items, capacity):
+    """
+    Multiple choice knapsack by dynamic programming
+
+    :return: list of the chosen items
+    """
+    groups = defaultdict(list)
+    for item in items:
+        groups[item[2]].append(item)
+
+    # most value of the groups so far within each number of seconds, and the item of the group it takes
+    best = [0] * (capacity + 1)
+    choices = []
+    for group_items in groups.itervalues():
+        previous = best[:]
+        choice = [None] * (capacity + 1)
+        for item in group_items:
+            duration, value = item[0], item[1]
+            for seconds in xrange(duration, capacity + 1):
+                with_item = previous[seconds - duration] + value
+                if with_item > best[seconds]:
+                    best[seconds] = with_item
+                    choice[seconds] = item
+        choices.append(choice)
+
+    chosen = []
+    seconds = capacity
+    for choice in reversed(choices):
+        item = choice[seconds]
+        if item is not None:
+            chosen.append(item)
+            seconds -= item[0]
+    return chosen
+
+
+def _greedy(items, capacity):
+    """
+    Items by value per second, those of no duration first, or the most valuable item alone if that is worth more
+
+    :return: list of the chosen items
+    """
+    chosen = []
+    groups = set()
+    remaining = capacity
+    for item in sorted(items, key=lambda item: (-float(item[1]) / item[0] if item[0] else -_INF, item[3])):
+        if item[0] <= remaining and item[2] not in groups:
+            chosen.append(item)
+            groups.add(item[2])
+            remaining -= item[0]
+
+    most_valuable = max(items, key=lambda item: item[1]) if items else None
+    if most_valuable is not None and most_valuable[1] > sum(item[1] for item in chosen):
+        return [most_valuable]
+    return chosen
@@ -0,0 +1,354 @@
+"""
+Prefetching of media file assets into a local disk cache
+
+For stitching ads into content server side, the media files of the selected renditions
+have to be on local disk beforehand:
+
+    cache = DiskCache("/var/cache/vast", max_bytes=10 << 30)
+    prefetcher = Prefetcher(cache)
+    paths = prefetcher.prefetch(linears, max_renditions=2)
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import urllib2
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from vast.models.vast_v2 import Delivery
+
+_CHUNK_SIZE = 64 << 10
+
+
+def select_renditions(linear, max_renditions=1, mime_types=None, max_bitrate=None, delivery=Delivery.PROGRESSIVE):
+    """
+
+    :param linear: Linear creative
+    :param max_renditions: max number of media files selected
+    :param mime_types: optional collection of accepted MimeType members
+    :param max_bitrate: optional max accepted bitrate
+    :param delivery: accepted Delivery, None for any
+    :return: list of selected media files, highest bitrate and resolution first
+    """
+    candidates = [
+        m for m in linear.media_files
+        if delivery is None or m.delivery == delivery
+        if mime_types is None or m.type in mime_types
+        if max_bitrate is None or (m.bitrate or m.max_bitrate or 0) <= max_bitrate
+    ]
+    candidates.sort(key=lambda m: (m.bitrate or m.max_bitrate or 0, m.width * m.height), reverse=True)
+    return candidates[:max_renditions]
+
+
+def urllib2_fetch(url, timeout=10):
+    """
+    Default fetcher of wrappers.unwrap
+
+    :param url: to download
+    :param timeout: in seconds
+    :return: content bytes
+    """
+    response = urllib2.urlopen(url, timeout=timeout)
+    try:
+        return response.read()
+    finally:
+        response.close()
+
+
+def urllib2_download(url, fp, timeout=10):
+    """
+    Default fetcher of Prefetcher, streaming the content instead of holding it in memory
+
+    :param url: to download
+    :param fp: binary file to write content to
+    :param timeout: in seconds
+    """
+    response = urllib2.urlopen(url, timeout=timeout)
+    try:
+        shutil.copyfileobj(response, fp, _CHUNK_SIZE)
+    finally:
+        response.close()
+
+
+class _DigestWriter(object):
+    """
+    Writes through to a file, hashing and counting what was written
+    """
+
+    def __init__(self, fp):
+        self._fp = fp
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self._fp.write(data)
+        self._sha256.update(data)
+        self.size += len(data)
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+
+class DiskCache(object):
+    """
+    Content addressed disk cache of downloaded assets, bounded by size.
+
+    Content is stored once by its sha256 digest, however many URLs it was downloaded from.
+    Once over max_bytes, least recently used content is evicted.
+    Safe to use from multiple threads of a process: content is written to a temporary file
+    outside of the lock, which only guards moving it in place and appending to the index.
+
+    The index is a journal of one JSON record per line, a snapshot of all entries
+    followed by the ones put and evicted since, compacted into a new snapshot once long enough.
+    Recency of cache hits is only persisted by compaction.
+    """
+    _INDEX = "index.json"
+    # min number of journal records appended before compacting
+    _COMPACT_AFTER = 1000
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        """
+
+        :param directory: to store content in, created if missing
+        :param max_bytes: max total size of stored content
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # url to digest, digest to its urls, and digest to size in least recently used order
+        self._urls = {}
+        self._digest_urls = {}
+        self._digests = OrderedDict()
+        self._appended = 0
+        self.size = 0
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._load()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def _index_path(self):
+        return os.path.join(self.directory, self._INDEX)
+
+    def _load(self):
+        if not os.path.exists(self._index_path()):
+            return
+        with open(self._index_path(), "r") as fp:
+            urls, digests = self._replay(fp)
+
+        for digest in digests:
+            path = self._path(digest)
+            if os.path.exists(path):
+                self._digests[digest] = os.path.getsize(path)
+        self.size = sum(self._digests.values())
+        for url, digest in urls.items():
+            if digest in self._digests:
+                self._add_url(url, digest)
+        self._compact()
+
+    @staticmethod
+    def _replay(lines):
+        """
+
+        :param lines: of the index journal
+        :return: dict of urls to digests, and OrderedDict of digests in least recently used order
+        """
+        urls = {}
+        digests = OrderedDict()
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # torn last record of a crash while appending
+                continue
+            if "digests" in record:
+                urls = dict(record["urls"])
+                digests = OrderedDict((d, None) for d in record["digests"])
+            elif "evicted" in record:
+                digests.pop(record["evicted"], None)
+            else:
+                digests.pop(record["digest"], None)
+                digests[record["digest"]] = None
+                urls[record["url"]] = record["digest"]
+        return urls, digests
+
+    def _compact(self):
+        index = dict(urls=self._urls, digests=list(self._digests))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "w") as fp:
+            json.dump(index, fp)
+            fp.write("\n")
+        os.rename(tmp_path, self._index_path())
+        self._appended = 0
+
+    def _append(self, records):
+        with open(self._index_path(), "a") as fp:
+            fp.write("".join(json.dumps(r) + "\n" for r in records))
+        self._appended += len(records)
+        if self._appended >= max(self._COMPACT_AFTER, len(self._urls)):
+            self._compact()
+
+    def _add_url(self, url, digest):
+        previous = self._urls.get(url)
+        if previous is not None:
+            self._digest_urls[previous].discard(url)
+        self._urls[url] = digest
+        self._digest_urls.setdefault(digest, set()).add(url)
+
+    def get(self, url):
+        """
+
+        :param url: of the asset
+        :return: local path of the asset content, None if not cached
+        """
+        with self._lock:
+            digest = self._urls.get(url)
+            if digest is None:
+                return None
+            # mark as most recently used
+            self._digests[digest] = self._digests.pop(digest)
+            return self._path(digest)
+
+    def put(self, url, content):
+        """
+
+        :param url: of the asset
+        :param content: bytes downloaded from url
+        :return: local path of the asset content
+        """
+        return self.put_stream(url, lambda fp: fp.write(content))
+
+    def put_stream(self, url, write):
+        """
+
+        :param url: of the asset
+        :param write: function writing the content downloaded from url to the binary file it is given
+        :return: local path of the asset content
+        :raises: whatever write raised, nothing being stored then
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                writer = _DigestWriter(fp)
+                write(writer)
+            digest = writer.hexdigest()
+            path = self._path(digest)
+            with self._lock:
+                if digest in self._digests:
+                    os.remove(tmp_path)
+                else:
+                    os.rename(tmp_path, path)
+                    self.size += writer.size
+                self._digests[digest] = self._digests.pop(digest, writer.size)
+                self._add_url(url, digest)
+                records = [dict(url=url, digest=digest)]
+                self._evict(records)
+                self._append(records)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def _evict(self, records):
+        # the most recently used content is always kept, even if bigger than max_bytes
+        while self.size > self.max_bytes and len(self._digests) > 1:
+            digest, size = self._digests.popitem(last=False)
+            os.remove(self._path(digest))
+            self.size -= size
+            for url in self._digest_urls.pop(digest, ()):
+                del self._urls[url]
+            records.append(dict(evicted=digest))
+
+
+class _Pending(object):
+    def __init__(self):
+        self.done = threading.Event()
+        self.path = None
+        self.error = None
+
+
+class Prefetcher(object):
+    """
+    Downloads assets concurrently into a DiskCache.
+    Concurrent requests for the same URL are coalesced into a single download.
+    """
+
+    def __init__(self, cache, fetcher=urllib2_download, workers=8):
+        """
+
+        :param cache: DiskCache
+        :param fetcher: function of URL and binary file, writing the content downloaded from URL to the file
+        :param workers: max number of concurrent downloads of prefetch
+        """
+        self.cache = cache
+        self.fetcher = fetcher
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def fetch(self, url):
+        """
+
+        :param url: of the asset
+        :return: local path of the asset content
+        :raises: whatever fetcher raised
+        """
+        path = self.cache.get(url)
+        if path is not None:
+            return path
+
+        with self._lock:
+            pending = self._in_flight.get(url)
+            is_owner = pending is None
+            if is_owner:
+                pending = self._in_flight[url] = _Pending()
+
+        if not is_owner:
+            pending.done.wait()
+        else:
+            try:
+                pending.path = self.cache.put_stream(url, lambda fp: self.fetcher(url, fp))
+            except Exception as e:
+                pending.error = e
+            finally:
+                with self._lock:
+                    del self._in_flight[url]
+                pending.done.set()
+
+        if pending.error is not None:
+            raise pending.error
+        return pending.path
+
+    def _fetch_result(self, url):
+        try:
+            return url, self.fetch(url)
+        except Exception as e:
+            return url, e
+
+    def prefetch(self, linears, **select_kwargs):
+        """
+
+        :param linears: iterable of Linear creatives
+        :param select_kwargs: pass on to select_renditions
+        :return: dict of selected asset URLs to their local path, or to the exception fetching them raised
+        """
+        urls = OrderedDict(
+            (media_file.asset, None)
+            for linear in linears
+            for media_file in select_renditions(linear, **select_kwargs)
+        )
+        if not urls:
+            return {}
+
+        pool = ThreadPool(min(self.workers, len(urls)))
+        try:
+            return dict(pool.map(self._fetch_result, list(urls)))
+        finally:
+            pool.close()
+            pool.join()
@@ -0,0 +1,362 @@
+"""
+Path queries over model trees
+
+A path is a dot separated list of steps, each an attribute name or '*' for all attributes,
+optionally followed by a list selector, within which dots are part of the selector:
+ [*] - every item
+ [N] - the item at index N
+ [name=value] - items whose attribute equals value, enum members compare by value or name
+
+    uris = find(vast, "ad.*.creatives[*].linear.tracking_events[tracking_event_type=start].tracking_event_uri")
+
+Missing (None) values are skipped, rather than failing the query.
+Paths are compiled once into a generator function of nested loops, and cached by expression.
+"""
+import re
+
+import attr
+from enum import Enum
+
+from vast.models.caching import LruCache
+
+_STEP = re.compile(r"^(?P<name>\*|[A-Za-z_][A-Za-z0-9_]*)(?:\[(?P<selector>[^\]]*)\])?$")
+_FILTER = re.compile(r"^(?P<name>[A-Za-z_][A-Za-z0-9_]*)\s*=\s*(?P<value>.*)$")
+
+ALL = "*"
+
+_compiled = LruCache(max_size=1024)
+
+
+@attr.s(frozen=True)
+class Step(object):
+    """
+    name: attribute name or ALL
+    selector: None, ALL, an int index, or a (name, value) filter tuple
+    """
+    name = attr.ib()
+    selector = attr.ib(default=None)
+
+
+def parse_path(expr):
+    """
+
+    :param expr: path expression
+    :return: tuple of Step
+    :raises: ValueError if expr is not a valid path
+    """
+    steps = []
+    for part in _split_steps(expr):
+        match = _STEP.match(part.strip())
+        if match is None:
+            raise ValueError("invalid step '%s' in path '%s'" % (part, expr))
+        steps.append(Step(match.group("name"), _parse_selector(match.group("selector"), expr)))
+    return tuple(steps)
+
+
+def _split_steps(expr):
+    """
+    :return: list of the dot separated parts of expr, leaving dots within selectors, such as URIs of filters, alone
+    """
+    parts = []
+    start = 0
+    in_selector = False
+    for i, char in enumerate(expr):
+        if char == "[":
+            in_selector = True
+        elif char == "]":
+            in_selector = False
+        elif char == "." and not in_selector:
+            parts.append(expr[start:i])
+            start = i + 1
+    parts.append(expr[start:])
+    return parts
+
+
+def _parse_selector(selector, expr):
+    if selector is None:
+        return None
+    selector = selector.strip()
+    if selector == ALL:
+        return ALL
+    if re.match(r"^-?\d+$", selector):
+        return int(selector)
+    match = _FILTER.match(selector)
+    if match is None:
+        raise ValueError("invalid selector '[%s]' in path '%s'" % (selector, expr))
+    return match.group("name"), match.group("value").strip()
+
+
+class Query(object):
+    """
+    Compiled path query
+    """
+
+    def __init__(self, expr):
+        self.expr = expr
+        self.steps = parse_path(expr)
+        self._run, self._run_all = _compile(self.steps)
+
+    def find(self, root):
+        """
+
+        :param root: model to query
+        :return: generator of the values at the path
+        """
+        return self._run(root)
+
+    def all(self, root):
+        """
+        Faster than list(find(root))
+
+        :param root: model to query
+        :return: list of the values at the path
+        """
+        return self._run_all(root)
+
+    def first(self, root, default=None):
+        """
+
+        :param root: model to query
+        :param default: returned if nothing is found
+        :return: first value at the path
+        """
+        return next(self.find(root), default)
+
+
+def compile_path(expr):
+    """
+
+    :param expr: path expression
+    :return: Query for expr, cached
+    """
+    query = _compiled.get(expr)
+    if query is None:
+        query = _compiled.put(expr, Query(expr))
+    return query
+
+
+def find(root, expr):
+    """
+
+    :param root: model to query
+    :param expr: path expression
+    :return: generator of the values at the path
+    """
+    return compile_path(expr).find(root)
+
+
+def find_all(root, expr):
+    """
+
+    :param root: model to query
+    :param expr: path expression
+    :return: list of the values at the path
+    """
+    return compile_path(expr).all(root)
+
+
+def _compile(steps):
+    """
+    Generate a generator function of nested loops for steps,
+    and a function of the same loops returning a list, which is about as fast as the equivalent hand written walk
+
+    :return: run and run_all functions
+    """
+    namespace = {"_values": _attribute_values, "_values_of": _attribute_values_of}
+    lines = ["def run(v0):"]
+    var, indent = _compile_steps(steps, "    ", lines, namespace, safe=True)
+    lines.append("%syield %s" % (indent, var))
+
+    # the same loops collecting into a list, without the generator overhead
+    lines.append("def run_all_safe(v0):")
+    lines.append("    result = []")
+    lines.append("    append = result.append")
+    var, indent = _compile_steps(steps, "    ", lines, namespace, safe=True)
+    lines.append("%sappend(%s)" % (indent, var))
+    lines.append("    return result")
+
+    # Attributes are mostly there, so the loops are first run without guarding every attribute access,
+    # and only run once more guarded if one is missing, having had no effect but the list thrown away.
+    lines.append("def run_all(v0):")
+    lines.append("    result = []")
+    lines.append("    append = result.append")
+    lines.append("    try:")
+    var, indent = _compile_steps(steps, "        ", lines, namespace, safe=False)
+    lines.append("%sappend(%s)" % (indent, var))
+    lines.append("    except AttributeError:")
+    lines.append("        return run_all_safe(v0)")
+    lines.append("    return result")
+
+    exec compile("\n".join(lines), "<path query>", "exec") in namespace
+    return namespace["run"], namespace["run_all"]
+
+
+def _compile_steps(steps, indent, lines, namespace, safe):
+    """
+    :param safe: guard attribute accesses, skipping missing attributes as None values
+    :return: variable of the values at the path, and the indent of the innermost loop
+    """
+    var = "v0"
+    i = 0
+    while i < len(steps):
+        step = steps[i]
+        i += 1
+        if step.name == ALL and step.selector is None and i < len(steps) and steps[i].name != ALL:
+            # '*.name' goes straight to the name attribute of the attribute values having one
+            step = steps[i]
+            i += 1
+            var, indent = _compile_all_of(step.name, var, indent, lines)
+        else:
+            var, indent = _compile_name(step.name, var, indent, lines, safe)
+        if step.selector is not None:
+            var, indent = _compile_selector(step.selector, var, indent, lines, namespace, safe)
+    return var, indent
+
+
+def _next_var(var):
+    return "v%d" % (int(var[1:]) + 1)
+
+
+def _compile_name(name, var, indent, lines, safe):
+    new_var = _next_var(var)
+    if name == ALL:
+        lines.append("%sfor %s in _values(%s):" % (indent, new_var, var))
+        return new_var, indent + "    "
+
+    _compile_attribute(new_var, var, name, indent, lines, safe)
+    lines.append("%sif %s is not None:" % (indent, new_var))
+    return new_var, indent + "    "
+
+
+def _compile_attribute(new_var, var, name, indent, lines, safe):
+    if not safe:
+        lines.append("%s%s = %s.%s" % (indent, new_var, var, name))
+        return
+    # plain attribute access is cheaper than getattr with a default, and so is an unraised try
+    lines.append("%stry:" % indent)
+    lines.append("%s    %s = %s.%s" % (indent, new_var, var, name))
+    lines.append("%sexcept AttributeError:" % indent)
+    lines.append("%s    %s = None" % (indent, new_var))
+
+
+def _compile_all_of(name, var, indent, lines):
+    new_var = _next_var(var)
+    lines.append("%sfor %s in _values_of(%s, %r):" % (indent, new_var, var, name))
+    return new_var, indent + "    "
+
+
+def _compile_selector(selector, var, indent, lines, namespace, safe):
+    new_var = _next_var(var)
+    lines.append("%sif %s.__class__ is list or isinstance(%s, tuple):" % (indent, var, var))
+    indent += "    "
+
+    if isinstance(selector, int):
+        if selector < 0:
+            lines.append("%sif -len(%s) <= %d:" % (indent, var, selector))
+        else:
+            lines.append("%sif %d < len(%s):" % (indent, selector, var))
+        lines.append("%s    %s = %s[%d]" % (indent, new_var, var, selector))
+        return new_var, indent + "    "
+
+    lines.append("%sfor %s in %s:" % (indent, new_var, var))
+    indent += "    "
+    if selector == ALL:
+        return new_var, indent
+
+    name, expected = selector
+    value_var = "%s_%s" % (new_var, name)
+    _compile_attribute(value_var, new_var, name, indent, lines, safe)
+    lines.append("%sif %s:" % (indent, _match_expression(value_var, expected, new_var, namespace)))
+    return new_var, indent + "    "
+
+
+def _match_expression(var, expected, symbol, namespace):
+    """
+    :return: source of a condition for var matching the expected text,
+    enum members are compared by identity with the members the text names
+    """
+    conditions = []
+    members = _enum_members(expected)
+    for i, member in enumerate(members):
+        member_symbol = "_%s_member%d" % (symbol, i)
+        namespace[member_symbol] = member
+        conditions.append("%s is %s" % (var, member_symbol))
+    if members:
+        # other members of the same enums can not match, and comparing them to text is slow
+        classes_symbol = "_%s_enums" % symbol
+        namespace[classes_symbol] = frozenset(m.__class__ for m in members)
+        conditions.append("%s.__class__ not in %s and %s == %r" % (var, classes_symbol, var, expected))
+    else:
+        conditions.append("%s == %r" % (var, expected))
+    if expected in ("True", "False"):
+        conditions.append("%s is %s" % (var, expected))
+    elif re.match(r"^-?\d+$", expected):
+        conditions.append("%s == %d" % (var, int(expected)))
+    return " or ".join(conditions)
+
+
+def matches(value, text):
+    """
+    Same as a [name=text] filter of a path, done once rather than compiled
+
+    :param value: attribute value
+    :param text: expected text
+    :return: True if value matches text
+    """
+    if isinstance(value, Enum):
+        return value.value == text or value.name == text
+    if value == text:
+        return True
+    if text in ("True", "False"):
+        return value is (text == "True")
+    return re.match(r"^-?\d+$", text) is not None and value == int(text)
+
+
+def _enum_members(text):
+    """
+    :return: list of members of all Enum classes, whose value or name is text
+    """
+    members = []
+    classes = list(Enum.__subclasses__())
+    while classes:
+        cls = classes.pop()
+        classes.extend(cls.__subclasses__())
+        members.extend(m for m in cls if m.value == text or m.name == text)
+    return members
+
+
+_attribute_names = {}
+
+
+def _names(cls):
+    names = _attribute_names.get(cls)
+    if names is None:
+        names = _attribute_names[cls] = tuple(a.name for a in attr.fields(cls)) if attr.has(cls) else ()
+    return names
+
+
+def _attribute_values(node):
+    """
+
+    :return: list of the not None attribute values of a model, empty list for anything else
+    """
+    values = []
+    for name in _names(node.__class__):
+        value = getattr(node, name)
+        if value is not None:
+            values.append(value)
+    return values
+
+
+def _attribute_values_of(node, name):
+    """
+
+    :return: list of the not None name attribute values of the attribute values of a model
+    """
+    values = []
+    for value in _attribute_values(node):
+        if name in _names(value.__class__):
+            value = getattr(value, name)
+            if value is not None:
+                values.append(value)
+    return values
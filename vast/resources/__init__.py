@@ -3,6 +3,7 @@ from os import path
 THIS_DIR = path.dirname(__file__)
 
 SIMPLE_WRAPPER_XML = path.join(THIS_DIR, "simple_wrapper_v2.xml")
+WRAPPER_WITH_TRACKING_EVENTS_XML = path.join(THIS_DIR, "wrapper_with_tracking_events_v2.xml")
 SIMPLE_INLINE_XML = path.join(THIS_DIR, "simple_inline_v2.xml")
 INLINE_MULTI_FILES_XML = path.join(THIS_DIR, "inline_multi_media_files_v2.xml")
 INLINE_WITH_TRACKING_EVENTS_XML = path.join(THIS_DIR, "inline_with_tracking_events_v2.xml")
@@ -0,0 +1,364 @@
+"""
+Streaming rewrites of VAST XML
+
+An ad proxy mostly needs small edits of a response, such as replacing media file URIs,
+or injecting impressions and tracking events. A Rewriter does these on the expat events of the input,
+without making models, and copies everything it does not touch through as the raw input bytes:
+
+    rules = Rules()
+    rules.replace_text("Ad/InLine/Creatives/Creative/Linear/MediaFiles/MediaFile", to_cdn)
+    rules.append("Ad/InLine", u"<Impression><![CDATA[https://proxy.example.com/imp]]></Impression>")
+    output = rewrite(xml_bytes, rules)
+
+Output is written as soon as the input it comes from is parsed,
+so memory use and latency do not grow with the document size.
+
+Rule paths are element names separated by '/', relative to the VAST root element,
+where '*' matches any single element and '**' any number of elements.
+"""
+import re
+from collections import OrderedDict
+from xml.parsers import expat
+from xml.sax.saxutils import escape, quoteattr
+
+from vast.errors import RewriteError
+from vast.parsers import inputs
+from vast.parsers.xml_parser import FeedParser
+
+ANY = "*"
+ANY_DEPTH = "**"
+
+# a start tag, where attribute values may have '>' in them
+_START_TAG = re.compile(br"<[^'\">]*(?:(?:\"[^\"]*\"|'[^']*')[^'\">]*)*>")
+
+
+class _Actions(object):
+    def __init__(self):
+        self.text_fns = []
+        self.attribute_fns = []
+        self.fragments = []
+
+    def extend(self, other):
+        self.text_fns.extend(other.text_fns)
+        self.attribute_fns.extend(other.attribute_fns)
+        self.fragments.extend(other.fragments)
+
+
+class Rules(object):
+    """
+    Rewrite rules by element path.
+    All rules matching an element apply, in the order they were added.
+    """
+
+    def __init__(self):
+        self._rules = []
+        self._matches = {}
+
+    def _add(self, path):
+        actions = _Actions()
+        self._rules.append((tuple(p for p in path.split("/") if p), actions))
+        self._matches.clear()
+        return actions
+
+    def replace_text(self, path, fn):
+        """
+
+        :param path: of text only elements
+        :param fn: function from the current text to the new one, both unicode
+        :return: self
+        """
+        self._add(path).text_fns.append(fn)
+        return self
+
+    def set_attributes(self, path, fn):
+        """
+
+        :param path: of elements
+        :param fn: function from an OrderedDict of the current attributes to a dict of the new ones
+        :return: self
+        """
+        self._add(path).attribute_fns.append(fn)
+        return self
+
+    def append(self, path, fragment):
+        """
+
+        :param path: of elements
+        :param fragment: XML appended as the last children of the elements,
+        or function from the element attributes to such XML
+        :return: self
+        """
+        self._add(path).fragments.append(fragment)
+        return self
+
+    def match(self, path):
+        """
+
+        :param path: tuple of element names below the root element
+        :return: _Actions of all rules matching path, None if no rule does
+        """
+        try:
+            return self._matches[path]
+        except KeyError:
+            pass
+        actions = None
+        for pattern, rule_actions in self._rules:
+            if _matches(pattern, path):
+                if actions is None:
+                    actions = _Actions()
+                actions.extend(rule_actions)
+        self._matches[path] = actions
+        return actions
+
+
+def _matches(pattern, path):
+    if not pattern:
+        return not path
+    head = pattern[0]
+    if head == ANY_DEPTH:
+        return any(_matches(pattern[1:], path[i:]) for i in xrange(len(path) + 1))
+    if not path or (head != ANY and head != path[0]):
+        return False
+    return _matches(pattern[1:], path[1:])
+
+
+class _Frame(object):
+    def __init__(self, name, attributes, actions, tag_end, is_empty, expanded):
+        self.name = name
+        self.attributes = attributes
+        self.actions = actions
+        self.tag_end = tag_end
+        self.is_empty = is_empty
+        # an empty element tag which was written as a start tag, and needs an end tag
+        self.expanded = expanded
+        self.texts = [] if actions is not None and actions.text_fns else None
+        self.is_cdata = False
+
+
+class Rewriter(object):
+    """
+    Incremental rewriter, fed with the input as it is received, writing output as it goes:
+
+        rewriter = Rewriter(rules, output.write)
+        for chunk in chunks:
+            rewriter.feed(chunk)
+        rewriter.close()
+    """
+
+    def __init__(self, rules, write, validate=False, **parser_kwargs):
+        """
+
+        :param rules: Rules
+        :param write: function called with each chunk of output bytes
+        :param validate: parse the output into models as well, for close to return
+        :param parser_kwargs: pass on to the FeedParser validating the output
+        """
+        self.rules = rules
+        self._output = write
+        self._validator = FeedParser(**parser_kwargs) if validate else None
+
+        # made by the first chunk, which tells whether the input is unicode
+        self._parser = None
+        self._is_unicode = None
+        self._encoding = "utf-8"
+
+        # input bytes from document index _base on, of which the ones before _emitted were handled
+        self._buffer = bytearray()
+        self._base = 0
+        self._emitted = 0
+        self._last_event = 0
+        self._path = None
+        self._stack = []
+        self._closed = False
+
+    def _write(self, data):
+        if self._validator is not None:
+            self._validator.feed(data)
+        self._output(data)
+
+    def feed(self, chunk):
+        """
+
+        :param chunk: next chunk of the document, str or unicode like the other chunks,
+        unicode being written out encoded to utf-8
+        :raises: ExpatError if the document is not well formed, RewriteError if a rule cannot be applied
+        """
+        if self._closed:
+            raise RewriteError("cannot feed a closed rewriter")
+        is_unicode = isinstance(chunk, unicode)
+        if self._parser is None:
+            self._make_parser(is_unicode)
+        elif is_unicode != self._is_unicode:
+            raise RewriteError("cannot feed both str and unicode chunks of a document")
+        if is_unicode:
+            chunk = chunk.encode("utf-8")
+        self._buffer.extend(chunk)
+        self._parser.Parse(chunk, False)
+        self._flush()
+
+    def close(self):
+        """
+        Signal the end of the document, writing the rest of the output
+
+        :return: Vast object of the output if validating, None otherwise
+        """
+        if self._closed:
+            raise RewriteError("rewriter is already closed")
+        self._closed = True
+        if self._parser is None:
+            self._make_parser(False)
+        self._parser.Parse(b"", True)
+        self._copy_to(self._base + len(self._buffer))
+        if self._validator is not None:
+            return self._validator.close()
+        return None
+
+    def _make_parser(self, is_unicode):
+        # unicode is fed encoded to utf-8, whatever encoding the document declares
+        self._parser = expat.ParserCreate("utf-8" if is_unicode else None)
+        self._parser.ordered_attributes = True
+        self._parser.XmlDeclHandler = self._xml_decl
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CharacterDataHandler = self._characters
+        self._parser.StartCdataSectionHandler = self._start_cdata
+        self._parser.buffer_text = True
+        self._is_unicode = is_unicode
+
+    def _flush(self):
+        # everything before the last event is parsed and no rule can change it any more
+        if not self._is_collecting_text() and self._last_event > self._emitted:
+            self._copy_to(self._last_event)
+        del self._buffer[:self._emitted - self._base]
+        self._base = self._emitted
+
+    def _is_collecting_text(self):
+        return bool(self._stack) and self._stack[-1].texts is not None
+
+    def _copy_to(self, index):
+        if index > self._emitted:
+            self._write(bytes(self._buffer[self._emitted - self._base:index - self._base]))
+        self._emitted = index
+
+    def _encode(self, text):
+        return text.encode(self._encoding, "xmlcharrefreplace")
+
+    def _xml_decl(self, version, encoding, standalone):
+        if not self._is_unicode:
+            if encoding:
+                self._encoding = encoding
+            return
+        if encoding:
+            # the output of unicode input is utf-8, so has to declare it whatever the input declared
+            index = self._parser.CurrentByteIndex
+            decl_end = self._buffer.index(b"?>", index - self._base) + self._base + 2
+            self._copy_to(index)
+            self._write(_xml_declaration(version, "utf-8", standalone))
+            self._emitted = decl_end
+
+    def _start_element(self, name, attributes):
+        index = self._last_event = self._parser.CurrentByteIndex
+        if self._is_collecting_text():
+            raise RewriteError("cannot replace the text of element %s, it has child elements" % self._stack[-1].name)
+
+        self._path = () if self._path is None else self._path + (name,)
+        actions = self.rules.match(self._path)
+        match = _START_TAG.match(self._buffer, index - self._base)
+        tag_end = match.end() + self._base
+        is_empty = self._buffer[tag_end - self._base - 2] == ord("/")
+        expanded = False
+
+        if actions is not None:
+            expanded = is_empty and bool(actions.text_fns or actions.fragments)
+            if actions.attribute_fns or actions.fragments or expanded:
+                attributes = OrderedDict(zip(attributes[::2], attributes[1::2]))
+            for fn in actions.attribute_fns:
+                attributes = fn(attributes)
+            if actions.attribute_fns or expanded:
+                self._copy_to(index)
+                self._write(self._encode(_start_tag(name, attributes, is_empty and not expanded)))
+                self._emitted = tag_end
+        self._stack.append(_Frame(name, attributes, actions, tag_end, is_empty, expanded))
+
+    def _end_element(self, name):
+        frame = self._stack.pop()
+        self._path = self._path[:-1] if self._path else None
+        if frame.is_empty:
+            end_tag_start = end_tag_end = frame.tag_end
+        else:
+            end_tag_start = self._last_event = self._parser.CurrentByteIndex
+            end_tag_end = self._buffer.index(b">", end_tag_start - self._base) + self._base + 1
+
+        actions = frame.actions
+        if actions is None:
+            return
+
+        if frame.texts is not None:
+            text = u"".join(frame.texts)
+            for fn in actions.text_fns:
+                text = fn(text)
+            self._copy_to(frame.tag_end)
+            self._write(self._encode(_cdata(text) if frame.is_cdata else escape(text)))
+            # the original text is dropped
+            self._emitted = end_tag_start
+
+        if actions.fragments:
+            self._copy_to(end_tag_start)
+            for fragment in actions.fragments:
+                if callable(fragment):
+                    fragment = fragment(frame.attributes)
+                self._write(self._encode(fragment) if isinstance(fragment, unicode) else fragment)
+
+        if frame.expanded:
+            self._write(self._encode(u"</%s>" % name))
+            self._emitted = end_tag_end
+
+    def _characters(self, data):
+        self._last_event = self._parser.CurrentByteIndex
+        if self._is_collecting_text():
+            self._stack[-1].texts.append(data)
+
+    def _start_cdata(self):
+        if self._is_collecting_text():
+            self._stack[-1].is_cdata = True
+
+
+def _xml_declaration(version, encoding, standalone):
+    # standalone is -1 when not declared
+    standalone = {0: b' standalone="no"', 1: b' standalone="yes"'}.get(standalone, b"")
+    return b'<?xml version="%s" encoding="%s"%s?>' % (version.encode("ascii"), encoding, standalone)
+
+
+def _start_tag(name, attributes, is_empty):
+    parts = [u"<", name]
+    for key, value in attributes.items():
+        parts.append(u" %s=%s" % (key, quoteattr(value)))
+    parts.append(u"/>" if is_empty else u">")
+    return u"".join(parts)
+
+
+def _cdata(text):
+    return u"<![CDATA[%s]]>" % text.replace(u"]]>", u"]]]]><![CDATA[>")
+
+
+def rewrite(xml_input, rules, validate=False, chunk_size=inputs.CHUNK_SIZE, **parser_kwargs):
+    """
+
+    :param xml_input: str, unicode or object with a read(size) method
+    :param rules: Rules
+    :param validate: parse the output into models as well
+    :param chunk_size: max bytes read at a time from a file like xml_input
+    :param parser_kwargs: pass on to the FeedParser validating the output
+    :return: rewritten XML bytes, and the Vast object of it if validating
+    """
+    output = []
+    rewriter = Rewriter(rules, output.append, validate=validate, **parser_kwargs)
+    if hasattr(xml_input, "read"):
+        for chunk in iter(lambda: xml_input.read(chunk_size), b""):
+            rewriter.feed(chunk)
+    else:
+        rewriter.feed(xml_input)
+    vast = rewriter.close()
+    if validate:
+        return b"".join(output), vast
+    return b"".join(output)
@@ -0,0 +1,249 @@
+"""
+vast-serve: VAST parsing over HTTP, for services that are not written in python
+
+Endpoints
+ * POST /parse - body is a VAST XML, responds with {"vast": {...}},
+   or with status 422 and {"error": ..., "message": ...} if it is not valid
+ * POST /validate - same, responding with {"valid": true} rather than the parsed model
+ * GET /metrics - throughput, latency percentiles, in flight and rejected request counts
+ * GET /health
+
+Documents are parsed on a pool of worker processes.
+The number of documents in flight is bounded, requests over the bound are rejected at once with status 503,
+rather than queued for longer than their clients would wait.
+Connections are kept alive between requests (HTTP/1.1).
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from multiprocessing import Pool, TimeoutError
+
+from vast.metrics import Throughput
+from vast.models.shared import to_primitive
+from vast.parsers import xml_parser
+
+PARSE = "/parse"
+VALIDATE = "/validate"
+METRICS = "/metrics"
+HEALTH = "/health"
+
+
+def parse_document(xml, validate_only=False):
+    """
+    Parse a single document, runs in worker processes
+
+    :param xml: document bytes
+    :param validate_only: leave the parsed model out of the response
+    :return: (ok, latency in seconds, response dict) tuple
+    """
+    start = time.time()
+    try:
+        vast = xml_parser.from_xml_bytes(xml)
+    except Exception as e:
+        return False, time.time() - start, dict(error=e.__class__.__name__, message=unicode(e))
+
+    latency = time.time() - start
+    if validate_only:
+        return True, latency, dict(valid=True)
+    return True, latency, dict(vast=to_primitive(vast))
+
+
+class VastService(object):
+    """
+    Request handling, apart from HTTP
+    """
+
+    def __init__(self, workers=1, max_in_flight=64, timeout=10.0, max_body=4 << 20):
+        """
+
+        :param workers: number of worker processes, 0 parses in the request threads
+        :param max_in_flight: max number of documents being parsed or waiting for a worker
+        :param timeout: seconds to wait for a worker to parse a document
+        :param max_body: max document size in bytes
+        """
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.max_body = max_body
+        self.throughput = Throughput()
+        self._pool = Pool(workers) if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+
+    def metrics(self):
+        """
+
+        :return: dict of metrics
+        """
+        metrics = self.throughput.as_dict()
+        metrics.update(in_flight=self.in_flight, rejected=self.rejected, max_in_flight=self.max_in_flight)
+        return metrics
+
+    def parse(self, xml, validate_only=False):
+        """
+
+        :param xml: document bytes
+        :param validate_only: leave the parsed model out of the response
+        :return: (HTTP status, response dict) tuple
+        """
+        if not self._slots.acquire(False):
+            with self._lock:
+                self.rejected += 1
+            return 503, dict(error="Overloaded", message="too many documents in flight")
+
+        with self._lock:
+            self.in_flight += 1
+        if self._pool is None:
+            try:
+                ok, latency, response = parse_document(xml, validate_only)
+            finally:
+                self._release()
+        else:
+            # the slot is held until the worker is done, rather than until the request times out,
+            # so documents timed out on still count against max_in_flight while queued or parsed
+            result = self._pool.apply_async(parse_document, (xml, validate_only), callback=self._release)
+            try:
+                # get with a timeout, as without one it cannot be interrupted
+                ok, latency, response = result.get(self.timeout)
+            except TimeoutError:
+                return 504, dict(error="Timeout", message="document was not parsed within %s seconds" % self.timeout)
+            except Exception:
+                # the task failed, and the callback is only called on success
+                self._release()
+                raise
+
+        self.throughput.record(latency, ok)
+        return (200 if ok else 422), response
+
+    def _release(self, result=None):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # responses are written out in one go, when the request is handled, with no delay from Nagle
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        service = self.server.service
+        if self.path == METRICS:
+            self._respond(200, service.metrics())
+        elif self.path == HEALTH:
+            self._respond(200, dict(status="ok"))
+        else:
+            self._respond(404, dict(error="NotFound", message=self.path))
+
+    def do_POST(self):
+        service = self.server.service
+        length = self._content_length()
+        if length is None:
+            return
+        if length > service.max_body:
+            # the body is not read, so the connection cannot be used for another request
+            self.close_connection = 1
+            self._respond(413, dict(error="TooLarge", message="document is over %d bytes" % service.max_body))
+            return
+
+        body = self.rfile.read(length)
+        if self.path == PARSE:
+            self._respond(*service.parse(body))
+        elif self.path == VALIDATE:
+            self._respond(*service.parse(body, validate_only=True))
+        else:
+            self._respond(404, dict(error="NotFound", message=self.path))
+
+    def _content_length(self):
+        """
+
+        :return: length of the request body, None if it cannot be told, having responded with an error
+        """
+        if self.headers.getheader("transfer-encoding") is not None:
+            status, message = 411, "chunked request bodies are not supported, a content length is required"
+        else:
+            length = self.headers.getheader("content-length")
+            if length is None:
+                status, message = 411, "a content length is required"
+            elif not length.strip().isdigit():
+                status, message = 400, "content length must be a non negative integer but was %r" % length
+            else:
+                return int(length)
+        # the body is not read, so the connection cannot be used for another request
+        self.close_connection = 1
+        self._respond(status, dict(error="BadRequest" if status == 400 else "LengthRequired", message=message))
+        return None
+
+    def _respond(self, status, response):
+        body = json.dumps(response)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # request logging would be the bottleneck, /metrics is there instead
+        pass
+
+
+class ServiceServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, service):
+        """
+
+        :param address: (host, port) tuple, port 0 binds any free port
+        :param service: VastService
+        """
+        HTTPServer.__init__(self, address, _RequestHandler)
+        self.service = service
+
+
+def _make_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="vast-serve",
+        description="Serve VAST parsing over HTTP",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("-p", "--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="number of worker processes")
+    parser.add_argument("--max-in-flight", type=int, default=64, help="documents in flight before rejecting")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds to wait for a worker")
+    return parser
+
+
+def main(argv=None):
+    args = _make_arg_parser().parse_args(argv)
+
+    service = VastService(workers=args.workers, max_in_flight=args.max_in_flight, timeout=args.timeout)
+    server = ServiceServer((args.host, args.port), service)
+    sys.stderr.write("serving on %s:%d\n" % server.server_address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Matching companion and non linear ads to the slots of a page or player
+
+A SlotIndex is built once per creative (or pod of creatives),
+after which finding the best fitting ad for a slot does not go through all of the ads:
+
+    index = SlotIndex.from_creatives(vast.ad.inline.creatives)
+    companion_ad = index.best_fit(300, 250, accept=(STATIC, HTML))
+"""
+from bisect import bisect_right
+from collections import defaultdict
+
+STATIC = "static"
+IFRAME = "iframe"
+HTML = "html"
+
+RESOURCE_TYPES = (STATIC, IFRAME, HTML)
+
+
+def resource_types(ad):
+    """
+
+    :param ad: CompanionAd or NonLinearAd
+    :return: frozenset of the resource types ad provides
+    """
+    types = []
+    if ad.static_resource is not None:
+        types.append(STATIC)
+    if ad.iframe_resource is not None:
+        types.append(IFRAME)
+    if ad.html_resource is not None:
+        types.append(HTML)
+    return frozenset(types)
+
+
+class _FitIndex(object):
+    """
+    Merge sort tree of ads sorted by width, where each node keeps the heights of its ads sorted,
+    along with the running max of their areas.
+    Finds the largest area of the ads fitting into a slot in O(log(n) ** 2):
+    the ads not wider than the slot are a prefix of the widths, covered by O(log(n)) nodes,
+    and the ads of a node not higher than the slot are a prefix of its heights.
+    """
+
+    def __init__(self, entries):
+        """
+
+        :param entries: iterable of (area, position, ad, resource types) tuples
+        """
+        entries = sorted(entries, key=lambda e: e[2].width)
+        n = self._size = len(entries)
+        self._widths = [e[2].width for e in entries]
+        # nodes of an implicit binary tree, the leaves at n to 2n - 1 and the parents of i at i // 2
+        nodes = [None] * (2 * n)
+        for i, entry in enumerate(entries):
+            nodes[n + i] = [(entry[2].height, entry[0])]
+        for i in xrange(n - 1, 0, -1):
+            nodes[i] = sorted(nodes[2 * i] + nodes[2 * i + 1])
+        self._heights = [None] * (2 * n)
+        self._max_areas = [None] * (2 * n)
+        for i in xrange(1, 2 * n):
+            self._heights[i] = [h for h, _ in nodes[i]]
+            max_areas = self._max_areas[i] = []
+            max_area = -1
+            for _, area in nodes[i]:
+                max_area = max(max_area, area)
+                max_areas.append(max_area)
+
+    def max_area(self, width, height):
+        """
+
+        :param width: of the slot
+        :param height: of the slot
+        :return: largest area of the ads fitting into the slot, -1 if none does
+        """
+        heights = self._heights
+        max_areas = self._max_areas
+        best = -1
+        low = self._size
+        high = self._size + bisect_right(self._widths, width)
+        while low < high:
+            if low & 1:
+                i = bisect_right(heights[low], height)
+                if i and max_areas[low][i - 1] > best:
+                    best = max_areas[low][i - 1]
+                low += 1
+            if high & 1:
+                high -= 1
+                i = bisect_right(heights[high], height)
+                if i and max_areas[high][i - 1] > best:
+                    best = max_areas[high][i - 1]
+            low >>= 1
+            high >>= 1
+        return best
+
+
+class SlotIndex(object):
+    """
+    Index of ads by size.
+
+    Ads are grouped by exact size and by area, and indexed by width and height per accepted resource types,
+    for finding the largest ad fitting in a slot in O(log(n) ** 2), plus the ads of that very area.
+    The index of a set of accepted resource types is built on its first use.
+    An ad with expanded sizes is indexed by its collapsed size, which is what goes into the slot.
+    """
+
+    def __init__(self, ads):
+        """
+
+        :param ads: iterable of CompanionAd or NonLinearAd
+        """
+        self._by_size = defaultdict(list)
+        self._by_area = defaultdict(list)
+        entries = []
+        for position, ad in enumerate(ads):
+            entry = (ad.width * ad.height, position, ad, resource_types(ad))
+            self._by_size[(ad.width, ad.height)].append(entry)
+            self._by_area[entry[0]].append(entry)
+            entries.append(entry)
+        self._entries = entries
+        # accepted resource types to _FitIndex
+        self._fits = {}
+
+    @classmethod
+    def from_creatives(cls, creatives, companions=True, non_linears=False):
+        """
+
+        :param creatives: iterable of Creative, such as the creatives of an ad or of a whole pod
+        :param companions: index the companion ads of the creatives
+        :param non_linears: index the non linear ads of the creatives
+        :return: SlotIndex
+        """
+        ads = []
+        for creative in creatives:
+            if companions and creative.companion is not None:
+                ads.extend(creative.companion.companion_ads or ())
+            if non_linears and creative.non_linear is not None:
+                ads.extend(creative.non_linear.non_linear_ads or ())
+        return cls(ads)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def exact(self, width, height, accept=RESOURCE_TYPES):
+        """
+
+        :param width: of the slot
+        :param height: of the slot
+        :param accept: resource types the slot can display
+        :return: list of ads of exactly the slot size, in original order
+        """
+        accept = frozenset(accept)
+        return [e[2] for e in self._by_size.get((width, height), ()) if e[3] & accept]
+
+    def best_fit(self, width, height, accept=RESOURCE_TYPES):
+        """
+        An exact size match if there is one,
+        otherwise the ad with the largest area fitting into the slot,
+        where ties are broken by the closest aspect ratio to the slot, then by original order.
+
+        :param width: of the slot
+        :param height: of the slot
+        :param accept: resource types the slot can display
+        :return: best fitting ad, None if no ad fits
+        """
+        accept = frozenset(accept)
+        for entry in self._by_size.get((width, height), ()):
+            if entry[3] & accept:
+                return entry[2]
+
+        fits = self._fits.get(accept)
+        if fits is None:
+            fits = self._fits[accept] = _FitIndex(e for e in self._entries if e[3] & accept)
+        area = fits.max_area(width, height)
+        if area < 0:
+            return None
+
+        slot_ratio = float(width) / height if height else 0.0
+        best = None
+        best_key = None
+        for _, position, ad, types in self._by_area[area]:
+            if ad.width > width or ad.height > height or not types & accept:
+                continue
+            key = (-abs(float(ad.width) / ad.height - slot_ratio) if ad.height else 0.0, -position)
+            if best is None or key > best_key:
+                best, best_key = ad, key
+        return best
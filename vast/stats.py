@@ -0,0 +1,364 @@
+"""
+Streaming statistics over corpora of VAST documents, in constant memory
+
+Distributions over millions of responses are kept in summaries of a fixed size, rather than lists of values:
+ * Histogram - counts of values within fixed bucket bounds, such as bitrates
+ * HeavyHitters - approximate counts of the most frequent values, such as ad systems and error types
+ * QuantileSketch - quantiles of values within a relative accuracy, such as durations
+
+Each is fed values one at a time, and merges with another of the same parameters,
+so that worker processes summarize their share of a corpus, and the summaries are merged into one:
+
+    stats = CorpusStats()
+    for vast in vasts:
+        stats.add(vast)
+    ...
+    total = reduce(CorpusStats.merge, pool.map(summarize, shards), CorpusStats())
+    print json.dumps(total.as_dict())
+
+They are fed projection results just as well:
+
+    durations = QuantileSketch()
+    durations.add_all(find(vast, "ad.inline.creatives[*].linear.duration"))
+"""
+import bisect
+import math
+from collections import defaultdict
+from operator import itemgetter
+
+from enum import Enum
+
+# bitrates in kbps
+BITRATE_BOUNDS = (250, 500, 750, 1000, 1500, 2000, 3000, 5000, 8000)
+WRAPPER_DEPTH_BOUNDS = (1, 2, 3, 4, 5)
+
+
+class Histogram(object):
+    """
+    Counts of values within fixed buckets, bucket i holding values in [bounds[i - 1], bounds[i])
+    """
+
+    def __init__(self, bounds):
+        """
+
+        :param bounds: increasing values, between len(bounds) + 1 buckets
+        """
+        self.bounds = tuple(bounds)
+        if list(self.bounds) != sorted(set(self.bounds)):
+            raise ValueError("bounds must be increasing but were %s" % (self.bounds, ))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+
+    def add(self, value, count=1):
+        self.counts[bisect.bisect_right(self.bounds, value)] += count
+        self.count += count
+
+    def add_all(self, values):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """
+        Add the counts of other, of the same bounds
+
+        :return: self
+        """
+        if other.bounds != self.bounds:
+            raise ValueError("histograms of bounds %s and %s do not merge" % (self.bounds, other.bounds))
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        return self
+
+    def buckets(self):
+        """
+
+        :return: list of (low, high, count) tuples, with None for the open ends
+        """
+        lows = (None, ) + self.bounds
+        highs = self.bounds + (None, )
+        return zip(lows, highs, self.counts)
+
+    def as_dict(self):
+        return dict(count=self.count, buckets=[
+            dict(low=low, high=high, count=count) for low, high, count in self.buckets()
+        ])
+
+
+class HeavyHitters(object):
+    """
+    Approximate counts of the most frequent values, by the Misra-Gries summary.
+
+    Holds at most 2 * capacity counters. A counted value is under counted by no more than error(),
+    which is at most count / (capacity + 1), so any value of a larger count is sure to be held.
+    """
+
+    def __init__(self, capacity=100):
+        """
+
+        :param capacity: number of values counted
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be positive but was %s" % capacity)
+        self.capacity = capacity
+        self.count = 0
+        self._counts = defaultdict(int)
+        self._error = 0
+
+    def add(self, value, count=1):
+        """
+
+        :param value: hashable
+        """
+        counts = self._counts
+        counts[value] += count
+        self.count += count
+        # compressed by the batch, for an amortized constant cost per value
+        if len(counts) > 2 * self.capacity:
+            self._compress()
+
+    def add_all(self, values):
+        for value in values:
+            self.add(value)
+
+    def _compress(self):
+        # subtracting the count of the first value past capacity leaves no more than capacity values
+        counts = self._counts
+        if len(counts) <= self.capacity:
+            return
+        cut = sorted(counts.itervalues(), reverse=True)[self.capacity]
+        self._counts = defaultdict(int, ((v, c - cut) for v, c in counts.iteritems() if c > cut))
+        self._error += cut
+
+    def merge(self, other):
+        """
+        Add the counts of other
+
+        :return: self
+        """
+        counts = self._counts
+        for value, count in other._counts.iteritems():
+            counts[value] += count
+        self.count += other.count
+        self._error += other._error
+        self._compress()
+        return self
+
+    def error(self):
+        """
+
+        :return: max number of occurrences any count is short of
+        """
+        return self._error
+
+    def top(self, n=None):
+        """
+
+        :param n: number of values, None for all which are counted
+        :return: list of (value, count) tuples, most frequent first, of at most capacity values
+        """
+        self._compress()
+        top = sorted(self._counts.iteritems(), key=itemgetter(1), reverse=True)
+        return top[:self.capacity if n is None else min(n, self.capacity)]
+
+    def as_dict(self, n=None):
+        return dict(count=self.count, error=self._error, top=[
+            dict(value=_primitive(value), count=count) for value, count in self.top(n)
+        ])
+
+
+class QuantileSketch(object):
+    """
+    Quantiles of non negative values, within a relative accuracy, by logarithmic buckets as in DDSketch.
+
+    A value v is counted in bucket ceil(log(v) / log(gamma)), where gamma = (1 + accuracy) / (1 - accuracy),
+    all of whose values are within accuracy of the bucket estimate. Values at most min_value are counted as 0.
+    Past max_buckets, the lowest buckets are collapsed into one, for low quantiles to lose accuracy first.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048, min_value=1e-9):
+        """
+
+        :param relative_accuracy: in range (0, 1)
+        :param max_buckets: max number of buckets held
+        :param min_value: values up to which are counted as 0
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative accuracy must be in range (0, 1) but was %s" % relative_accuracy)
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.min_value = min_value
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.count = 0
+        self.zero_count = 0
+        self.min = None
+        self.max = None
+        self._buckets = defaultdict(int)
+
+    def _parameters(self):
+        return self.relative_accuracy, self.max_buckets, self.min_value
+
+    def add(self, value, count=1):
+        if value < 0:
+            raise ValueError("value must be non negative but was %s" % value)
+        if value <= self.min_value:
+            self.zero_count += count
+        else:
+            buckets = self._buckets
+            buckets[int(math.ceil(math.log(value) / self._log_gamma))] += count
+            if len(buckets) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def add_all(self, values):
+        for value in values:
+            self.add(value)
+
+    def _collapse(self):
+        buckets = self._buckets
+        indexes = sorted(buckets)
+        excess = len(indexes) - self.max_buckets
+        if excess <= 0:
+            return
+        into = indexes[excess]
+        for index in indexes[:excess]:
+            buckets[into] += buckets.pop(index)
+
+    def merge(self, other):
+        """
+        Add the values of other, of the same parameters
+
+        :return: self
+        """
+        if other._parameters() != self._parameters():
+            raise ValueError("sketches of parameters %s and %s do not merge" % (
+                self._parameters(), other._parameters()))
+        buckets = self._buckets
+        for index, count in other._buckets.iteritems():
+            buckets[index] += count
+        self._collapse()
+        self.count += other.count
+        self.zero_count += other.zero_count
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+        return self
+
+    def quantiles(self, qs=(0.5, 0.95, 0.99)):
+        """
+
+        :param qs: quantiles in range [0, 1]
+        :return: list of values for qs, None if nothing was added
+        """
+        if not self.count:
+            return [None for _ in qs]
+        # ranks are found in a single pass over the buckets, in increasing order
+        ranks = sorted((q * (self.count - 1), i) for i, q in enumerate(qs))
+        values = [None] * len(qs)
+        buckets = iter(sorted(self._buckets.iteritems()))
+        seen = self.zero_count
+        value = 0.0
+        for rank, i in ranks:
+            while seen <= rank:
+                index, count = next(buckets)
+                seen += count
+                value = 2 * self.gamma ** index / (self.gamma + 1)
+            # the estimate of a bucket may be past the values in it
+            values[i] = min(max(value, self.min), self.max)
+        return values
+
+    def quantile(self, q):
+        return self.quantiles((q, ))[0]
+
+    def as_dict(self, qs=(0.5, 0.95, 0.99)):
+        d = dict(count=self.count, min=self.min, max=self.max)
+        for q, value in zip(qs, self.quantiles(qs)):
+            d["p%g" % (q * 100)] = value
+        return d
+
+
+class CorpusStats(object):
+    """
+    Supply quality statistics of a corpus of VAST documents
+    """
+
+    def __init__(self, capacity=100, relative_accuracy=0.01):
+        """
+
+        :param capacity: number of most frequent values counted, of each kind
+        :param relative_accuracy: of duration quantiles
+        """
+        self.documents = 0
+        self.mime_types = HeavyHitters(capacity)
+        self.bitrates = Histogram(BITRATE_BOUNDS)
+        self.durations = QuantileSketch(relative_accuracy)
+        self.wrapper_depths = Histogram(WRAPPER_DEPTH_BOUNDS)
+        self.ad_systems = HeavyHitters(capacity)
+        self.errors = HeavyHitters(capacity)
+
+    def add(self, vast, wrapper_depth=None):
+        """
+
+        :param vast: Vast object
+        :param wrapper_depth: number of wrappers resolved to reach vast, None if not known
+        """
+        self.documents += 1
+        if wrapper_depth is not None:
+            self.wrapper_depths.add(wrapper_depth)
+        ad = vast.ad
+        body = ad.inline if ad.inline is not None else ad.wrapper
+        if body.ad_system is not None:
+            self.ad_systems.add(body.ad_system)
+        for creative in body.creatives or ():
+            linear = creative.linear
+            if linear is None:
+                continue
+            if linear.duration is not None:
+                self.durations.add(linear.duration)
+            for media_file in linear.media_files or ():
+                self.mime_types.add(media_file.type)
+                if media_file.bitrate is not None:
+                    self.bitrates.add(media_file.bitrate)
+
+    def add_error(self, error):
+        """
+
+        :param error: exception, or the name of its class
+        """
+        self.documents += 1
+        self.errors.add(error if isinstance(error, basestring) else error.__class__.__name__)
+
+    def merge(self, other):
+        """
+        Add the statistics of other, of the same parameters
+
+        :return: self
+        """
+        self.documents += other.documents
+        self.mime_types.merge(other.mime_types)
+        self.bitrates.merge(other.bitrates)
+        self.durations.merge(other.durations)
+        self.wrapper_depths.merge(other.wrapper_depths)
+        self.ad_systems.merge(other.ad_systems)
+        self.errors.merge(other.errors)
+        return self
+
+    def as_dict(self):
+        return dict(
+            documents=self.documents,
+            mime_types=self.mime_types.as_dict(),
+            bitrates=self.bitrates.as_dict(),
+            durations=self.durations.as_dict(),
+            wrapper_depths=self.wrapper_depths.as_dict(),
+            ad_systems=self.ad_systems.as_dict(),
+            errors=self.errors.as_dict(),
+        )
+
+
+def _primitive(value):
+    return value.value if isinstance(value, Enum) else value
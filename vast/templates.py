@@ -0,0 +1,224 @@
+"""
+Pre-rendered VAST responses
+
+Ad servers respond with VAST documents where most of the structure is fixed per line item,
+and only a few values, such as impression ids, cache busters and tracking URIs, change per request.
+A Template renders a Vast model once, leaving slots for those values,
+so that responding to a request is a join of the pre-rendered fragments with the escaped slot values:
+
+    vast = Vast.make(... impression=u"https://imp.example.com/i?id=${impression_id}&cb=${cb}" ...)
+    template = Template(vast, (uri_component("impression_id"), number("cb")))
+    xml = template.render(impression_id=u"a1b2", cb=1234)
+
+Slots are marked by ${name} in the text and attribute values of the model,
+which is made and validated through make as usual, once per template rather than per request.
+
+Elements are rendered by the parser schema of their model, to_xml renders models without slots.
+"""
+import keyword
+import re
+from urllib import quote
+from xml.sax.saxutils import escape
+
+import attr
+from enum import Enum
+
+from vast.errors import TemplateError
+from vast.parsers import vast_v2 as v2_schema
+from vast.parsers import xml_parser
+
+_DECLARATION = u'<?xml version="1.0" encoding="UTF-8"?>\n'
+# escaping for both text and attribute values
+_ENTITIES = {'"': "&quot;"}
+# names starting with an underscore are left for the generated render functions
+_NAME = re.compile(r"[A-Za-z]\w*\Z")
+
+
+def to_xml(vast):
+    """
+
+    :param vast: Vast object
+    :return: XML bytes, utf-8 encoded
+    """
+    parts = [_DECLARATION]
+    _write_element(parts, "VAST", v2_schema.VAST, vast)
+    return u"".join(parts).encode("utf-8")
+
+
+def _write_element(parts, tag, element, instance):
+    parts.append(u"<" + tag)
+    content = []
+    for field in element.fields:
+        value = getattr(instance, field.name)
+        if value is None:
+            continue
+        if field.key.startswith("@"):
+            parts.append(u' %s="%s"' % (field.key[1:], _escape(field, value)))
+        else:
+            content.append((field, value))
+
+    if not content:
+        parts.append(u"/>")
+        return
+    parts.append(u">")
+    for field, value in content:
+        if field.key == "#text":
+            parts.append(_escape(field, value))
+        elif field.many:
+            _write_many(parts, field, value)
+        elif field.element is not None:
+            _write_element(parts, field.key, field.element, value)
+        else:
+            parts.append(u"<%s>%s</%s>" % (field.key, _escape(field, value), field.key))
+    parts.append(u"</%s>" % tag)
+
+
+def _write_many(parts, field, values):
+    if field.item_key is None:
+        for value in values:
+            _write_element(parts, field.key, field.element, value)
+        return
+    parts.append(u"<%s>" % field.key)
+    for value in values:
+        _write_element(parts, field.item_key, field.element, value)
+    parts.append(u"</%s>" % field.key)
+
+
+def _escape(field, value):
+    if field.unparse is not None:
+        value = field.unparse(value)
+    if isinstance(value, Enum):
+        value = value.value
+    elif isinstance(value, bool):
+        value = u"true" if value else u"false"
+    elif isinstance(value, bytes):
+        value = value.decode("utf-8")
+    elif not isinstance(value, unicode):
+        value = unicode(value)
+    return escape(value, _ENTITIES)
+
+
+@attr.s(frozen=True)
+class Slot(object):
+    """
+    name: of the slot, marked by ${name} in the model, and the keyword argument of its value to render
+    encode: function from a value to the bytes rendered in place of the slot
+    """
+    name = attr.ib()
+    encode = attr.ib()
+
+
+def _encode_text(value):
+    if isinstance(value, unicode):
+        return escape(value, _ENTITIES).encode("utf-8")
+    if isinstance(value, bytes):
+        return escape(value, _ENTITIES)
+    raise TypeError("text slot value must be a string but was %r" % (value, ))
+
+
+def _encode_number(value):
+    if isinstance(value, (int, long)) and not isinstance(value, bool):
+        return b"%d" % value
+    raise TypeError("number slot value must be an integer but was %r" % (value, ))
+
+
+def _encode_uri_component(value):
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+    elif isinstance(value, (int, long)) and not isinstance(value, bool):
+        value = b"%d" % value
+    elif not isinstance(value, bytes):
+        raise TypeError("uri component slot value must be a string or an integer but was %r" % (value, ))
+    # percent encoded values need no escaping
+    return quote(value, safe=b"")
+
+
+def text(name):
+    """
+    Slot of a string, XML escaped
+    """
+    return Slot(name, _encode_text)
+
+
+def number(name):
+    """
+    Slot of an integer
+    """
+    return Slot(name, _encode_number)
+
+
+def uri_component(name):
+    """
+    Slot of a string or an integer, percent encoded for a URI query parameter or path segment
+    """
+    return Slot(name, _encode_uri_component)
+
+
+class Template(object):
+    """
+    A Vast model rendered once, with slots for the values which change per response.
+    render is a function of a keyword argument per slot, returning XML bytes.
+    """
+
+    def __init__(self, vast, slots=()):
+        """
+
+        :param vast: Vast object, with ${name} marking the slots in its text and attribute values
+        :param slots: iterable of Slot
+        :raises: TemplateError if vast does not render as made, or slots are not all marked in it
+        """
+        self.vast = vast
+        self.slots = tuple(slots)
+        xml = to_xml(vast)
+        # what the schema does not render would be missing from every response
+        try:
+            rendered = xml_parser.from_xml_bytes(xml)
+        except Exception as e:
+            raise TemplateError("vast does not render into a valid document: %s" % e)
+        if rendered != vast:
+            raise TemplateError("vast has values which are not rendered")
+        self.render = _compile(xml, self.slots)
+
+
+def _compile(xml, slots):
+    """
+
+    :return: function of a keyword argument per slot, to the rendered bytes
+    """
+    by_name = {}
+    for slot in slots:
+        if not _NAME.match(slot.name) or keyword.iskeyword(slot.name):
+            raise TemplateError("slot name must be an identifier but was %r" % slot.name)
+        if slot.name in by_name:
+            raise TemplateError("slot %s is declared twice" % slot.name)
+        by_name[slot.name] = slot
+
+    # the render function is generated as source, joining a tuple of the fragments and the encoded values
+    namespace = {"_join": b"".join}
+    items = []
+    if by_name:
+        marks = re.compile(br"\$\{(%s)\}" % b"|".join(re.escape(name) for name in sorted(by_name)))
+        parts = marks.split(xml)
+    else:
+        parts = [xml]
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            namespace["_f%d" % i] = part
+            items.append("_f%d" % i)
+        else:
+            items.append("_v_" + part)
+
+    marked = set(parts[1::2])
+    for name in by_name:
+        if name not in marked:
+            raise TemplateError("slot %s is not marked in vast" % name)
+
+    names = sorted(by_name)
+    lines = ["def render(%s):" % ", ".join(names)]
+    for name in names:
+        namespace["_encode_" + name] = by_name[name].encode
+        lines.append("    _v_%s = _encode_%s(%s)" % (name, name, name))
+    lines.append("    return _join((%s, ))" % ", ".join(items))
+
+    exec compile("\n".join(lines), "<template>", "exec") in namespace
+    return namespace["render"]
@@ -0,0 +1,136 @@
+from unittest import TestCase
+
+from vast.capping import AD, CREATIVE, CREATIVE_AD, Cap, FrequencyCapper, WindowedCounts, capping_ids
+from vast.models import vast_v2
+from vast.models.tests.vast_v2_model_mixin import VastModelMixin
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCappingIds(VastModelMixin, TestCase):
+    def test_ids(self):
+        vast = self.make_vast(ad=vast_v2.Ad.make_inline(id=u"ad", inline=self.make_inline(creatives=[
+            self.make_creative(id=u"c1", ad_id=u"a"),
+            self.make_creative(id=u"c2", ad_id=u"a"),
+            self.make_creative(id=None, ad_id=None),
+        ])))
+
+        self.assertEqual(
+            sorted(capping_ids(vast)),
+            [(AD, u"ad"), (CREATIVE, u"c1"), (CREATIVE, u"c2"), (CREATIVE_AD, u"a")],
+        )
+
+    def test_wrapper(self):
+        self.assertEqual(capping_ids(self.make_vast()), [(AD, u"ad_wrapper_id")])
+
+
+class WindowedCountsMixin(object):
+    def make_counts(self, clock):
+        raise NotImplementedError
+
+    def test_window_slides_by_bucket(self):
+        clock = Clock()
+        counts = self.make_counts(clock)
+        counts.add("a")
+        clock.now = 30
+        counts.add("a", 2)
+        counts.add("b")
+
+        self.assertEqual((counts.get("a"), counts.get("b"), counts.get("c")), (3, 1, 0))
+        clock.now = 60
+        self.assertEqual(counts.get("a"), 2)
+        clock.now = 89
+        self.assertEqual(counts.get("a"), 2)
+        clock.now = 90
+        self.assertEqual((counts.get("a"), counts.get("b")), (0, 0))
+
+    def test_all_buckets_expire_at_once(self):
+        clock = Clock()
+        counts = self.make_counts(clock)
+        counts.add("a")
+        clock.now = 10000
+
+        self.assertEqual(counts.get("a"), 0)
+        counts.add("a")
+        self.assertEqual(counts.get("a"), 1)
+
+
+class TestExactCounts(WindowedCountsMixin, TestCase):
+    def make_counts(self, clock):
+        return WindowedCounts(60, buckets=2, clock=clock)
+
+    def test_expired_keys_are_not_kept(self):
+        clock = Clock()
+        counts = self.make_counts(clock)
+        for i in xrange(100):
+            counts.add(i)
+        clock.now = 60
+
+        self.assertEqual(len(counts), 0)
+
+
+class TestSketchCounts(WindowedCountsMixin, TestCase):
+    def make_counts(self, clock):
+        return WindowedCounts(60, buckets=2, sketch_width=64, sketch_depth=3, clock=clock)
+
+    def test_never_under_counts(self):
+        counts = WindowedCounts(60, sketch_width=16, sketch_depth=2, clock=Clock())
+        for i in xrange(200):
+            counts.add(i, i % 3 + 1)
+
+        for i in xrange(200):
+            self.assertGreaterEqual(counts.get(i), i % 3 + 1)
+        self.assertEqual(len(counts), 32)
+
+
+class TestFrequencyCapper(VastModelMixin, TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.first = self.make_ad(u"ad1", u"c1")
+        self.second = self.make_ad(u"ad2", u"c1")
+        self.third = self.make_ad(u"ad3", u"c3")
+
+    def make_ad(self, ad_id, creative_id):
+        return self.make_vast(ad=vast_v2.Ad.make_inline(id=ad_id, inline=self.make_inline(creatives=[
+            self.make_creative(id=creative_id, ad_id=ad_id),
+        ])))
+
+    def make_capper(self, **kwargs):
+        return FrequencyCapper([Cap(AD, 2, 3600), Cap(CREATIVE, 3, 86400)], clock=self.clock, **kwargs)
+
+    def test_filter(self):
+        for kwargs in ({}, dict(sketch_width=1024)):
+            capper = self.make_capper(**kwargs)
+            vasts = [self.first, self.second, self.third]
+            capper.record("user", self.first)
+
+            self.assertEqual(capper.filter("user", vasts), vasts)
+            capper.record("user", self.first)
+            # ad1 is capped at 2 an hour
+            self.assertEqual(capper.filter("user", vasts), [self.second, self.third])
+            capper.record("user", self.second)
+            # c1 is capped at 3 a day
+            self.assertEqual(capper.filter("user", vasts), [self.third])
+            self.assertEqual(capper.filter("another user", vasts), vasts)
+
+            self.clock.now += 3600
+            self.assertEqual(capper.filter("user", vasts), [self.third])
+            self.clock.now += 86400
+            self.assertEqual(capper.filter("user", vasts), vasts)
+
+    def test_caps_of_a_window_share_counts(self):
+        capper = FrequencyCapper([Cap(AD, 1, 60), Cap(CREATIVE, 1, 60), Cap(AD, 5, 60)], clock=self.clock)
+        capper.record("user", self.first)
+
+        self.assertEqual(len(capper._caps_by_kind[AD][0][0]), 2)
+        self.assertFalse(capper.allowed("user", self.first))
+
+    def test_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            FrequencyCapper([Cap("campaign", 1, 60)])
@@ -0,0 +1,167 @@
+import codecs
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from vast import cli, resources
+from vast.capture import Anonymizer, Capture, iter_corpus
+from vast.errors import NotVastError
+from vast.parsers import xml_parser
+
+
+def read(path):
+    with open(path, "rb") as fp:
+        return fp.read()
+
+
+class TestAnonymizer(TestCase):
+    def setUp(self):
+        self.anonymizer = Anonymizer(b"salt")
+
+    def test_value(self):
+        value = self.anonymizer.value(u"Ab-12.cd")
+
+        self.assertEqual(len(value), 8)
+        self.assertRegexpMatches(value, u"^[A-Z][a-z]-[0-9]{2}\\.[a-z]{2}$")
+        self.assertNotEqual(value, u"Ab-12.cd")
+        self.assertEqual(self.anonymizer.value(u"Ab-12.cd"), value)
+        self.assertNotEqual(Anonymizer(b"other").value(u"Ab-12.cd"), value)
+
+    def test_long_value(self):
+        value = self.anonymizer.value(u"a" * 100)
+
+        self.assertEqual(len(value), 100)
+        self.assertGreater(len(set(value[32:])), 1)
+
+    def test_uris(self):
+        text = u" https://ads.example.com:8080/v/imp.gif?id=abc123&cb=[CACHEBUSTING]&u=a%2Fb&flag then //cdn.x.io/a "
+        anonymized = self.anonymizer.uris(text)
+
+        self.assertEqual(len(anonymized), len(text))
+        self.assertRegexpMatches(
+            anonymized,
+            r"^ https://[a-z]{3}\.[a-z]{7}\.[a-z]{3}:[0-9]{4}/v/imp\.gif\?id=[a-z]{3}[0-9]{3}&cb=\[CACHEBUSTING\]"
+            r"&u=[a-z]%2F[a-z]&flag then //[a-z]{3}\.[a-z]\.[a-z]{2}/a $",
+        )
+        self.assertNotIn(u"example", anonymized)
+
+    def test_anonymize(self):
+        xml = read(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+        anonymized = self.anonymizer.anonymize(xml)
+        vast = xml_parser.from_xml_bytes(xml)
+        anonymized_vast = xml_parser.from_xml_bytes(anonymized)
+
+        self.assertEqual(len(anonymized), len(xml))
+        self.assertNotEqual(anonymized_vast.ad.id, vast.ad.id)
+        self.assertEqual(len(anonymized_vast.ad.id), len(vast.ad.id))
+        self.assertNotEqual(anonymized_vast.ad.inline.ad_system, vast.ad.inline.ad_system)
+        self.assertEqual(anonymized_vast.ad.inline.creatives[0].linear.duration, 15)
+        self.assertEqual(
+            [e.tracking_event_type for e in anonymized_vast.ad.inline.creatives[0].linear.tracking_events],
+            [e.tracking_event_type for e in vast.ad.inline.creatives[0].linear.tracking_events],
+        )
+        self.assertNotIn(b"example", anonymized.lower())
+        self.assertEqual(self.anonymizer.anonymize(xml), anonymized)
+
+    def test_creative_attributes(self):
+        xml = read(resources.INLINE_WITH_CREATIVE_ATTRIBUTES)
+        anonymized = self.anonymizer.anonymize(xml)
+        creative = xml_parser.from_xml_bytes(anonymized).ad.inline.creatives[0]
+
+        self.assertNotIn(b'adId="MagU"', anonymized)
+        self.assertNotIn(b'id="81997481"', anonymized)
+        self.assertEqual((len(creative.ad_id), len(creative.id), creative.sequence), (4, 8, 1))
+
+    def test_macros_are_kept(self):
+        anonymized = self.anonymizer.anonymize(read(resources.SIMPLE_WRAPPER_XML))
+
+        self.assertIn(b"?err=[ERRORCODE]]]>", anonymized)
+        self.assertNotIn(b"magu.d.com", anonymized)
+
+
+class TestCapture(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, "corpus.jsonl.gz")
+
+    def test_capturing(self):
+        documents = [read(resources.SIMPLE_INLINE_XML), read(resources.SIMPLE_WRAPPER_XML)]
+        with Capture(self.path, rate=1, salt=b"salt") as capture, xml_parser.capturing(capture):
+            xml_parser.from_xml_bytes(documents[0])
+            xml_parser.from_xml_file(resources.SIMPLE_WRAPPER_XML)
+            self.assertRaises(NotVastError, xml_parser.from_xml_string, b"<html>not vast</html>")
+        xml_parser.from_xml_bytes(documents[0])
+
+        corpus = list(iter_corpus(self.path))
+        self.assertEqual([source for source, _ in corpus], ["capture:1", "capture:2", "capture:3"])
+        self.assertEqual([len(xml) for _, xml in corpus[:2]], [len(d) for d in documents])
+        self.assertEqual(corpus[2][1], b"<html>not vast</html>")
+        self.assertEqual((capture.captured, capture.skipped), (3, 0))
+
+    def test_file_inputs_are_read_through(self):
+        path = os.path.join(self.tmp_dir, "inline.xml.gz")
+        with gzip.open(path, "wb") as fp:
+            fp.write(read(resources.SIMPLE_INLINE_XML))
+
+        with Capture(self.path, rate=1) as capture, xml_parser.capturing(capture):
+            vast = xml_parser.from_xml_file(path)
+        (_, xml), = iter_corpus(self.path)
+
+        self.assertEqual(len(xml), len(read(resources.SIMPLE_INLINE_XML)))
+        self.assertEqual(len(xml_parser.from_xml_bytes(xml).ad.id), len(vast.ad.id))
+
+    def test_budgets(self):
+        xml = read(resources.SIMPLE_INLINE_XML)
+        with Capture(self.path, rate=1, max_size=len(xml) * 2, max_document_size=len(xml)) as capture:
+            for _ in xrange(3):
+                if capture.sample():
+                    capture.add(xml)
+            self.assertFalse(capture.add(xml + b" "))
+            self.assertFalse(capture.add(b"<VAST><Ad>"))
+
+        self.assertEqual((capture.captured, capture.skipped), (2, 2))
+        self.assertEqual(capture.failures, {"ExpatError": 1})
+        self.assertFalse(capture.sample())
+        self.assertEqual(len(list(iter_corpus(self.path))), 2)
+
+    def test_declared_encodings(self):
+        xml = read(resources.SIMPLE_INLINE_XML)
+        latin_1 = xml.decode("utf-8").replace(u"UTF-8", u"ISO-8859-1").replace(u"MagU", u"Mag\xe9")
+        with Capture(self.path, rate=1) as capture, xml_parser.capturing(capture):
+            xml_parser.from_xml_bytes(latin_1.encode("latin-1"))
+            xml_parser.from_xml_string(latin_1)
+            xml_parser.from_xml_bytes(codecs.BOM_UTF16_LE + latin_1.replace(u"ISO-8859-1", u"UTF-16").encode("utf-16-le"))
+            # declaring utf-8, but not in it
+            self.assertFalse(capture.add(latin_1.replace(u"ISO-8859-1", u"UTF-8").encode("latin-1")))
+
+        corpus = list(iter_corpus(self.path))
+        self.assertEqual(len(corpus), 3)
+        for _, captured in corpus:
+            self.assertIn(b'encoding="utf-8"', captured)
+            ad_system = xml_parser.from_xml_bytes(captured).ad.inline.ad_system
+            self.assertEqual(len(ad_system), len(u"Mag\xe9"))
+            self.assertNotEqual(ad_system, u"Mag\xe9")
+        self.assertEqual((capture.captured, capture.skipped), (3, 1))
+        self.assertEqual(capture.failures, {"UnicodeDecodeError": 1})
+
+    def test_rate(self):
+        with Capture(self.path, rate=0.25, seed=0) as capture:
+            sampled = sum(capture.sample() for _ in xrange(4000))
+
+        self.assertTrue(900 < sampled < 1100, sampled)
+
+    def test_cli_input(self):
+        with Capture(self.path, rate=1) as capture:
+            capture.add(read(resources.SIMPLE_INLINE_XML))
+        output = os.path.join(self.tmp_dir, "out.jsonl")
+
+        status = cli.main([self.path, "-o", output, "-e", os.path.join(self.tmp_dir, "errors.jsonl"), "-q"])
+        with open(output, "r") as fp:
+            records = [json.loads(line) for line in fp]
+
+        self.assertEqual(status, 0)
+        self.assertEqual([r["source"] for r in records], ["capture:1"])
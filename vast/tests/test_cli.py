@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import TestCase
+
+from vast import cli, resources
+
+
+class TestCli(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.inputs_dir = os.path.join(self.tmp_dir, "inputs")
+        os.mkdir(self.inputs_dir)
+        for path in (resources.SIMPLE_INLINE_XML, resources.SIMPLE_WRAPPER_XML):
+            shutil.copy(path, self.inputs_dir)
+        with open(os.path.join(self.inputs_dir, "broken.xml"), "w") as fp:
+            fp.write("<html>not vast</html>")
+
+        self.output = os.path.join(self.tmp_dir, "out.jsonl")
+        self.errors = os.path.join(self.tmp_dir, "errors.jsonl")
+
+    def _records(self, path):
+        with open(path, "r") as fp:
+            return [json.loads(line) for line in fp]
+
+    def _main(self, *args):
+        return cli.main(list(args) + ["-o", self.output, "-e", self.errors, "-q"])
+
+    def test_directory_input(self):
+        status = self._main(self.inputs_dir)
+
+        self.assertEqual(status, 1)
+        parsed = self._records(self.output)
+        self.assertEqual(len(parsed), 2)
+        self.assertEqual(
+            sorted(r["vast"]["ad"]["id"] for r in parsed),
+            [u"509080ATOU", u"70470"],
+        )
+        errors = self._records(self.errors)
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(errors[0]["source"], os.path.join(self.inputs_dir, "broken.xml"))
+        self.assertEqual(errors[0]["error"], "NotVastError")
+
+    def test_parallel_workers(self):
+        status = self._main(os.path.join(self.inputs_dir, "simple_*.xml"), "-w", "2")
+
+        self.assertEqual(status, 0)
+        self.assertEqual(len(self._records(self.output)), 2)
+
+    def test_jsonl_and_list_inputs(self):
+        jsonl = os.path.join(self.tmp_dir, "in.jsonl")
+        with open(resources.SIMPLE_WRAPPER_XML) as fp:
+            xml = fp.read()
+        with open(jsonl, "w") as fp:
+            fp.write(json.dumps(dict(id="inline_xml", xml=xml)) + "\n")
+            fp.write(json.dumps(dict(path=resources.SIMPLE_INLINE_XML)) + "\n")
+        path_list = os.path.join(self.tmp_dir, "paths.txt")
+        with open(path_list, "w") as fp:
+            fp.write(resources.INLINE_MULTI_FILES_XML + "\n\n")
+
+        status = self._main(jsonl, "@" + path_list)
+
+        self.assertEqual(status, 0)
+        sources = sorted(r["source"] for r in self._records(self.output))
+        self.assertEqual(
+            sources,
+            sorted(["inline_xml", jsonl + ":2", resources.INLINE_MULTI_FILES_XML]),
+        )
+
+    def test_bad_jsonl_records(self):
+        jsonl = os.path.join(self.tmp_dir, "in.jsonl")
+        with open(jsonl, "w") as fp:
+            fp.write("{not json\n")
+            fp.write(json.dumps(dict(id="no_path")) + "\n")
+            fp.write(json.dumps([1]) + "\n")
+            fp.write(json.dumps(dict(path=resources.SIMPLE_INLINE_XML)) + "\n")
+
+        for workers in ("1", "2"):
+            status = self._main(jsonl, "-w", workers)
+
+            self.assertEqual(status, 1)
+            self.assertEqual([r["source"] for r in self._records(self.output)], [jsonl + ":4"])
+            errors = self._records(self.errors)
+            self.assertEqual(
+                sorted((r["source"], r["error"]) for r in errors),
+                [(jsonl + ":1", "InputError"), (jsonl + ":3", "InputError"), ("no_path", "InputError")],
+            )
+
+    def test_progress_report(self):
+        progress = BytesIO()
+        with open(self.output, "w") as output:
+            throughput = cli.run(
+                cli.iter_inputs([self.inputs_dir]),
+                output=output,
+                errors=output,
+                progress=progress,
+            )
+
+        self.assertEqual(throughput.count, 3)
+        self.assertIn("docs/sec", progress.getvalue())
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+from vast import resources
+from vast.deadline import Deadline, active_deadline, checking
+from vast.errors import DeadlineExceededError
+from vast.parsers import xml_parser
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDeadline(TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.deadline = Deadline(0.1, clock=self.clock)
+
+    def test_remaining(self):
+        self.clock.now = 0.04
+
+        self.assertAlmostEqual(self.deadline.remaining(), 0.06)
+        self.assertFalse(self.deadline.expired())
+        self.deadline.check()
+
+    def test_expired(self):
+        self.clock.now = 0.1
+
+        self.assertEqual(self.deadline.remaining(), 0.0)
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            self.deadline.check(partial=[1])
+        self.assertEqual(ctx.exception.partial, [1])
+        self.assertAlmostEqual(ctx.exception.elapsed, 0.1)
+
+    def test_stage_usage(self):
+        for stage, seconds in (("fetch", 0.02), ("parse", 0.01), ("fetch", 0.03)):
+            with self.deadline.stage(stage):
+                self.clock.now += seconds
+
+        self.assertEqual(self.deadline.usage.keys(), ["fetch", "parse"])
+        self.assertAlmostEqual(self.deadline.usage["fetch"], 0.05)
+        self.assertAlmostEqual(self.deadline.usage["parse"], 0.01)
+
+    def test_checking(self):
+        with checking(self.deadline):
+            self.assertIs(active_deadline(), self.deadline)
+            with checking(None):
+                self.assertIsNone(active_deadline())
+            self.assertIs(active_deadline(), self.deadline)
+        self.assertIsNone(active_deadline())
+
+
+class TestDeadlineParsing(TestCase):
+    def setUp(self):
+        with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+            self.xml = fp.read()
+
+    def test_within_deadline(self):
+        deadline = Deadline(60)
+
+        vast = xml_parser.from_xml_bytes(self.xml, deadline=deadline)
+
+        self.assertEqual(vast, xml_parser.from_xml_bytes(self.xml))
+        self.assertEqual(deadline.usage.keys(), ["xml", "models"])
+
+    def test_checked_between_chunks(self):
+        clock = Clock()
+        deadline = Deadline(0.1, clock=clock)
+        parser = xml_parser.FeedParser(deadline=deadline)
+        parser.feed(self.xml[:100])
+        clock.now = 0.2
+
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            parser.feed(self.xml[100:])
+        self.assertIn("xml", ctx.exception.usage)
+
+    def test_checked_between_creatives(self):
+        clock = Clock()
+        deadline = Deadline(0.1, clock=clock)
+        parser = xml_parser.FeedParser(deadline=deadline)
+        parser.feed(self.xml)
+        clock.now = 0.2
+
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            parser.close()
+        self.assertEqual(ctx.exception.partial, [])
@@ -0,0 +1,44 @@
+from unittest import TestCase
+
+from vast import resources
+from vast.diff import Change, diff
+from vast.parsers import xml_parser
+from vast.update import replace, update
+
+
+class TestDiff(TestCase):
+    def setUp(self):
+        self.vast = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+
+    def test_equal_trees(self):
+        self.assertEqual(diff(self.vast, xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)), [])
+
+    def test_changed_value(self):
+        path = "ad.inline.creatives[0].linear.media_files[2].asset"
+        changed = replace(self.vast, path, u"https://other.u/a.mp4")
+
+        self.assertEqual(
+            diff(self.vast, changed),
+            [Change(path, self.vast.ad.inline.creatives[0].linear.media_files[2].asset, u"https://other.u/a.mp4")],
+        )
+
+    def test_removed_and_added_items(self):
+        media_files = self.vast.ad.inline.creatives[0].linear.media_files
+        changed = update(
+            self.vast,
+            "ad.inline.creatives[0].linear.media_files",
+            lambda items: items[1:] + [media_files[0]],
+        )
+
+        self.assertEqual(
+            diff(self.vast, changed),
+            [
+                Change("ad.inline.creatives[0].linear.media_files[0]", media_files[0], None),
+                Change("ad.inline.creatives[0].linear.media_files[6]", None, media_files[0]),
+            ],
+        )
+
+    def test_changed_attribute(self):
+        changed = replace(self.vast, "ad.id", u"other")
+
+        self.assertEqual(diff(self.vast, changed), [Change("ad.id", self.vast.ad.id, u"other")])
@@ -0,0 +1,88 @@
+from unittest import TestCase
+
+from vast import resources
+from vast.fingerprint import (
+    BloomFilter,
+    DedupeFilter,
+    fingerprint,
+    fingerprint_xml,
+    normalize_uri,
+)
+from vast.parsers import xml_parser
+
+
+def _read(path):
+    with open(path, "r") as fp:
+        return fp.read()
+
+
+class TestNormalizeUri(TestCase):
+    def test_volatile_params_dropped_and_rest_sorted(self):
+        self.assertEqual(
+            normalize_uri("https://t.u/p?b=2&cb=123&a=1&ORD=9"),
+            "https://t.u/p?a=1&b=2",
+        )
+
+    def test_custom_volatile_params(self):
+        self.assertEqual(
+            normalize_uri("https://t.u/p?cb=1&sid=2", volatile_params=frozenset(["sid"])),
+            "https://t.u/p?cb=1",
+        )
+
+
+class TestFingerprint(TestCase):
+    def setUp(self):
+        self.xml = _read(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+        # same ad, with cosmetic differences only
+        self.variant = (
+            self.xml
+            .replace('<MediaFile delivery="progressive" type="video/mp4"', '<MediaFile type="video/mp4" delivery="progressive"')
+            .replace("<![CDATA[ https://mag.dom.com/vidtrk?evt=start ]]>", "<![CDATA[https://mag.dom.com/vidtrk?evt=start&cb=5533]]>")
+        )
+
+    def test_cosmetic_differences_are_ignored(self):
+        self.assertEqual(
+            fingerprint(xml_parser.from_xml_string(self.xml)),
+            fingerprint(xml_parser.from_xml_string(self.variant)),
+        )
+        self.assertEqual(fingerprint_xml(self.xml), fingerprint_xml(self.variant))
+
+    def test_real_differences_are_not(self):
+        other = self.xml.replace("evt=start", "evt=begin")
+
+        self.assertNotEqual(
+            fingerprint(xml_parser.from_xml_string(self.xml)),
+            fingerprint(xml_parser.from_xml_string(other)),
+        )
+        self.assertNotEqual(fingerprint_xml(self.xml), fingerprint_xml(other))
+
+    def test_fingerprint_is_stable(self):
+        self.assertEqual(fingerprint_xml(self.xml), fingerprint_xml(self.xml))
+        self.assertEqual(len(fingerprint_xml(self.xml)), 40)
+
+
+class TestDedupeFilter(TestCase):
+    def test_bloom_filter_membership(self):
+        bloom = BloomFilter(capacity=100)
+        digests = [fingerprint_xml("<a>%d</a>" % i) for i in range(100)]
+        for digest in digests:
+            bloom.add(digest)
+
+        self.assertTrue(all(d in bloom for d in digests))
+        self.assertTrue(bloom.is_full)
+
+    def test_it_filters_duplicates(self):
+        xmls = [_read(resources.SIMPLE_INLINE_XML), _read(resources.SIMPLE_WRAPPER_XML)]
+        stream = xmls * 3
+
+        distinct = list(DedupeFilter(capacity=10, key=fingerprint_xml).filter(stream))
+
+        self.assertEqual(distinct, xmls)
+
+    def test_memory_is_bounded_by_generations(self):
+        dedupe = DedupeFilter(capacity=10, key=lambda i: fingerprint_xml("<a>%d</a>" % i))
+        self.assertEqual(len(list(dedupe.filter(range(100)))), 100)
+
+        # recent items are remembered, the oldest generations are forgotten
+        self.assertFalse(dedupe.is_new(99))
+        self.assertTrue(dedupe.is_new(0))
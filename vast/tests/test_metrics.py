@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from vast.metrics import Throughput
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestThroughput(TestCase):
+    def test_rates_and_percentiles(self):
+        clock = _Clock()
+        throughput = Throughput(clock=clock)
+        for i in range(1, 101):
+            throughput.record(i / 1000.0, ok=i % 10 != 0)
+        clock.now = 2.0
+
+        self.assertEqual(throughput.rate(), 50.0)
+        self.assertEqual(throughput.error_rate(), 0.1)
+        self.assertEqual(throughput.percentiles((0, 50, 100)), [0.001, 0.051, 0.1])
+
+    def test_reservoir_is_bounded(self):
+        throughput = Throughput(reservoir_size=10)
+        for i in range(1000):
+            throughput.record(i)
+
+        self.assertEqual(throughput.count, 1000)
+        self.assertEqual(len(throughput._latencies), 10)
+
+    def test_empty_report(self):
+        self.assertIn("0 docs", Throughput().report())
@@ -0,0 +1,120 @@
+import itertools
+import random
+from unittest import TestCase
+
+from vast.models import vast_v2
+from vast.models.tests.vast_v2_model_mixin import VastModelMixin
+from vast.pods import Candidate, linear_creatives, pack
+
+
+class PodsMixin(VastModelMixin):
+    def make_ad(self, *durations, **kwargs):
+        creatives = [
+            self.make_creative(linear=self.make_linear_creative(duration=d), id=u"c%d" % i, sequence=i + 1)
+            for i, d in enumerate(durations)
+        ]
+        return self.make_vast(ad=self.make_inline_ad(inline=self.make_inline(creatives=creatives)))
+
+    def make_candidates(self, *specs):
+        """
+        specs of (duration, value, group)
+        """
+        return [Candidate(self.make_ad(duration), value, group) for duration, value, group in specs]
+
+
+class TestLinearCreatives(PodsMixin, TestCase):
+    def test_sequence_order(self):
+        creatives = [
+            self.make_creative(id=u"none"),
+            self.make_creative(id=u"second", sequence=2),
+            vast_v2.Creative.make(non_linear=vast_v2.NonLinear.make(non_linear_ads=[]), id=u"non_linear"),
+            self.make_creative(id=u"first", sequence=1),
+        ]
+        vast = self.make_vast(ad=self.make_inline_ad(inline=self.make_inline(creatives=creatives)))
+
+        self.assertEqual([c.id for c in linear_creatives(vast)], [u"first", u"second", u"none"])
+
+    def test_wrapper(self):
+        self.assertEqual(linear_creatives(self.make_vast()), [])
+
+
+class TestPack(PodsMixin, TestCase):
+    def test_exact(self):
+        # by value per second, the 40 seconds ad would be chosen first, leaving no room for the others
+        candidates = self.make_candidates((40, 50, None), (30, 30, None), (30, 30, None))
+
+        pod = pack(candidates, 60)
+
+        self.assertEqual((pod.duration, pod.value, pod.exact), (60, 60, True))
+        self.assertEqual(pod.candidates, candidates[1:])
+
+    def test_greedy(self):
+        candidates = self.make_candidates((40, 50, None), (30, 30, None), (30, 30, None))
+
+        pod = pack(candidates, 60, max_cells=0)
+
+        self.assertEqual((pod.value, pod.exact), (50, False))
+
+    def test_greedy_takes_the_most_valuable_alone(self):
+        candidates = self.make_candidates((1, 2, None), (60, 100, None))
+
+        self.assertEqual(pack(candidates, 60, max_cells=0).candidates, [candidates[1]])
+
+    def test_groups(self):
+        candidates = self.make_candidates((30, 30, "a"), (30, 20, "a"), (15, 5, "a"), (30, 10, "b"))
+
+        pod = pack(candidates, 60)
+
+        self.assertEqual(pod.candidates, [candidates[0], candidates[3]])
+
+    def test_ads_play_whole_in_sequence(self):
+        long_ad = Candidate(self.make_ad(15, 15, 15), 50)
+        short_ad = Candidate(self.make_ad(15), 20)
+
+        pod = pack([short_ad, long_ad], 60)
+
+        self.assertEqual(pod.candidates, [long_ad, short_ad])
+        self.assertEqual([c.id for c in pod.creatives], [u"c0", u"c1", u"c2", u"c0"])
+        self.assertEqual(pack([short_ad, long_ad], 30).candidates, [short_ad])
+
+    def test_left_out_candidates(self):
+        candidates = [
+            Candidate(self.make_vast(), 100),
+            Candidate(self.make_ad(90), 100),
+            Candidate(self.make_ad(15), 0),
+        ]
+
+        pod = pack(candidates, 60)
+
+        self.assertEqual((pod.candidates, pod.creatives, pod.value), ([], [], 0))
+
+    def test_no_duration(self):
+        candidates = self.make_candidates((0, 5, None), (0, 3, "a"), (0, 4, "a"), (30, 10, "a"), (30, 2, None))
+
+        pod = pack(candidates, 30)
+        self.assertEqual(pod.candidates, [candidates[3], candidates[0]])
+        self.assertEqual((pod.duration, pod.value), (30, 15))
+        # greedily, the ads of no duration come first, taking group a
+        pod = pack(candidates, 30, max_cells=0)
+        self.assertEqual(pod.candidates, [candidates[0], candidates[2], candidates[4]])
+        self.assertEqual(pack(candidates[:3], 0).candidates, [candidates[0], candidates[2]])
+
+    def test_against_all_pods(self):
+        rng = random.Random(7)
+        ads = dict((d, self.make_ad(d)) for d in (0, 5, 10, 15, 20, 30))
+        for _ in xrange(30):
+            candidates = [
+                Candidate(ads[rng.choice(sorted(ads))], rng.randint(1, 40), rng.choice((None, "a", "b", "c")))
+                for _ in xrange(10)
+            ]
+            break_duration = rng.choice((20, 30, 45, 60))
+
+            best = 0
+            for n in xrange(len(candidates) + 1):
+                for pod in itertools.combinations(candidates, n):
+                    groups = [c.group for c in pod if c.group is not None]
+                    duration = sum(linear_creatives(c.vast)[0].linear.duration for c in pod)
+                    if len(groups) == len(set(groups)) and duration <= break_duration:
+                        best = max(best, sum(c.value for c in pod))
+
+            self.assertEqual(pack(candidates, break_duration).value, best)
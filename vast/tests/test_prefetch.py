@@ -0,0 +1,238 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from unittest import TestCase
+
+from vast.models import vast_v2
+from vast.prefetch import DiskCache, Prefetcher, select_renditions
+
+
+class _AssetServer(ThreadingMixIn, HTTPServer):
+    """
+    Local stand in for an asset CDN, tracking requests and their concurrency
+    """
+    daemon_threads = True
+
+    def __init__(self, delay=0.05):
+        HTTPServer.__init__(self, ("127.0.0.1", 0), _AssetHandler)
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = []
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    def url(self, path):
+        return u"http://127.0.0.1:%d%s" % (self.server_address[1], path)
+
+
+class _AssetHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.concurrent += 1
+            server.max_concurrent = max(server.max_concurrent, server.concurrent)
+        time.sleep(server.delay)
+        with server.lock:
+            server.concurrent -= 1
+
+        if self.path.startswith("/missing"):
+            self.send_error(404)
+            return
+        body = ("content of %s" % self.path) * 10
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _media_file(asset, bitrate, delivery=u"progressive", type=u"video/mp4"):
+    return vast_v2.MediaFile.make(
+        asset=asset, delivery=delivery, type=type, width=640, height=360,
+        bitrate=bitrate, min_bitrate=bitrate, max_bitrate=bitrate,
+    )
+
+
+def _linear(*media_files):
+    return vast_v2.Linear.make(duration=15, media_files=list(media_files))
+
+
+class TestSelectRenditions(TestCase):
+    def test_it_selects_best_accepted(self):
+        linear = _linear(
+            _media_file(u"https://a.u/low.mp4", 300),
+            _media_file(u"https://a.u/high.mp4", 3000),
+            _media_file(u"https://a.u/mid.mp4", 1000),
+            _media_file(u"https://a.u/stream.mp4", 2000, delivery=u"streaming"),
+            _media_file(u"https://a.u/mid.webm", 1000, type=u"video/webm"),
+        )
+
+        selected = select_renditions(
+            linear, max_renditions=2, max_bitrate=2000, mime_types=(vast_v2.MimeType.MP4, ),
+        )
+
+        self.assertEqual([m.asset for m in selected], [u"https://a.u/mid.mp4", u"https://a.u/low.mp4"])
+
+
+class TestPrefetcher(TestCase):
+    def setUp(self):
+        self.server = _AssetServer()
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01, ))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        self.cache = DiskCache(self.cache_dir)
+
+    def test_concurrent_downloads(self):
+        linears = [_linear(_media_file(self.server.url("/asset%d.mp4" % i), 300)) for i in range(8)]
+
+        paths = Prefetcher(self.cache, workers=4).prefetch(linears)
+
+        self.assertEqual(len(paths), 8)
+        self.assertTrue(all(os.path.exists(p) for p in paths.values()))
+        self.assertGreater(self.server.max_concurrent, 1)
+        self.assertLessEqual(self.server.max_concurrent, 4)
+
+    def test_cache_hits_do_not_download(self):
+        url = self.server.url("/asset.mp4")
+        prefetcher = Prefetcher(self.cache)
+        path = prefetcher.fetch(url)
+
+        start = time.time()
+        self.assertEqual(prefetcher.fetch(url), path)
+        hit_latency = time.time() - start
+
+        self.assertEqual(len(self.server.requests), 1)
+        # much faster than a download, which takes at least the server delay
+        self.assertLess(hit_latency, self.server.delay / 5)
+        with open(path, "rb") as fp:
+            self.assertEqual(fp.read(), "content of /asset.mp4" * 10)
+
+    def test_concurrent_requests_are_coalesced(self):
+        url = self.server.url("/asset.mp4")
+        prefetcher = Prefetcher(self.cache)
+        paths = []
+        threads = [threading.Thread(target=lambda: paths.append(prefetcher.fetch(url))) for _ in range(5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(set(paths)), 1)
+
+    def test_errors_are_reported(self):
+        url = self.server.url("/missing.mp4")
+
+        paths = Prefetcher(self.cache).prefetch([_linear(_media_file(url, 300))])
+
+        self.assertIsInstance(paths[url], Exception)
+        self.assertIsNone(self.cache.get(url))
+
+
+class TestDiskCache(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+
+    def test_content_is_stored_once(self):
+        cache = DiskCache(self.cache_dir)
+        first = cache.put(u"https://a.u/1", b"same")
+        second = cache.put(u"https://b.u/1", b"same")
+
+        self.assertEqual(first, second)
+        self.assertEqual(cache.size, 4)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = DiskCache(self.cache_dir, max_bytes=10)
+        cache.put(u"https://a.u/1", b"11111")
+        cache.put(u"https://a.u/2", b"22222")
+        cache.get(u"https://a.u/1")
+        cache.put(u"https://a.u/3", b"33333")
+
+        self.assertIsNotNone(cache.get(u"https://a.u/1"))
+        self.assertIsNone(cache.get(u"https://a.u/2"))
+        self.assertIsNotNone(cache.get(u"https://a.u/3"))
+        self.assertEqual(cache.size, 10)
+
+    def test_index_survives_restart(self):
+        path = DiskCache(self.cache_dir).put(u"https://a.u/1", b"11111")
+
+        self.assertEqual(DiskCache(self.cache_dir).get(u"https://a.u/1"), path)
+
+    def test_eviction_survives_restart(self):
+        cache = DiskCache(self.cache_dir, max_bytes=10)
+        cache.put(u"https://a.u/1", b"11111")
+        cache.put(u"https://b.u/1", b"11111")
+        cache.put(u"https://a.u/2", b"22222")
+        cache.put(u"https://a.u/3", b"33333")
+
+        restarted = DiskCache(self.cache_dir, max_bytes=10)
+
+        self.assertIsNone(restarted.get(u"https://a.u/1"))
+        self.assertIsNone(restarted.get(u"https://b.u/1"))
+        self.assertIsNotNone(restarted.get(u"https://a.u/2"))
+        self.assertIsNotNone(restarted.get(u"https://a.u/3"))
+        self.assertEqual(restarted.size, 10)
+
+    def test_index_is_appended_to_and_compacted(self):
+        cache = DiskCache(self.cache_dir)
+        cache._COMPACT_AFTER = 3
+        index_path = os.path.join(self.cache_dir, DiskCache._INDEX)
+        cache.put(u"https://a.u/1", b"11111")
+        cache.put(u"https://a.u/2", b"22222")
+        with open(index_path) as fp:
+            self.assertEqual(len(fp.readlines()), 2)
+
+        cache.put(u"https://a.u/3", b"33333")
+        with open(index_path) as fp:
+            self.assertEqual(len(fp.readlines()), 1)
+
+        restarted = DiskCache(self.cache_dir)
+        self.assertEqual(restarted.size, 15)
+        for i in range(1, 4):
+            self.assertIsNotNone(restarted.get(u"https://a.u/%d" % i))
+
+    def test_failed_writes_are_not_stored(self):
+        def write(fp):
+            fp.write(b"partial")
+            raise IOError("connection reset")
+
+        cache = DiskCache(self.cache_dir)
+        self.assertRaises(IOError, cache.put_stream, u"https://a.u/1", write)
+
+        self.assertIsNone(cache.get(u"https://a.u/1"))
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_content_is_written_outside_of_the_lock(self):
+        cache = DiskCache(self.cache_dir)
+        writing = threading.Event()
+        resume = threading.Event()
+
+        def slow_write(fp):
+            writing.set()
+            resume.wait(5)
+            fp.write(b"slow")
+
+        thread = threading.Thread(target=cache.put_stream, args=(u"https://a.u/slow", slow_write))
+        thread.start()
+        try:
+            writing.wait(5)
+            cache.put(u"https://a.u/fast", b"fast")
+            self.assertIsNotNone(cache.get(u"https://a.u/fast"))
+            self.assertIsNone(cache.get(u"https://a.u/slow"))
+        finally:
+            resume.set()
+            thread.join()
+        self.assertIsNotNone(cache.get(u"https://a.u/slow"))
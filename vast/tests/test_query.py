@@ -0,0 +1,97 @@
+from unittest import TestCase
+
+from vast import resources
+from vast.models import vast_v2
+from vast.parsers import xml_parser
+from vast.query import ALL, Step, compile_path, find, find_all, matches, parse_path
+
+
+class TestParsePath(TestCase):
+    def test_steps(self):
+        self.assertEqual(
+            parse_path("ad.*.creatives[*].linear.media_files[0].tracking_events[tracking_event_type = start]"),
+            (
+                Step("ad"),
+                Step(ALL),
+                Step("creatives", ALL),
+                Step("linear"),
+                Step("media_files", 0),
+                Step("tracking_events", ("tracking_event_type", "start")),
+            ),
+        )
+
+    def test_dots_within_selectors(self):
+        self.assertEqual(
+            parse_path("ad.inline.impression[uri=http://a.b/c?d=e.f].x"),
+            (Step("ad"), Step("inline"), Step("impression", ("uri", "http://a.b/c?d=e.f")), Step("x")),
+        )
+        self.assertEqual(parse_path("a[0].b[*]"), (Step("a", 0), Step("b", ALL)))
+
+    def test_invalid_paths(self):
+        for expr in ("", "ad..inline", "ad[", "ad[x]", "1ad"):
+            with self.assertRaises(ValueError):
+                parse_path(expr)
+
+
+class TestFind(TestCase):
+    def setUp(self):
+        self.vast = xml_parser.from_xml_file(resources.INLINE_WITH_TRACKING_EVENTS_XML)
+
+    def test_filter_by_enum_value(self):
+        self.assertEqual(
+            list(find(self.vast, "ad.*.creatives[*].linear.tracking_events[tracking_event_type=start].tracking_event_uri")),
+            [u"https://mag.dom.com/vidtrk?evt=start"],
+        )
+
+    def test_filter_by_enum_name(self):
+        events = list(find(self.vast, "ad.inline.creatives[0].linear.tracking_events[tracking_event_type=MID_POINT]"))
+
+        self.assertEqual([e.tracking_event_type for e in events], [vast_v2.TrackingEventType.MID_POINT])
+
+    def test_all_items(self):
+        self.assertEqual(
+            len(list(find(self.vast, "ad.inline.creatives[*].linear.tracking_events[*]"))),
+            14,
+        )
+
+    def test_missing_values_are_skipped(self):
+        self.assertEqual(list(find(self.vast, "ad.wrapper.creatives[*]")), [])
+        self.assertEqual(list(find(self.vast, "ad.inline.creatives[3]")), [])
+        self.assertEqual(list(find(self.vast, "ad.inline.no_such_attribute")), [])
+
+    def test_negative_index(self):
+        self.assertEqual(
+            compile_path("ad.inline.creatives[-1].linear.tracking_events[-1].tracking_event_uri").first(self.vast),
+            u"https://mag.dom.com/vidtrk?evt=close",
+        )
+
+    def test_compiled_paths_are_cached(self):
+        self.assertIs(compile_path("ad.inline"), compile_path("ad.inline"))
+
+    def test_find_is_lazy(self):
+        found = find(self.vast, "ad.inline.creatives[*]")
+
+        self.assertEqual(next(found), self.vast.ad.inline.creatives[0])
+
+    def test_find_all(self):
+        for expr in (
+                "ad.*.creatives[*].linear.tracking_events[tracking_event_type=start]", "ad.*.*", "ad.wrapper",
+                "ad.inline.no_such_attribute", "ad.inline.creatives[*].linear.tracking_events[no_such_attribute=1]",
+                "ad.inline.creatives[0].linear.tracking_events[1].tracking_event_uri",
+        ):
+            self.assertEqual(find_all(self.vast, expr), list(find(self.vast, expr)), expr)
+
+    def test_filter_by_uri(self):
+        uri = u"https://mag.dom.com/vidtrk?evt=close"
+
+        events = find_all(self.vast, "ad.inline.creatives[*].linear.tracking_events[tracking_event_uri=%s]" % uri)
+
+        self.assertEqual([e.tracking_event_type for e in events], [vast_v2.TrackingEventType.CLOSE])
+
+    def test_matches_as_filters_do(self):
+        start = vast_v2.TrackingEventType.START
+        for value, text, expected in (
+                (start, "start", True), (start, "START", True), (start, "complete", False),
+                (u"a", "a", True), (3, "3", True), (True, "True", True), (False, "True", False), (None, "None", False),
+        ):
+            self.assertEqual(matches(value, text), expected, (value, text))
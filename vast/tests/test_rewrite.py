@@ -0,0 +1,125 @@
+from unittest import TestCase
+from xml.etree import ElementTree
+
+from vast import resources
+from vast.errors import RewriteError
+from vast.parsers import xml_parser
+from vast.query import find_all
+from vast.rewrite import Rewriter, Rules, rewrite
+
+_MEDIA_FILE = "Ad/InLine/Creatives/Creative/Linear/MediaFiles/MediaFile"
+_ASSETS = "ad.inline.creatives[*].linear.media_files[*].asset"
+
+
+def to_cdn(uri):
+    return uri.replace(u"https://", u"https://cdn.example.com/")
+
+
+class TestRewrite(TestCase):
+    def setUp(self):
+        with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+            self.xml = fp.read()
+        self.vast = xml_parser.from_xml_string(self.xml)
+
+    def test_no_rules_copies_input(self):
+        self.assertEqual(rewrite(self.xml, Rules()), self.xml)
+
+    def test_replace_text(self):
+        output = rewrite(self.xml, Rules().replace_text(_MEDIA_FILE, to_cdn))
+
+        vast = xml_parser.from_xml_string(output)
+        self.assertEqual(find_all(vast, _ASSETS), [to_cdn(a) for a in find_all(self.vast, _ASSETS)])
+        self.assertIn(b"<![CDATA[https://cdn.example.com/vpaid.dv.com/s.swf]]>", output)
+
+    def test_untouched_regions_are_copied_as_is(self):
+        output = rewrite(self.xml, Rules().replace_text("Ad/InLine/AdTitle", lambda text: u"a < b"))
+
+        self.assertEqual(output, self.xml.replace(b"Many Media Files", b"a &lt; b"))
+
+    def test_append(self):
+        rules = Rules().append("Ad/InLine", u"<Error><![CDATA[https://proxy.u/error]]></Error>")
+
+        output = rewrite(self.xml, rules)
+
+        self.assertIn(b"<Error><![CDATA[https://proxy.u/error]]></Error></InLine>", output)
+
+    def test_append_with_attributes(self):
+        rules = Rules().append(_MEDIA_FILE, lambda attributes: u"<!-- %s -->" % attributes["width"])
+
+        output = rewrite(self.xml, rules)
+
+        self.assertIn(b"]]><!-- 1280 --></MediaFile>", output)
+
+    def test_set_attributes(self):
+        def no_streaming(attributes):
+            attributes["delivery"] = u"progressive"
+            attributes.setdefault("bitrate", attributes.get("maxBitrate", u"100"))
+            return attributes
+
+        output, vast = rewrite(self.xml, Rules().set_attributes("**/MediaFile", no_streaming), validate=True)
+
+        self.assertNotIn(b'delivery="streaming"', output)
+        self.assertEqual(
+            set(m.delivery.value for m in find_all(vast, "ad.inline.creatives[*].linear.media_files[*]")),
+            {"progressive"},
+        )
+
+    def test_empty_elements_are_expanded(self):
+        xml = b'<VAST version="2.0"><Ad id="1"><InLine><Creatives/></InLine></Ad></VAST>'
+
+        output = rewrite(xml, Rules().append("*/*/Creatives", b"<Creative/>"))
+
+        self.assertEqual(output, b'<VAST version="2.0"><Ad id="1"><InLine><Creatives><Creative/></Creatives></InLine></Ad></VAST>')
+
+    def test_text_of_empty_elements(self):
+        xml = b'<VAST version="2.0"><Ad id="1"><InLine><AdTitle a="1"/></InLine></Ad></VAST>'
+
+        output = rewrite(xml, Rules().replace_text("Ad/InLine/AdTitle", lambda text: text + u"title"))
+
+        self.assertEqual(output, b'<VAST version="2.0"><Ad id="1"><InLine><AdTitle a="1">title</AdTitle></InLine></Ad></VAST>')
+
+    def test_text_of_elements_with_children_is_not_replaced(self):
+        with self.assertRaises(RewriteError):
+            rewrite(self.xml, Rules().replace_text("Ad/InLine", to_cdn))
+
+    def test_unicode_declaring_another_encoding(self):
+        xml = (
+            u'<?xml version="1.0" encoding="ISO-8859-1" standalone="yes"?>'
+            u'<VAST version="2.0"><Ad id="1"><InLine><AdSystem>caf\xe9</AdSystem><AdTitle>t</AdTitle></InLine></Ad></VAST>'
+        )
+
+        output = rewrite(xml, Rules().replace_text("Ad/InLine/AdTitle", lambda text: u"th\xe9"))
+
+        self.assertEqual(output, xml.replace(u"ISO-8859-1", u"utf-8").replace(u">t<", u">th\xe9<").encode("utf-8"))
+        root = ElementTree.fromstring(output)
+        self.assertEqual(root.find("Ad/InLine/AdSystem").text, u"caf\xe9")
+        self.assertEqual(root.find("Ad/InLine/AdTitle").text, u"th\xe9")
+
+    def test_str_declaring_another_encoding(self):
+        xml = (
+            u'<?xml version="1.0" encoding="ISO-8859-1"?>'
+            u'<VAST version="2.0"><Ad id="1"><InLine><AdSystem>caf\xe9</AdSystem><AdTitle>t</AdTitle></InLine></Ad></VAST>'
+        ).encode("latin-1")
+
+        output = rewrite(xml, Rules().replace_text("Ad/InLine/AdTitle", lambda text: u"th\xe9"))
+
+        self.assertEqual(output, xml.replace(b">t<", u">th\xe9<".encode("latin-1")))
+
+    def test_str_and_unicode_chunks_are_not_mixed(self):
+        rewriter = Rewriter(Rules(), [].append)
+        rewriter.feed(b"<VAST")
+        with self.assertRaises(RewriteError):
+            rewriter.feed(u' version="2.0"/>')
+
+    def test_output_is_written_incrementally(self):
+        output = []
+        rewriter = Rewriter(Rules().replace_text(_MEDIA_FILE, to_cdn), output.append)
+        for i in xrange(0, len(self.xml), 64):
+            rewriter.feed(self.xml[i:i + 64])
+            # nothing is held back but the last few tags
+            self.assertLess(min(i + 64, len(self.xml)) - len(b"".join(output)), 512)
+            # and the rewriter holds no more than that of the input
+            self.assertLess(len(rewriter._buffer), 512)
+        rewriter.close()
+
+        self.assertEqual(b"".join(output), rewrite(self.xml, Rules().replace_text(_MEDIA_FILE, to_cdn)))
@@ -0,0 +1,147 @@
+import httplib
+import json
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from vast import resources, service
+from vast.service import ServiceServer, VastService
+
+
+class ServiceMixin(object):
+    def start(self, **service_kwargs):
+        self.service = VastService(**service_kwargs)
+        self.server = ServiceServer(("127.0.0.1", 0), self.service)
+        thread = threading.Thread(target=self.server.serve_forever, args=(0.01, ))
+        thread.daemon = True
+        thread.start()
+        self.connection = httplib.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+
+    def request(self, method, path, body=None):
+        self.connection.request(method, path, body)
+        response = self.connection.getresponse()
+        return response.status, json.loads(response.read())
+
+
+class TestService(ServiceMixin, TestCase):
+    def setUp(self):
+        self.start(workers=0)
+        with open(resources.SIMPLE_INLINE_XML, "rb") as fp:
+            self.xml = fp.read()
+
+    def test_parse(self):
+        status, response = self.request("POST", "/parse", self.xml)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(response["vast"]["version"], "2.0")
+
+    def test_validate(self):
+        self.assertEqual(self.request("POST", "/validate", self.xml), (200, {"valid": True}))
+
+    def test_invalid_document(self):
+        status, response = self.request("POST", "/parse", b"<VAST version='9.0'></VAST>")
+
+        self.assertEqual(status, 422)
+        self.assertEqual(response["error"], "UnsupportedVersionError")
+
+    def test_keep_alive_and_metrics(self):
+        for _ in xrange(3):
+            self.request("POST", "/validate", self.xml)
+        self.request("POST", "/validate", b"not xml")
+
+        status, metrics = self.request("GET", "/metrics")
+
+        self.assertEqual(status, 200)
+        self.assertEqual((metrics["count"], metrics["errors"], metrics["in_flight"]), (4, 1, 0))
+        self.assertIsNotNone(metrics["latency_p99"])
+
+    def test_too_large(self):
+        self.service.max_body = 10
+
+        self.assertEqual(self.request("POST", "/parse", self.xml)[0], 413)
+
+    def test_not_found(self):
+        self.assertEqual(self.request("GET", "/nothing")[0], 404)
+
+    def raw_request(self, headers):
+        client = socket.create_connection(self.server.server_address, timeout=10)
+        try:
+            head = b"".join(header + b"\r\n" for header in headers)
+            client.sendall(b"POST /parse HTTP/1.1\r\nHost: localhost\r\n%s\r\n" % head)
+            response = httplib.HTTPResponse(client)
+            response.begin()
+            return response.status, json.loads(response.read())
+        finally:
+            client.close()
+
+    def test_bad_content_length(self):
+        status, response = self.raw_request([b"Content-Length: ten"])
+
+        self.assertEqual(status, 400)
+        self.assertEqual(response["error"], "BadRequest")
+        self.assertEqual(self.raw_request([b"Content-Length: -1"])[0], 400)
+
+    def test_length_required(self):
+        self.assertEqual(self.raw_request([b"Transfer-Encoding: chunked"])[0], 411)
+        self.assertEqual(self.raw_request([])[0], 411)
+
+
+class TestLoadShedding(ServiceMixin, TestCase):
+    def test_rejects_when_saturated(self):
+        self.start(workers=0, max_in_flight=1)
+        # a document is in flight already
+        self.service._slots.acquire()
+
+        self.connection.request("POST", "/parse", b"<VAST/>")
+        response = self.connection.getresponse()
+        response.read()
+
+        self.assertEqual(response.status, 503)
+        self.assertEqual(response.getheader("retry-after"), "1")
+        self.assertEqual(self.service.rejected, 1)
+        self.service._slots.release()
+        self.assertEqual(self.request("POST", "/validate", b"<VAST/>")[0], 422)
+
+
+class TestWorkerProcesses(ServiceMixin, TestCase):
+    def test_parse_on_workers(self):
+        self.start(workers=1)
+        with open(resources.INLINE_MULTI_FILES_XML, "rb") as fp:
+            status, response = self.request("POST", "/parse", fp.read())
+
+        self.assertEqual(status, 200)
+        self.assertEqual(len(response["vast"]["ad"]["inline"]["creatives"][0]["linear"]["media_files"]), 7)
+
+
+def _slow_parse_document(xml, validate_only=False):
+    time.sleep(0.5)
+    return True, 0.5, dict(valid=True)
+
+
+class TestWorkerTimeouts(TestCase):
+    def setUp(self):
+        # workers are forked when the service is made, with the slow parse in place
+        self.addCleanup(setattr, service, "parse_document", service.parse_document)
+        service.parse_document = _slow_parse_document
+        self.service = VastService(workers=1, max_in_flight=1, timeout=0.05)
+        self.addCleanup(self.service.close)
+
+    def test_timed_out_documents_stay_in_flight(self):
+        self.assertEqual(self.service.parse(b"<VAST/>")[0], 504)
+        # the worker is still on it
+        self.assertEqual(self.service.parse(b"<VAST/>")[0], 503)
+        self.assertEqual(self.service.in_flight, 1)
+
+        for _ in xrange(500):
+            if self.service.in_flight == 0:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.service.in_flight, 0)
+        self.assertEqual(self.service.rejected, 1)
@@ -0,0 +1,130 @@
+import random
+from unittest import TestCase
+
+from vast import resources
+from vast.models import vast_v2
+from vast.parsers import xml_parser
+from vast.slots import HTML, IFRAME, STATIC, SlotIndex, resource_types
+
+
+def _companion(width, height, id, html=True):
+    return vast_v2.CompanionAd.make(
+        width=width,
+        height=height,
+        id=id,
+        html_resource=u"https://h.u/%s" % id if html else None,
+        static_resource=None if html else vast_v2.StaticResource.make(u"https://s.u/%s" % id, u"image/png"),
+    )
+
+
+class _CountingAd(object):
+    """
+    Ad counting how many times its size is looked at
+    """
+    looked_at = 0
+
+    def __init__(self, width, height, html=True):
+        self._width = width
+        self._height = height
+        self.static_resource = None if html else u"https://s.u/"
+        self.iframe_resource = None
+        self.html_resource = u"https://h.u/" if html else None
+
+    @property
+    def width(self):
+        _CountingAd.looked_at += 1
+        return self._width
+
+    @property
+    def height(self):
+        _CountingAd.looked_at += 1
+        return self._height
+
+
+def _brute_force_fit(ads, width, height, accept):
+    fitting = [
+        (a.width * a.height, -abs(float(a.width) / a.height - float(width) / height), -i, a)
+        for i, a in enumerate(ads)
+        if a.width <= width and a.height <= height and resource_types(a) & frozenset(accept)
+    ]
+    return max(fitting)[3] if fitting else None
+
+
+class TestSlotIndex(TestCase):
+    def setUp(self):
+        self.ads = [
+            _companion(300, 250, u"medium_rectangle"),
+            _companion(728, 90, u"leaderboard"),
+            _companion(300, 250, u"medium_rectangle_static", html=False),
+            _companion(160, 600, u"skyscraper"),
+            _companion(300, 100, u"banner"),
+            _companion(200, 200, u"square"),
+        ]
+        self.index = SlotIndex(self.ads)
+
+    def test_exact_size(self):
+        self.assertEqual(self.index.best_fit(300, 250).id, u"medium_rectangle")
+        self.assertEqual(self.index.best_fit(300, 250, accept=(STATIC, )).id, u"medium_rectangle_static")
+        self.assertEqual(
+            [a.id for a in self.index.exact(300, 250)],
+            [u"medium_rectangle", u"medium_rectangle_static"],
+        )
+
+    def test_largest_fitting(self):
+        self.assertEqual(self.index.best_fit(320, 260).id, u"medium_rectangle")
+        self.assertEqual(self.index.best_fit(300, 600).id, u"skyscraper")
+        self.assertEqual(self.index.best_fit(170, 700).id, u"skyscraper")
+
+    def test_aspect_ratio_breaks_ties(self):
+        index = SlotIndex([_companion(100, 400, u"tall"), _companion(400, 100, u"wide")])
+
+        self.assertEqual(index.best_fit(500, 200).id, u"wide")
+        self.assertEqual(index.best_fit(200, 500).id, u"tall")
+
+    def test_nothing_fits(self):
+        self.assertIsNone(self.index.best_fit(100, 100))
+        self.assertIsNone(self.index.best_fit(300, 250, accept=(IFRAME, )))
+
+    def test_nothing_fits_without_going_through_the_ads(self):
+        # wider or higher than the slot, with smaller areas
+        ads = [_CountingAd(1000 + i, 1) for i in range(500)] + [_CountingAd(1, 1000 + i) for i in range(500)]
+        index = SlotIndex(ads)
+        # builds the index of the accepted resource types
+        self.assertIsNone(index.best_fit(999, 999))
+        self.assertIsNone(index.best_fit(999, 999, accept=(STATIC, )))
+
+        _CountingAd.looked_at = 0
+        self.assertIsNone(index.best_fit(999, 999))
+        self.assertIsNone(index.best_fit(500, 999))
+        self.assertIsNone(index.best_fit(1200, 999, accept=(STATIC, )))
+        self.assertEqual(_CountingAd.looked_at, 0)
+
+    def test_same_as_brute_force(self):
+        rng = random.Random(7)
+        ads = [
+            _companion(
+                rng.choice((100, 120, 160, 300, 728)), rng.choice((50, 90, 250, 600)), unicode(i), rng.random() < 0.5,
+            )
+            for i in range(200)
+        ]
+        index = SlotIndex(ads)
+
+        for _ in range(300):
+            width, height = rng.randint(40, 800), rng.randint(40, 700)
+            accept = rng.choice(((HTML, ), (STATIC, ), (STATIC, HTML), (IFRAME, )))
+            self.assertIs(index.best_fit(width, height, accept), _brute_force_fit(ads, width, height, accept))
+
+    def test_from_parsed_creatives(self):
+        vast = xml_parser.from_xml_file(resources.INLINE_WITH_COMPANION_ADS)
+        index = SlotIndex.from_creatives(vast.ad.inline.creatives)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.best_fit(300, 700, accept=(HTML, )).id, u"companion_ad_2")
+        self.assertEqual(index.best_fit(150, 250).id, u"companion_ad_1")
+
+    def test_non_linears(self):
+        vast = xml_parser.from_xml_file(resources.INLINE_WITH_NON_LINEAR_ADS)
+        index = SlotIndex.from_creatives(vast.ad.inline.creatives, companions=False, non_linears=True)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(resource_types(index.best_fit(300, 700)), frozenset([HTML]))
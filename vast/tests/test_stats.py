@@ -0,0 +1,147 @@
+import pickle
+import random
+from unittest import TestCase
+
+from vast.errors import NotVastError
+from vast.models import vast_v2
+from vast.models.tests.vast_v2_model_mixin import VastModelMixin
+from vast.stats import CorpusStats, HeavyHitters, Histogram, QuantileSketch
+
+
+class TestHistogram(TestCase):
+    def test_buckets(self):
+        histogram = Histogram((10, 20))
+        histogram.add_all([0, 9, 10, 19, 20, 100])
+        histogram.add(15, 3)
+
+        self.assertEqual(histogram.buckets(), [(None, 10, 2), (10, 20, 5), (20, None, 2)])
+        self.assertEqual(histogram.count, 9)
+
+    def test_merge(self):
+        a, b = Histogram((10, 20)), Histogram((10, 20))
+        a.add(5)
+        b.add(25)
+
+        self.assertEqual(a.merge(b).counts, [1, 0, 1])
+        self.assertRaises(ValueError, a.merge, Histogram((10, )))
+
+    def test_bounds_must_increase(self):
+        self.assertRaises(ValueError, Histogram, (2, 1))
+
+
+class TestHeavyHitters(TestCase):
+    def make_values(self, seed):
+        rng = random.Random(seed)
+        # a few frequent values in a long tail of rare ones
+        return [rng.choice("abcde") if rng.random() < 0.5 else rng.randint(0, 10000) for _ in xrange(20000)]
+
+    def assertBounded(self, hitters, values):
+        counts = {}
+        for value in values:
+            counts[value] = counts.get(value, 0) + 1
+        self.assertLessEqual(hitters.error(), len(values) / (hitters.capacity + 1))
+        for value, count in hitters.top():
+            self.assertLessEqual(count, counts[value])
+            self.assertGreaterEqual(count, counts[value] - hitters.error())
+        self.assertEqual(sorted(v for v, _ in hitters.top(5)), list("abcde"))
+
+    def test_counts(self):
+        hitters = HeavyHitters(capacity=20)
+        values = self.make_values(0)
+        hitters.add_all(values)
+
+        self.assertBounded(hitters, values)
+        self.assertLessEqual(len(hitters._counts), 40)
+        self.assertLessEqual(len(hitters.top()), 20)
+
+    def test_exact_within_capacity(self):
+        hitters = HeavyHitters(capacity=3)
+        hitters.add_all("aabbbc")
+        hitters.add("c", 5)
+
+        self.assertEqual(hitters.top(), [("c", 6), ("b", 3), ("a", 2)])
+        self.assertEqual(hitters.error(), 0)
+
+    def test_merge(self):
+        shards = [self.make_values(seed) for seed in xrange(4)]
+        merged = HeavyHitters(capacity=20)
+        for shard in shards:
+            hitters = HeavyHitters(capacity=20)
+            hitters.add_all(shard)
+            merged.merge(pickle.loads(pickle.dumps(hitters)))
+
+        self.assertBounded(merged, sum(shards, []))
+        self.assertEqual(merged.count, 80000)
+
+
+class TestQuantileSketch(TestCase):
+    def assertQuantiles(self, sketch, values, qs=(0, 0.1, 0.5, 0.9, 0.99, 1)):
+        values = sorted(values)
+        for q, estimate in zip(qs, sketch.quantiles(qs)):
+            expected = values[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(estimate - expected), expected * sketch.relative_accuracy + 1e-9)
+
+    def test_quantiles(self):
+        rng = random.Random(0)
+        values = [rng.lognormvariate(3, 1) for _ in xrange(10000)] + [0] * 100
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        sketch.add_all(values)
+
+        self.assertQuantiles(sketch, values)
+        self.assertEqual((sketch.count, sketch.zero_count, sketch.min), (10100, 100, 0))
+        self.assertLess(len(sketch._buckets), 1000)
+
+    def test_merge(self):
+        rng = random.Random(1)
+        shards = [[rng.randint(1, 120) for _ in xrange(1000)] for _ in xrange(4)]
+        merged = QuantileSketch()
+        for shard in shards:
+            sketch = QuantileSketch()
+            sketch.add_all(shard)
+            merged.merge(pickle.loads(pickle.dumps(sketch)))
+
+        self.assertQuantiles(merged, sum(shards, []))
+        self.assertRaises(ValueError, merged.merge, QuantileSketch(relative_accuracy=0.02))
+
+    def test_collapse_keeps_high_quantiles(self):
+        values = [10 ** (i / 100.0) for i in xrange(1000)]
+        sketch = QuantileSketch(max_buckets=100)
+        sketch.add_all(values)
+
+        self.assertEqual(len(sketch._buckets), 100)
+        self.assertQuantiles(sketch, values, qs=(0.95, 0.99, 1))
+        self.assertEqual(sketch.count, 1000)
+
+    def test_empty(self):
+        self.assertEqual(QuantileSketch().quantiles((0.5, 0.9)), [None, None])
+
+    def test_negative(self):
+        self.assertRaises(ValueError, QuantileSketch().add, -1)
+
+
+class TestCorpusStats(VastModelMixin, TestCase):
+    def test_add(self):
+        stats = CorpusStats()
+        vast = self.make_vast(ad=vast_v2.Ad.make_inline(id=u"1", inline=self.make_inline(creatives=[
+            self.make_creative(linear=self.make_linear_creative(duration=30)),
+        ])))
+        stats.add(vast, wrapper_depth=2)
+        stats.add(self.make_vast())
+        stats.add_error(NotVastError("html"))
+        stats.add_error("NoAdError")
+
+        d = stats.as_dict()
+        self.assertEqual(d["documents"], 4)
+        self.assertEqual(d["durations"]["p50"], 30)
+        self.assertEqual(d["mime_types"]["top"], [dict(value="video/mp4", count=1)])
+        self.assertEqual(d["wrapper_depths"]["count"], 1)
+        self.assertEqual(sorted(e["value"] for e in d["errors"]["top"]), ["NoAdError", "NotVastError"])
+        self.assertEqual(stats.ad_systems.count, 2)
+
+    def test_merge(self):
+        a, b = CorpusStats(), CorpusStats()
+        a.add(self.make_vast())
+        b.add_error("NoAdError")
+
+        merged = a.merge(pickle.loads(pickle.dumps(b)))
+        self.assertEqual((merged.documents, merged.ad_systems.count, merged.errors.count), (2, 1, 1))
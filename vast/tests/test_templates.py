@@ -0,0 +1,84 @@
+import os
+from unittest import TestCase
+
+from vast import resources
+from vast.errors import TemplateError
+from vast.models import vast_v2
+from vast.models.tests.vast_v2_model_mixin import VastModelMixin
+from vast.parsers import xml_parser
+from vast.templates import Template, number, text, to_xml, uri_component
+
+
+class TestToXml(TestCase):
+    def test_documents_are_rendered_as_parsed(self):
+        for name in os.listdir(os.path.dirname(resources.SIMPLE_INLINE_XML)):
+            if name.endswith(".xml"):
+                vast = xml_parser.from_xml_file(os.path.join(os.path.dirname(resources.SIMPLE_INLINE_XML), name))
+
+                self.assertEqual(xml_parser.from_xml_bytes(to_xml(vast)), vast, name)
+
+
+class TestTemplate(VastModelMixin, TestCase):
+    def make_template_vast(self, duration=15):
+        inline = self.make_inline(
+            impression=u"https://imp.u/i?id=${impression_id}&cb=${cb}",
+            creatives=[self.make_creative(linear=vast_v2.Linear.make(
+                duration=duration,
+                media_files=self.make_media_files(),
+                tracking_events=[self.make_tracking_event(u"https://trk.u/start?id=${impression_id}", u"start")],
+            ))],
+        )
+        return self.make_vast(ad=vast_v2.Ad.make_inline(id=u"${ad_id}", inline=inline))
+
+    def test_render(self):
+        template = Template(
+            self.make_template_vast(),
+            (uri_component("impression_id"), number("cb"), text("ad_id")),
+        )
+
+        vast = xml_parser.from_xml_bytes(template.render(impression_id=u"a b/\xe9", cb=42, ad_id=u'"1" & <2>'))
+
+        self.assertEqual(vast.ad.id, u'"1" & <2>')
+        self.assertEqual(vast.ad.inline.impression, u"https://imp.u/i?id=a%20b%2F%C3%A9&cb=42")
+        tracking_event = vast.ad.inline.creatives[0].linear.tracking_events[0]
+        self.assertEqual(tracking_event.tracking_event_uri, u"https://trk.u/start?id=a%20b%2F%C3%A9")
+
+    def test_without_slots(self):
+        vast = self.make_template_vast(duration=150)
+
+        self.assertEqual(Template(vast).render(), to_xml(vast))
+        self.assertEqual(xml_parser.from_xml_bytes(to_xml(vast)).ad.inline.creatives[0].linear.duration, 150)
+
+    def test_slot_values_are_typed(self):
+        template = Template(self.make_template_vast(), (text("impression_id"), number("cb"), text("ad_id")))
+
+        with self.assertRaises(TypeError):
+            template.render(impression_id=u"1", cb=u"42", ad_id=u"1")
+        with self.assertRaises(TypeError):
+            template.render(impression_id=u"1", ad_id=u"1")
+
+    def test_slots_must_be_marked(self):
+        with self.assertRaises(TemplateError):
+            Template(self.make_template_vast(), (text("impression_id"), text("nothing")))
+
+    def test_slot_names(self):
+        with self.assertRaises(TemplateError):
+            Template(self.make_template_vast(), (text("impression_id"), text("impression_id")))
+        with self.assertRaises(TemplateError):
+            Template(self.make_template_vast(), (text("not a name"), ))
+        with self.assertRaises(TemplateError):
+            Template(self.make_template_vast(), (text("_join"), ))
+
+    def test_values_which_are_not_rendered(self):
+        with vast_v2.max_ad_parameters(4):
+            ad_parameters = vast_v2.AdParameters.make(data=u"{large: payload}")
+        vast = self.make_vast(ad=self.make_inline_ad(inline=self.make_inline(creatives=[
+            self.make_creative(linear=vast_v2.Linear.make(
+                duration=15,
+                media_files=self.make_media_files(),
+                ad_parameters=ad_parameters,
+            )),
+        ])))
+
+        with self.assertRaises(TemplateError):
+            Template(vast)
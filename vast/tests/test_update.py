@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+import attr
+
+from vast import resources
+from vast.errors import IllegalModelStateError
+from vast.models import vast_v2
+from vast.parsers import xml_parser
+from vast.query import find_all
+from vast.update import replace, update
+
+_ASSETS = "ad.inline.creatives[*].linear.media_files[*].asset"
+
+
+class TestUpdate(TestCase):
+    def setUp(self):
+        self.vast = xml_parser.from_xml_file(resources.INLINE_MULTI_FILES_XML)
+
+    def test_update_all_matches(self):
+        updated = update(self.vast, _ASSETS, lambda uri: uri.replace(u"https://", u"https://cdn.example.com/"))
+
+        self.assertTrue(find_all(updated, _ASSETS))
+        for old, new in zip(find_all(self.vast, _ASSETS), find_all(updated, _ASSETS)):
+            self.assertTrue(new.startswith(u"https://cdn.example.com/"))
+            self.assertEqual(new, old.replace(u"https://", u"https://cdn.example.com/"))
+
+    def test_original_is_unchanged(self):
+        before = find_all(self.vast, _ASSETS)
+
+        update(self.vast, _ASSETS, lambda uri: u"https://other.u/a.mp4")
+
+        self.assertEqual(find_all(self.vast, _ASSETS), before)
+
+    def test_untouched_subtrees_are_shared(self):
+        updated = replace(self.vast, "ad.inline.creatives[0].linear.media_files[0].asset", u"https://other.u/a.mp4")
+
+        old_linear = self.vast.ad.inline.creatives[0].linear
+        new_linear = updated.ad.inline.creatives[0].linear
+        self.assertIsNot(new_linear, old_linear)
+        self.assertEqual(new_linear.media_files[0].asset, u"https://other.u/a.mp4")
+        self.assertIs(new_linear.media_files[1], old_linear.media_files[1])
+        self.assertIs(new_linear.video_clicks, old_linear.video_clicks)
+        self.assertIs(new_linear.tracking_events, old_linear.tracking_events)
+
+    def test_no_change_returns_root(self):
+        self.assertIs(update(self.vast, _ASSETS, lambda uri: uri), self.vast)
+        self.assertIs(update(self.vast, "ad.wrapper.creatives[*]", lambda c: None), self.vast)
+
+    def test_changed_node_is_validated(self):
+        with self.assertRaises(IllegalModelStateError):
+            replace(self.vast, "ad.inline.creatives[0].linear.media_files[0].width", -1)
+
+    def test_changed_values_are_converted(self):
+        updated = replace(self.vast, "ad.inline.creatives[0].linear.media_files[0].delivery", u"streaming")
+
+        self.assertEqual(
+            updated.ad.inline.creatives[0].linear.media_files[0].delivery,
+            vast_v2.Delivery.STREAMING,
+        )
+
+    def test_replaced_models_are_class_checked(self):
+        with self.assertRaises(IllegalModelStateError):
+            replace(self.vast, "ad.inline.creatives[0].linear", self.vast.ad.inline)
+
+    def test_ancestors_are_not_made_again(self):
+        # not valid through make, and left as is as the update cannot affect the version
+        vast = attr.evolve(self.vast, version=u"3.0")
+
+        updated = replace(vast, "ad.inline.creatives[0].linear.media_files[0].asset", u"https://other.u/a.mp4")
+
+        self.assertEqual(updated.version, u"3.0")
+
+    def test_ad_parameters(self):
+        vast = xml_parser.from_xml_file(resources.INLINE_WITH_AD_PARAMETERS)
+
+        updated = replace(vast, "ad.inline.creatives[*].linear.ad_parameters.data", u"{}")
+        updated = replace(updated, "ad.inline.creatives[*].linear.media_files[0].width", 640)
+
+        linear = updated.ad.inline.creatives[0].linear
+        self.assertEqual(linear.ad_parameters.json(), {})
+        self.assertEqual(linear.media_files[0].width, 640)
+
+    def test_dropped_ad_parameters(self):
+        vast = xml_parser.from_xml_file(resources.INLINE_WITH_AD_PARAMETERS, max_ad_parameters=1)
+        dropped = vast.ad.inline.creatives[0].linear.ad_parameters
+
+        updated = replace(vast, "ad.inline.creatives[*].linear.ad_parameters.xml_encoded", True)
+
+        ad_parameters = updated.ad.inline.creatives[0].linear.ad_parameters
+        self.assertEqual((ad_parameters.data, ad_parameters.dropped_size), (None, dropped.dropped_size))
+        self.assertTrue(ad_parameters.xml_encoded)
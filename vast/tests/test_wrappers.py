@@ -0,0 +1,180 @@
+import socket
+from unittest import TestCase
+
+from vast import resources
+from vast.deadline import Deadline
+from vast.errors import DeadlineExceededError, UnwrapError
+from vast.models import vast_v2
+from vast.models.tests.vast_v2_model_mixin import VastModelMixin
+from vast.parsers import xml_parser
+from vast.wrappers import flatten, unwrap
+
+
+START = vast_v2.TrackingEventType.START
+COMPLETE = vast_v2.TrackingEventType.COMPLETE
+
+
+class TestFlatten(VastModelMixin, TestCase):
+    def make_tracked_creative(self, *events):
+        return self.make_creative(
+            linear=vast_v2.Linear.make(
+                duration=15,
+                media_files=self.make_media_files(),
+                tracking_events=[self.make_tracking_event(uri, event) for uri, event in events],
+            ),
+        )
+
+    def make_wrapper_hop(self, name, creatives=None):
+        return self.make_vast(
+            ad=self.make_wrapper_ad(
+                wrapper=self.make_wrapper(
+                    impression=u"https://imp.u/" + name,
+                    error=u"https://err.u/shared",
+                    creatives=creatives,
+                ),
+            ),
+        )
+
+    def make_inline_hop(self, creatives=None):
+        return self.make_vast(ad=self.make_inline_ad(inline=self.make_inline(creatives=creatives)))
+
+    def test_chain_is_merged(self):
+        inline_creative = self.make_tracked_creative((u"https://trk.u/inline/start", u"start"))
+        inline_hop = self.make_inline_hop(creatives=[inline_creative])
+        chain = [
+            self.make_wrapper_hop("w1", [self.make_tracked_creative(
+                (u"https://trk.u/w1/start", u"start"),
+                (u"https://trk.u/w1/complete", u"complete"),
+            )]),
+            self.make_wrapper_hop("w2", [self.make_tracked_creative(
+                (u"https://trk.u/w1/start", u"start"),
+                (u"https://trk.u/w2/start", u"start"),
+            )]),
+            inline_hop,
+        ]
+
+        flat = flatten(chain)
+
+        self.assertEqual(flat.depth, 2)
+        self.assertIs(flat.inline, inline_hop.ad.inline)
+        self.assertIs(flat.creatives, inline_hop.ad.inline.creatives)
+        self.assertEqual(
+            flat.impressions,
+            (u"https://imp.u/w1", u"https://imp.u/w2", u"https://www.mag_impression.com"),
+        )
+        self.assertEqual(flat.errors, (u"https://err.u/shared", ))
+        self.assertEqual(
+            flat.wrapper_tracking_uris(START),
+            (u"https://trk.u/w1/start", u"https://trk.u/w2/start"),
+        )
+        self.assertEqual(
+            flat.tracking_uris(START, inline_creative),
+            (u"https://trk.u/w1/start", u"https://trk.u/w2/start", u"https://trk.u/inline/start"),
+        )
+        self.assertEqual(flat.tracking_uris(COMPLETE, inline_creative), (u"https://trk.u/w1/complete", ))
+        self.assertEqual(flat.wrapper_tracking_uris(vast_v2.TrackingEventType.MUTE), ())
+
+    def test_parsed_chain_is_merged(self):
+        with open(resources.WRAPPER_WITH_TRACKING_EVENTS_XML, "rb") as fp:
+            wrapper_hop = xml_parser.from_xml_bytes(fp.read())
+        with open(resources.INLINE_WITH_TRACKING_EVENTS_XML, "rb") as fp:
+            inline_hop = xml_parser.from_xml_bytes(fp.read())
+
+        flat = flatten([wrapper_hop, inline_hop])
+
+        self.assertEqual(flat.depth, 1)
+        self.assertEqual(flat.impressions, (u"https://magu.d.com/vidimp", u"https://mag.dom.com/admy?ad_id=509080ATOU"))
+        self.assertEqual(flat.errors, (u"https://magu.d.com/viderr?err=[ERRORCODE]", ))
+        self.assertEqual(flat.wrapper_tracking_uris(START), (u"https://magu.d.com/vidtrk?evt=start", ))
+        self.assertEqual(
+            flat.wrapper_tracking_uris(vast_v2.TrackingEventType.MUTE),
+            (u"https://magu.d.com/vidtrk?evt=mute", ),
+        )
+        self.assertEqual(
+            flat.tracking_uris(COMPLETE, flat.creatives[0]),
+            (u"https://magu.d.com/vidtrk?evt=complete", u"https://mag.dom.com/vidtrk?evt=complete"),
+        )
+
+    def test_inline_only(self):
+        flat = flatten([self.make_inline_hop()])
+
+        self.assertEqual(flat.depth, 0)
+        self.assertEqual(flat.errors, ())
+
+    def test_illegal_chains(self):
+        with self.assertRaises(UnwrapError):
+            flatten([])
+        with self.assertRaises(UnwrapError):
+            flatten([self.make_wrapper_hop("w1")])
+        with self.assertRaises(UnwrapError):
+            flatten([self.make_inline_hop(), self.make_inline_hop()])
+
+
+class TestUnwrap(TestCase):
+    def setUp(self):
+        with open(resources.SIMPLE_WRAPPER_XML, "rb") as fp:
+            self.wrapper_xml = fp.read()
+        with open(resources.SIMPLE_INLINE_XML, "rb") as fp:
+            self.inline_xml = fp.read()
+        self.wrapper = xml_parser.from_xml_bytes(self.wrapper_xml)
+        self.now = 0.0
+        self.fetched = []
+
+    def clock(self):
+        return self.now
+
+    def fetch_after(self, hops, seconds=0.03):
+        """
+        Fetch of hops wrappers and then an inline ad, taking seconds each
+        """
+        def fetch(url, timeout=None):
+            self.fetched.append((url, timeout))
+            self.now += seconds
+            if timeout is not None and seconds > timeout:
+                raise socket.timeout("timed out")
+            return self.wrapper_xml if len(self.fetched) <= hops else self.inline_xml
+        return fetch
+
+    def test_chain_is_fetched(self):
+        flat = unwrap(self.wrapper, fetch=self.fetch_after(1))
+
+        self.assertEqual(flat.depth, 2)
+        self.assertEqual(flat.ad_id, u"509080ATOU")
+        self.assertEqual(self.fetched, [(u"//vast.dv.com/v3/vast?_vast", None)] * 2)
+
+    def test_max_depth(self):
+        with self.assertRaises(UnwrapError):
+            unwrap(self.wrapper, fetch=self.fetch_after(10), max_depth=3)
+
+    def test_fetch_errors(self):
+        def fetch(url):
+            raise IOError("connection refused")
+
+        with self.assertRaises(UnwrapError):
+            unwrap(self.wrapper, fetch=fetch)
+
+    def test_within_deadline(self):
+        deadline = Deadline(0.1, clock=self.clock)
+
+        unwrap(self.wrapper, fetch=self.fetch_after(1), deadline=deadline)
+
+        self.assertEqual(deadline.usage.keys(), ["fetch", "xml", "models", "flatten"])
+        self.assertAlmostEqual(deadline.usage["fetch"], 0.06)
+        # fetches time out by the time left
+        self.assertEqual([timeout for _, timeout in self.fetched], [0.1, 0.1 - 0.03])
+
+    def test_checked_between_hops(self):
+        deadline = Deadline(0.1, clock=self.clock)
+
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            unwrap(self.wrapper, fetch=self.fetch_after(5, seconds=0.05), deadline=deadline)
+        # the last fetched hop was not parsed by the deadline
+        self.assertEqual(len(ctx.exception.partial), 2)
+        self.assertAlmostEqual(ctx.exception.usage["fetch"], 0.1)
+
+    def test_fetch_timing_out(self):
+        deadline = Deadline(0.1, clock=self.clock)
+
+        with self.assertRaises(DeadlineExceededError) as ctx:
+            unwrap(self.wrapper, fetch=self.fetch_after(5, seconds=0.2), deadline=deadline)
+        self.assertEqual(ctx.exception.partial, [self.wrapper])
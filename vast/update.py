@@ -0,0 +1,127 @@
+"""
+Copy on write updates of model trees
+
+Models are frozen, so an update returns a new tree:
+
+    vast = update(vast, "ad.inline.creatives[*].linear.media_files[*].asset", to_cdn)
+
+Paths are those of vast.query, and as there, missing (None) values are skipped.
+Only the nodes on the way to the changed values are rebuilt, every other node is shared with the original tree.
+
+Only what a change can affect is validated again:
+a node whose own values changed is made again through its make method,
+while its ancestors, where a child model was replaced by another one,
+only check the class of the replacement.
+"""
+import attr
+
+from vast.models.shared import check_replacements
+from vast.query import ALL, matches, parse_path
+
+
+def update(root, expr, fn):
+    """
+
+    :param root: model to update
+    :param expr: path expression
+    :param fn: function from the current value at the path to the new one
+    :return: updated root, root itself if fn changed nothing
+    :raises: IllegalModelStateError if a new value is not valid
+    """
+    return _update(root, parse_path(expr), fn)
+
+
+def replace(root, expr, value):
+    """
+
+    :param root: model to update
+    :param expr: path expression
+    :param value: new value for every value at the path
+    :return: updated root
+    :raises: IllegalModelStateError if value is not valid
+    """
+    return update(root, expr, lambda _: value)
+
+
+def _update(node, steps, fn):
+    if not steps:
+        return fn(node)
+
+    cls = node.__class__
+    if not attr.has(cls):
+        return node
+
+    step, rest = steps[0], steps[1:]
+    if step.name == ALL:
+        names = [a.name for a in attr.fields(cls)]
+    elif hasattr(node, step.name):
+        names = [step.name]
+    else:
+        return node
+
+    changes = {}
+    for name in names:
+        value = getattr(node, name)
+        if value is None:
+            continue
+        new_value = _update_selected(value, step.selector, rest, fn)
+        if new_value is not value:
+            changes[name] = new_value
+    if not changes:
+        return node
+    return _rebuild(node, changes)
+
+
+def _update_selected(value, selector, steps, fn):
+    if selector is None:
+        return _update(value, steps, fn)
+    if not isinstance(value, (list, tuple)):
+        return value
+
+    items = list(value)
+    changed = False
+    for i, item in enumerate(items):
+        if not _is_selected(selector, i, item, len(items)):
+            continue
+        new_item = _update(item, steps, fn)
+        if new_item is not item:
+            items[i] = new_item
+            changed = True
+    if not changed:
+        return value
+    return tuple(items) if isinstance(value, tuple) else items
+
+
+def _is_selected(selector, i, item, size):
+    if selector == ALL:
+        return True
+    if isinstance(selector, int):
+        return i == (selector + size if selector < 0 else selector)
+    name, expected = selector
+    return matches(getattr(item, name, None), expected)
+
+
+def _is_model(value):
+    return attr.has(value.__class__)
+
+
+def _is_replacement(old, new):
+    """
+    :return: True if new replaces the child model, or list of child models, old
+    """
+    if old is None or new is None:
+        return False
+    if isinstance(old, (list, tuple)):
+        return isinstance(new, (list, tuple)) and all(_is_model(v) for v in new)
+    return _is_model(old) and _is_model(new)
+
+
+def _rebuild(node, changes):
+    cls = node.__class__
+    if all(_is_replacement(getattr(node, name), value) for name, value in changes.items()):
+        check_replacements(cls, changes)
+        return attr.evolve(node, **changes)
+
+    kwargs = dict((a.name, getattr(node, a.name)) for a in attr.fields(cls))
+    kwargs.update(changes)
+    return cls.make(**kwargs)
@@ -0,0 +1,184 @@
+"""
+Wrapper chain resolution
+
+A wrapper ad points at the next VAST response in the chain, until one of them is an inline ad.
+The impression, error and tracking URIs of every wrapper in the chain have to be reported
+along with the ones of the inline ad, which flatten merges into a single view.
+unwrap fetches the chain hop by hop before flattening it, within an optional Deadline.
+"""
+from collections import OrderedDict
+
+import attr
+
+from vast.errors import DeadlineExceededError, UnwrapError
+from vast.parsers import xml_parser
+from vast.prefetch import urllib2_fetch
+
+
+@attr.s(frozen=True)
+class FlatInline(object):
+    """
+    Merged view of a wrapper chain ending in an inline ad.
+
+    The inline model is shared, not copied.
+    URIs are ordered by chain hop and deduplicated.
+    """
+    ad_id = attr.ib()
+    inline = attr.ib()
+    impressions = attr.ib()
+    errors = attr.ib()
+    wrapper_tracking_events = attr.ib()
+    depth = attr.ib()
+
+    def __attrs_post_init__(self):
+        object.__setattr__(self, "_wrapper_tracking_index", dict(self.wrapper_tracking_events))
+
+    @property
+    def creatives(self):
+        return self.inline.creatives
+
+    def wrapper_tracking_uris(self, event_type):
+        """
+
+        :param event_type: TrackingEventType
+        :return: tuple of URIs for event type, from all wrappers in the chain
+        """
+        return self._wrapper_tracking_index.get(event_type, ())
+
+    def tracking_uris(self, event_type, creative):
+        """
+
+        :param event_type: TrackingEventType
+        :param creative: one of the inline creatives
+        :return: tuple of URIs to report for event type on creative, wrapper ones first
+        """
+        uris = _Merger()
+        uris.add_all(self.wrapper_tracking_uris(event_type))
+        for tracking_event in _iter_tracking_events(creative):
+            if tracking_event.tracking_event_type == event_type:
+                uris.add(tracking_event.tracking_event_uri)
+        return uris.as_tuple()
+
+
+class _Merger(object):
+    """
+    Ordered, deduplicating collection of values
+    """
+
+    def __init__(self):
+        self._values = OrderedDict()
+
+    def add(self, value):
+        if value is not None:
+            self._values[value] = None
+
+    def add_all(self, values):
+        for value in values:
+            self.add(value)
+
+    def as_tuple(self):
+        return tuple(self._values)
+
+
+def _iter_tracking_events(creative):
+    for container in (creative.linear, creative.non_linear):
+        if container is not None and container.tracking_events:
+            for tracking_event in container.tracking_events:
+                yield tracking_event
+
+
+def flatten(chain):
+    """
+
+    :param chain: list of Vast objects, ordered from the first wrapper to the inline ad response
+    :return: FlatInline
+    :raises: UnwrapError if chain does not consist of wrappers ending with an inline ad
+    """
+    if not chain:
+        raise UnwrapError("cannot flatten an empty chain")
+
+    impressions = _Merger()
+    errors = _Merger()
+    tracking = OrderedDict()
+
+    for hop, vast in enumerate(chain[:-1]):
+        wrapper = vast.ad.wrapper
+        if wrapper is None:
+            raise UnwrapError("chain hop %d is not a wrapper ad" % hop)
+        impressions.add(wrapper.impression)
+        errors.add(wrapper.error)
+        for creative in wrapper.creatives or ():
+            for tracking_event in _iter_tracking_events(creative):
+                merger = tracking.get(tracking_event.tracking_event_type)
+                if merger is None:
+                    merger = tracking[tracking_event.tracking_event_type] = _Merger()
+                merger.add(tracking_event.tracking_event_uri)
+
+    ad = chain[-1].ad
+    if ad.inline is None:
+        raise UnwrapError("last chain hop is not an inline ad")
+    impressions.add(ad.inline.impression)
+
+    return FlatInline(
+        ad_id=ad.id,
+        inline=ad.inline,
+        impressions=impressions.as_tuple(),
+        errors=errors.as_tuple(),
+        wrapper_tracking_events=tuple(
+            (event_type, merger.as_tuple()) for event_type, merger in tracking.items()
+        ),
+        depth=len(chain) - 1,
+    )
+
+
+def unwrap(vast, fetch=urllib2_fetch, max_depth=5, deadline=None, **parser_kwargs):
+    """
+    Resolve a wrapper chain, fetching the VAST ad tag URI of each wrapper until an inline ad
+
+    :param vast: Vast object of the first hop
+    :param fetch: function of url and timeout in seconds, returning content bytes
+    :param max_depth: max number of wrappers followed
+    :param deadline: optional Deadline, checked between hops and while parsing them,
+    fetches time out by its remaining time, recording the usage of stages "fetch" and "flatten" as well as parsing ones
+    :param parser_kwargs: pass on to xml_parser.from_xml_bytes
+    :return: FlatInline
+    :raises: UnwrapError if the chain cannot be resolved,
+    DeadlineExceededError once past the deadline, carrying the chain of Vast objects resolved so far
+    """
+    chain = [vast]
+    while chain[-1].ad.wrapper is not None:
+        if len(chain) > max_depth:
+            raise UnwrapError("chain is deeper than %d wrappers" % max_depth)
+        uri = chain[-1].ad.wrapper.vast_ad_tag_uri
+        if deadline is not None:
+            deadline.check(chain)
+        try:
+            chain.append(_fetch_hop(fetch, uri, len(chain), deadline, **parser_kwargs))
+        except DeadlineExceededError as e:
+            raise DeadlineExceededError(e.budget, e.elapsed, e.usage, chain)
+        except UnwrapError:
+            if deadline is not None:
+                # fetches time out by the deadline
+                deadline.check(chain)
+            raise
+
+    if deadline is None:
+        return flatten(chain)
+    with deadline.stage("flatten"):
+        return flatten(chain)
+
+
+def _fetch_hop(fetch, uri, hop, deadline=None, **parser_kwargs):
+    if deadline is None:
+        content = _fetch(fetch, uri, hop)
+    else:
+        with deadline.stage("fetch"):
+            content = _fetch(fetch, uri, hop, deadline.remaining())
+    return xml_parser.from_xml_bytes(content, deadline=deadline, **parser_kwargs)
+
+
+def _fetch(fetch, uri, hop, timeout=None):
+    try:
+        return fetch(uri) if timeout is None else fetch(uri, timeout=timeout)
+    except Exception as e:
+        raise UnwrapError("cannot fetch chain hop %d from %s: %s" % (hop, uri, e))